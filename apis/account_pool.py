@@ -0,0 +1,164 @@
+# encoding: utf-8
+import asyncio
+import time
+from contextlib import contextmanager
+
+from encrypt import SigningContext
+
+
+# 账号被风控或登录失效时的HTTP状态码 461/471为需要验证 401/403为没有登录或没有权限
+ACCOUNT_BLOCKED_STATUSES = frozenset({401, 403, 461, 471})
+# 账号被风控或登录失效时接口返回的code
+# -100登录已过期 -101没有登录信息 -104没有权限 300011账号异常 300013访问频次异常 300015浏览器异常
+ACCOUNT_BLOCKED_CODES = frozenset({-100, -101, -104, 300011, 300013, 300015})
+
+
+def account_blocked(outcome) -> bool:
+    """
+        请求是否因为账号被风控或登录失效而失败
+        连接出错和接口返回的业务错误(笔记不存在、参数错误等)和账号无关
+    """
+    return outcome.status in ACCOUNT_BLOCKED_STATUSES or outcome.code in ACCOUNT_BLOCKED_CODES
+
+
+class Account:
+    """
+        账号池中的一个账号 持有自己的签名上下文和请求统计
+        :param cookies: 账号的cookies
+        :param name: 账号的名字 默认为cookies中的a1
+    """
+
+    def __init__(self, cookies: str, name: str = None):
+        self.cookies = cookies
+        self.signing_context = SigningContext(cookies)
+        self.name = name or self.signing_context.a1
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        # 连续失败次数 决定冷却时间
+        self.consecutive_errors = 0
+        self.cooldown_until = 0.0
+        # 被选中签名的次数 负载相同时轮流使用
+        self.picks = 0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    def is_healthy(self, now: float) -> bool:
+        return self.cooldown_until <= now
+
+
+class AccountPool:
+    """
+        多账号池 每次请求交给在途请求最少的健康账号
+        账号被风控或登录失效后冷却 base_cooldown * 2^(连续失败次数-1) 秒 最多 max_cooldown 秒 成功一次后清零
+        所有账号都在冷却时 使用最早恢复的账号 单账号时和不使用账号池的行为一致
+        :param cookies_list: 多个账号的cookies 第一个为主账号
+        :param base_cooldown: 第一次失败的冷却时间(秒)
+        :param max_cooldown: 冷却时间的上限(秒)
+    """
+
+    def __init__(self, cookies_list: list, base_cooldown: float = 5.0, max_cooldown: float = 300.0):
+        if not cookies_list:
+            raise Exception("请传入至少一个账号的cookies")
+        self.accounts = [Account(cookies) for cookies in cookies_list]
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self._by_a1 = {account.signing_context.a1: account for account in self.accounts}
+
+    @property
+    def primary(self) -> Account:
+        return self.accounts[0]
+
+    def get(self, account) -> Account:
+        """
+            按名字、a1或者下标找到账号
+        """
+        if isinstance(account, Account):
+            return account
+        if isinstance(account, int):
+            return self.accounts[account]
+        for item in self.accounts:
+            if account in (item.name, item.signing_context.a1):
+                return item
+        raise Exception(f"账号{account}不在账号池中")
+
+    def pick(self, count: bool = True) -> Account:
+        """
+            选择在途请求最少的健康账号 都在冷却时选择最早恢复的账号
+            :param count: 是否计入轮换次数 提前签名时为False 签名真正用上时再调用 count_pick
+        """
+        now = time.monotonic()
+        healthy = [account for account in self.accounts if account.is_healthy(now)]
+        if healthy:
+            account = min(healthy, key=lambda item: (item.in_flight, item.picks))
+        else:
+            account = min(self.accounts, key=lambda item: item.cooldown_until)
+        if count:
+            account.picks += 1
+        return account
+
+    def count_pick(self, account: Account):
+        """
+            把一次选择计入账号的轮换次数 不是池中的账号时忽略
+        """
+        if account is not None:
+            account.picks += 1
+
+    def account_of(self, signed: tuple) -> Account:
+        """
+            根据签名结果中的cookies找到签名的账号 不是池中的账号时返回None
+        """
+        return self._by_a1.get(signed[1].get('a1'))
+
+    def _cool_down(self, account: Account):
+        account.errors += 1
+        account.consecutive_errors += 1
+        cooldown = min(self.max_cooldown, self.base_cooldown * 2 ** (account.consecutive_errors - 1))
+        account.cooldown_until = time.monotonic() + cooldown
+
+    @contextmanager
+    def track(self, account: Account, outcome):
+        """
+            统计一次请求 请求结束后更新账号的健康状态
+            只有 account_blocked 认为账号被风控或登录失效时算失败 连接出错和业务错误不算
+            被取消的请求只计数 不算失败
+        """
+        if account is None:
+            yield
+            return
+        account.in_flight += 1
+        account.requests += 1
+        try:
+            yield
+        except (asyncio.CancelledError, GeneratorExit):
+            raise
+        except BaseException:
+            # 例如风控时返回的验证页面不是json
+            if account_blocked(outcome):
+                self._cool_down(account)
+            raise
+        else:
+            if account_blocked(outcome):
+                self._cool_down(account)
+            else:
+                account.consecutive_errors = 0
+        finally:
+            account.in_flight -= 1
+
+    def stats(self) -> dict:
+        """
+            各账号的请求数、失败数、失败率、在途请求数和剩余冷却时间(秒)
+        """
+        now = time.monotonic()
+        return {
+            account.name: {
+                'requests': account.requests,
+                'errors': account.errors,
+                'error_rate': account.error_rate,
+                'in_flight': account.in_flight,
+                'cooldown': max(0.0, account.cooldown_until - now),
+            }
+            for account in self.accounts
+        }
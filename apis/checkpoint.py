@@ -0,0 +1,151 @@
+# encoding: utf-8
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+
+
+@dataclass(kw_only=True, slots=True)
+class CheckpointState:
+    # 下一页的cursor
+    cursor: str
+    # 已经提交的页数
+    page: int
+    # 是否已经翻到最后一页
+    done: bool
+
+
+@dataclass(kw_only=True, slots=True)
+class CheckpointStats:
+    # 从中断的位置继续翻页的次数
+    resumed: int = 0
+    # 提交的页数
+    pages: int = 0
+    # 之前已经返回过 被跳过的条目数
+    skipped: int = 0
+
+
+class CheckpointStore:
+    """
+        翻页断点 保存在sqlite文件中 每翻完一页在同一个事务中提交 (接口, 目标id, 下一页cursor, 页数) 和这一页条目的id
+        中断后重新运行时从最后提交的cursor继续 之前返回过的条目不再返回
+        翻到最后一页后 下次运行从第一页重新开始 只返回新的条目
+        页面在调用方处理完、请求下一页时才提交 调用方处理到一半被中断时这一页会重新返回
+        :param path: sqlite文件路径
+        :param synchronous: sqlite的synchronous设置 NORMAL在进程崩溃时不丢数据 FULL在断电时也不丢
+    """
+
+    def __init__(self, path: str, synchronous: str = 'NORMAL'):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.stats = CheckpointStats()
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(f'PRAGMA synchronous={synchronous}')
+        self._db.execute('CREATE TABLE IF NOT EXISTS checkpoints (endpoint TEXT NOT NULL, target TEXT NOT NULL, '
+                         'cursor TEXT NOT NULL, page INTEGER NOT NULL, done INTEGER NOT NULL, '
+                         'updated_at REAL NOT NULL, PRIMARY KEY (endpoint, target))')
+        self._db.execute('CREATE TABLE IF NOT EXISTS checkpoint_items (endpoint TEXT NOT NULL, target TEXT NOT NULL, '
+                         'item_id TEXT NOT NULL, PRIMARY KEY (endpoint, target, item_id)) WITHOUT ROWID')
+
+    def load(self, endpoint: str, target: str):
+        """
+            返回 CheckpointState 没有断点时返回None
+        """
+        row = self._db.execute('SELECT cursor, page, done FROM checkpoints WHERE endpoint = ? AND target = ?',
+                               (endpoint, target)).fetchone()
+        if row is None:
+            return None
+        return CheckpointState(cursor=row[0], page=row[1], done=bool(row[2]))
+
+    def seen(self, endpoint: str, target: str, item_ids: list) -> set:
+        """
+            item_ids中已经提交过的id
+        """
+        seen = set()
+        for start in range(0, len(item_ids), 500):
+            chunk = item_ids[start:start + 500]
+            rows = self._db.execute(f'SELECT item_id FROM checkpoint_items WHERE endpoint = ? AND target = ? '
+                                    f'AND item_id IN ({", ".join("?" * len(chunk))})', (endpoint, target, *chunk))
+            seen.update(row[0] for row in rows)
+        return seen
+
+    def commit(self, endpoint: str, target: str, cursor: str, page: int, item_ids: list, done: bool):
+        """
+            在一个事务中保存下一页的cursor和这一页条目的id
+        """
+        self._db.execute('BEGIN')
+        try:
+            self._db.execute('INSERT OR REPLACE INTO checkpoints (endpoint, target, cursor, page, done, updated_at) '
+                             'VALUES (?, ?, ?, ?, ?, ?)', (endpoint, target, cursor, page, int(done), time.time()))
+            self._db.executemany('INSERT OR IGNORE INTO checkpoint_items (endpoint, target, item_id) VALUES (?, ?, ?)',
+                                 [(endpoint, target, item_id) for item_id in item_ids])
+            self._db.execute('COMMIT')
+        except Exception:
+            self._db.execute('ROLLBACK')
+            raise
+        self.stats.pages += 1
+
+    def reset(self, endpoint: str, target: str = None):
+        """
+            删除断点和已经返回过的条目 target为空时删除这个接口的全部断点
+        """
+        where, params = ('endpoint = ?', (endpoint,)) if target is None else \
+            ('endpoint = ? AND target = ?', (endpoint, target))
+        self._db.execute('BEGIN')
+        self._db.execute(f'DELETE FROM checkpoints WHERE {where}', params)
+        self._db.execute(f'DELETE FROM checkpoint_items WHERE {where}', params)
+        self._db.execute('COMMIT')
+
+    def checkpoint(self, endpoint: str, target: str, id_key: str = 'id') -> 'PageCheckpoint':
+        return PageCheckpoint(self, endpoint, target, id_key)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class PageCheckpoint:
+    """
+        一次翻页使用的断点 传给 iter_cursor_pages 的checkpoint参数
+        :param store: CheckpointStore
+        :param endpoint: 接口名 一般用 ApiType 的名字
+        :param target: 翻页的对象 例如用户id、笔记id
+        :param id_key: 条目中id的字段名
+    """
+
+    def __init__(self, store: CheckpointStore, endpoint: str, target: str, id_key: str = 'id'):
+        self.store = store
+        self.endpoint = endpoint
+        self.target = str(target)
+        self.id_key = id_key
+        self.page = 0
+
+    def start(self, cursor: str) -> str:
+        """
+            返回开始翻页的cursor 有未完成的断点时从断点继续 否则从传入的cursor开始
+        """
+        state = self.store.load(self.endpoint, self.target)
+        if state is None or state.done:
+            self.page = 0
+            return cursor
+        self.page = state.page
+        self.store.stats.resumed += 1
+        return state.cursor
+
+    def filter(self, items: list) -> list:
+        """
+            去掉之前已经返回过的条目
+        """
+        ids = [str(item[self.id_key]) for item in items if self.id_key in item]
+        seen = self.store.seen(self.endpoint, self.target, ids) if ids else set()
+        if not seen:
+            return items
+        self.store.stats.skipped += len(seen)
+        return [item for item in items if str(item.get(self.id_key)) not in seen]
+
+    def commit(self, cursor: str, items: list, done: bool):
+        self.page += 1
+        ids = [str(item[self.id_key]) for item in items if self.id_key in item]
+        self.store.commit(self.endpoint, self.target, cursor, self.page, ids, done)
@@ -0,0 +1,61 @@
+# encoding: utf-8
+import asyncio
+
+
+async def iter_pages(fetch_page, window: int = 1, start_page: int = 1):
+    """
+        按页码翻页 同时请求窗口内的window页 按页码顺序返回结果
+        调用方停止迭代后 未完成的页会被取消 需要配合 contextlib.aclosing 使用
+        :param fetch_page: fetch_page(page) 返回 (success, msg, res_json)
+        :param window: 同时请求的页数 1表示逐页请求
+        :param start_page: 起始页码
+        逐页返回 (success, msg, res_json)
+    """
+    window = max(window, 1)
+    tasks = {}
+    page = next_page = start_page
+    try:
+        while True:
+            while next_page < page + window:
+                tasks[next_page] = asyncio.create_task(fetch_page(next_page))
+                next_page += 1
+            yield await tasks.pop(page)
+            page += 1
+    finally:
+        for task in tasks.values():
+            task.cancel()
+
+
+async def iter_cursor_pages(fetch_page, key: str, cursor: str = '', stop_on_empty: bool = True,
+                            stop_on_first_empty: bool = False, checkpoint=None):
+    """
+        按cursor翻页 每拿到一页就返回这一页的列表 调用方可以随时停止 不会多请求后面的页
+        :param fetch_page: fetch_page(cursor) 返回 (success, msg, res_json)
+        :param key: 结果列表在data中的字段名
+        :param cursor: 起始cursor 第一页为空
+        :param stop_on_empty: 某一页为空时是否停止
+        :param stop_on_first_empty: 第一页为空时停止 中间的空页不停止 stop_on_empty为False时才有意义
+        :param checkpoint: apis.checkpoint.PageCheckpoint 从上次中断的cursor继续 跳过已经返回过的条目
+        逐页返回结果列表 请求失败时抛出异常
+    """
+    if checkpoint is not None:
+        cursor = checkpoint.start(cursor)
+    first = True
+    while True:
+        success, msg, res_json = await fetch_page(cursor)
+        if not success:
+            raise Exception(msg)
+        items = res_json["data"][key]
+        if 'cursor' in res_json["data"]:
+            cursor = str(res_json["data"]["cursor"])
+        else:
+            break
+        empty = len(items) == 0 and (stop_on_empty or (stop_on_first_empty and first))
+        done = empty or not res_json["data"]["has_more"]
+        first = False
+        yield items if checkpoint is None else checkpoint.filter(items)
+        if checkpoint is not None:
+            # 调用方处理完这一页 请求下一页时才提交
+            checkpoint.commit(cursor, items, done)
+        if done:
+            break
@@ -3,14 +3,24 @@ import asyncio
 import csv
 import json
 import urllib
+from contextlib import aclosing, asynccontextmanager, contextmanager, nullcontext
+from contextvars import ContextVar
 from dataclasses import dataclass, asdict
 from enum import Enum, unique
 
 import aiohttp
 
 from loguru import logger
-from encrypt import generate_params
+from encrypt import SignerPool, spare_cpus
 from encrypt.misc_encrypt import MiscEncrypt
+from apis.presign import Presigner, PresignStats
+from apis.paginator import iter_pages, iter_cursor_pages
+from apis.rate_controller import RateController, SlotOutcome
+from apis.account_pool import AccountPool
+from apis.proxy_pool import ProxyPool
+from apis.response_cache import ResponseCache
+from apis.single_flight import SingleFlight
+from apis.checkpoint import CheckpointStore
 
 
 def splice_url(api, params):
@@ -125,49 +135,375 @@ def get_url_by_api_type(api_type: ApiType):
     elif api_type == ApiType.GET_NEW_FOLLOW:
         return '/api/sns/web/v1/you/connections'
 
+
+# 请求路径到ApiType的映射 多个ApiType共用一个路径时取定义在前的
+_API_TYPE_BY_PATH = {get_url_by_api_type(api_type): api_type for api_type in reversed(ApiType)}
+
+
+# 和登录账号绑定的接口 没有指定账号时总是使用主账号
+ACCOUNT_BOUND_API_TYPES = frozenset({
+    ApiType.GET_SMS_CODE,
+    ApiType.SEND_SMS_CODE,
+    ApiType.GET_MY_INFO_V1,
+    ApiType.GET_MY_INFO_V2,
+    ApiType.GET_UNREAD_MESSAGE,
+    ApiType.GET_COMMENT_AND_AT_REMIND,
+    ApiType.GET_LIKE_AND_COLLECT,
+    ApiType.GET_NEW_FOLLOW,
+})
+
+
+# 开启响应缓存时各接口的默认缓存时间(秒) 可以用ResponseCache的ttls覆盖 不在表中的接口不缓存
+DEFAULT_CACHE_TTLS = {
+    ApiType.GET_HOME_CATEGORY: 3600,
+    ApiType.GET_USER_INFO: 600,
+    ApiType.GET_USER_NOTE: 300,
+    ApiType.GET_USER_POST_DETAIL: 600,
+    ApiType.GET_VIDEO_DETAIL: 600,
+    ApiType.GET_USER_LIKE_NOTE: 300,
+    ApiType.GET_USER_COLLECT_NOTE: 300,
+    ApiType.GET_SEARCH_KEY_WORD: 600,
+    ApiType.GET_SEARCH_NOTE: 300,
+    ApiType.GET_SEARCH_USER: 300,
+    ApiType.GET_NOTE_COMMENT: 120,
+    ApiType.GET_NOTE_REPLY_COMMENT: 120,
+}
+
+# 始终不缓存的接口 登录、短信验证码、个人信息和通知 以及每次都应该不同的首页推荐
+NEVER_CACHED_API_TYPES = ACCOUNT_BOUND_API_TYPES | {ApiType.GET_HOME_RECOMMEND}
+
+# 有副作用的接口 相同的并发请求也不合并
+SINGLE_FLIGHT_EXCLUDED_API_TYPES = frozenset({ApiType.GET_SMS_CODE, ApiType.SEND_SMS_CODE})
+
+# 每次请求随机生成或者不影响返回内容的参数 生成缓存和合并请求的key时去掉
+CACHE_IGNORED_PARAMS = frozenset({'search_id', 'request_id', 'xsec_token', 'xsec_source'})
+
+
+def _normalize_cache_params(value):
+    if isinstance(value, dict):
+        return {key: _normalize_cache_params(item) for key, item in value.items() if key not in CACHE_IGNORED_PARAMS}
+    if isinstance(value, list):
+        return [_normalize_cache_params(item) for item in value]
+    return value
+
+
+def get_api_type_by_url(api: str):
+    """
+        根据请求的api(可以带参数)找到对应的ApiType 找不到时返回不带参数的路径
+    """
+    path = api.split('?')[0]
+    return _API_TYPE_BY_PATH.get(path, path)
+
 """
     获小红书的api
     :param cookies_str: 你的cookies
 """
 class XhsApi:
-    def __init__(self, cookies: str = None, proxies: dict = None):
-        if cookies:
-            self._cookies = cookies
-        else:
+    def __init__(self, cookies: str | list = None, proxies: str | list | ProxyPool = None,
+                 limit_per_host: int = 10, keepalive_timeout: float = 30, ttl_dns_cache: int = 300,
+                 sign_workers: int = 0, sign_in_process: bool = True,
+                 presign_depth: int = 0, presign_ttl: float = 60,
+                 rate_controller: RateController = None, account_cooldown: float = 5.0,
+                 response_cache: ResponseCache = None, single_flight: bool = True,
+                 checkpoint_store: CheckpointStore = None):
+        """
+            :param cookies: 你的cookies 传入多个账号的cookies列表时使用账号池 第一个为主账号
+            :param proxies: 代理 传入代理列表或ProxyPool时按延迟和失败率从代理池中选择
+            :param limit_per_host: 每个host的最大连接数
+            :param keepalive_timeout: 空闲连接的保活时间(秒)
+            :param ttl_dns_cache: DNS缓存时间(秒)
+            :param sign_workers: 签名池的worker数量 0表示在事件循环中直接签名 只有多于一个cpu核心时签名池才有收益 单核时保持0
+            :param sign_in_process: 签名池使用进程池 否则使用线程池 进程数不超过cpu核数减一 单核时改用线程池
+            :param presign_depth: 按页码翻页时提前签名的页数 0表示不提前签名
+                提前签名在线程或签名池中计算 配合进程签名池且有空闲CPU核心时才可能省下时间
+            :param presign_ttl: 提前签名的有效期(秒) 超过后重新签名
+            :param rate_controller: 按接口自适应控制并发的控制器 为空时不限速 可以在多个XhsApi间共享
+            :param account_cooldown: 账号被风控或登录失效后的基础冷却时间(秒) 连续失败时指数增长
+            :param response_cache: 响应缓存 为空时不缓存 可以在多个XhsApi间共享
+            :param single_flight: 合并同时进行的相同请求 只签名和发送一次
+            :param checkpoint_store: 翻页断点 用户笔记和评论翻页中断后从上次的cursor继续 为空时每次从第一页开始
+        """
+        if not cookies:
             raise Exception("请传入小红书的cookies")
-        self._proxies = proxies
+        self.account_pool = AccountPool([cookies] if isinstance(cookies, str) else list(cookies),
+                                        base_cooldown=account_cooldown)
+        self._cookies = self.account_pool.primary.cookies
+        self._signing_context = self.account_pool.primary.signing_context
+        self._pinned_account = ContextVar(f'xhs_pinned_account_{id(self)}', default=None)
+        if isinstance(proxies, (list, tuple)):
+            proxies = ProxyPool(list(proxies))
+        self.proxy_pool = proxies if isinstance(proxies, ProxyPool) else None
+        self._proxies = None if self.proxy_pool else proxies
         self._base_url = "https://edith.xiaohongshu.com"
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._ttl_dns_cache = ttl_dns_cache
+        self._session = None
+        self._sign_workers = sign_workers
+        if sign_workers and not spare_cpus():
+            logger.warning('只有一个cpu核心 签名池不会提高吞吐 建议sign_workers=0')
+        self._sign_in_process = sign_in_process
+        self._signer_pool = None
+        self._presign_depth = presign_depth
+        self._presign_ttl = presign_ttl
+        self.presign_stats = PresignStats()
+        self.rate_controller = rate_controller
+        self.response_cache = response_cache
+        self.single_flight = SingleFlight() if single_flight else None
+        self.checkpoint_store = checkpoint_store
 
-    async def get(self, api: str) -> (bool, str, dict):
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def __del__(self):
+        """
+            没有使用async with也没有调用close时提示 连接池要在事件循环中关闭 这里只能关闭签名池
+        """
+        session = getattr(self, '_session', None)
+        if session is not None and not session.closed:
+            logger.warning('XhsApi没有关闭 请使用 async with XhsApi(...) as xhs_apis 或在结束时 await xhs_apis.close()')
+        signer_pool = getattr(self, '_signer_pool', None)
+        if signer_pool is not None:
+            signer_pool.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+            获取共享的连接池会话 第一次使用或关闭后重新创建
+            cookies每次请求单独传入 不使用会话的cookie_jar 保持和每次新建会话时一致的行为
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=self._limit_per_host,
+                                             keepalive_timeout=self._keepalive_timeout,
+                                             use_dns_cache=True,
+                                             ttl_dns_cache=self._ttl_dns_cache)
+            self._session = aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar())
+        return self._session
+
+    async def close(self):
+        """
+            关闭连接池和签名池
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._signer_pool is not None:
+            self._signer_pool.close()
+        self._signer_pool = None
+
+    def _get_signer_pool(self) -> SignerPool:
+        if self._signer_pool is None:
+            self._signer_pool = SignerPool(self._cookies, self._sign_workers, self._sign_in_process)
+        return self._signer_pool
+
+    @contextmanager
+    def pin_account(self, account):
+        """
+            在with块中(包括其中创建的task)所有请求都使用指定的账号
+            with xhs_apis.pin_account(1): ...
+            :param account: 账号的名字、a1或者在cookies列表中的下标
+        """
+        token = self._pinned_account.set(self.account_pool.get(account))
         try:
-            res_json = None
-            async with (aiohttp.ClientSession() as s):
-                _headers, _cookies, _data = await generate_params(api, data=None, cookies=self._cookies)
-                url = self._base_url + api
-                async with (
-                    s.get(url, headers=_headers, cookies=_cookies, proxy=self._proxies) as response
-                ):
-                    res_json = await response.json()
-                    success, msg = res_json["success"], res_json["msg"]
-        except Exception as e:
-            success = False
-            msg = str(e)
-        return success, msg, res_json
+            yield
+        finally:
+            self._pinned_account.reset(token)
+
+    def _account_for(self, api: str, count: bool = True):
+        """
+            选择签名用的账号 指定了账号时用指定的 和账号绑定的接口用主账号 其余交给账号池
+            :param count: 交给账号池时是否计入轮换次数
+        """
+        pinned = self._pinned_account.get()
+        if pinned is not None:
+            return pinned
+        if get_api_type_by_url(api) in ACCOUNT_BOUND_API_TYPES:
+            return self.account_pool.primary
+        return self.account_pool.pick(count)
+
+    async def sign(self, api: str, data: dict = None):
+        """
+            签名单个请求 配置了签名池时在池中计算
+            :param api: 请求的api
+            :param data: post请求的参数 get请求为None
+            返回 (请求头, cookies, 序列化后的data) 可以直接传给get/post的signed参数
+        """
+        return await self._sign_as(self._account_for(api), api, data)
+
+    async def presign(self, api: str, data: dict = None):
+        """
+            提前签名 供 Presigner 使用 配置了签名池时在池中计算 否则在线程中计算 不占用事件循环
+            选择账号时不计入轮换次数 签名没用上(翻页提前结束或过期)时不影响账号的轮换
+            签名真正用上时调用 count_presigned
+        """
+        return await self._sign_as(self._account_for(api, count=False), api, data, in_thread=True)
+
+    def count_presigned(self, api: str, signed: tuple):
+        """
+            提前签名真正用上时计入账号的轮换次数 和sign一样 指定了账号和绑定主账号的接口不计数
+        """
+        if self._pinned_account.get() is None and get_api_type_by_url(api) not in ACCOUNT_BOUND_API_TYPES:
+            self.account_pool.count_pick(self.account_pool.account_of(signed))
+
+    async def _sign_as(self, account, api: str, data: dict = None, in_thread: bool = False):
+        """
+            用指定的账号签名 参数同sign
+            :param in_thread: 没有签名池时在线程中计算 不占用事件循环
+        """
+        if self._sign_workers:
+            return await self._get_signer_pool().sign(api, data, account.cookies)
+        if in_thread:
+            return await asyncio.to_thread(account.signing_context.sign_sync, api, data)
+        return account.signing_context.sign_sync(api, data)
+
+    async def sign_many(self, requests: list) -> list:
+        """
+            批量签名 每个请求分别选择账号
+            :param requests: [(api, data), ...] get请求的data为None
+            返回签名结果列表 顺序和requests一致
+        """
+        accounts = [self._account_for(api) for api, _ in requests]
+        if not self._sign_workers:
+            return [account.signing_context.sign_sync(api, data) for account, (api, data) in zip(accounts, requests)]
+        groups = {}
+        for index, account in enumerate(accounts):
+            groups.setdefault(account.cookies, []).append(index)
+        batches = await asyncio.gather(*[
+            self._get_signer_pool().sign_many([requests[index] for index in indexes], cookies)
+            for cookies, indexes in groups.items()
+        ])
+        signed = [None] * len(requests)
+        for indexes, batch in zip(groups.values(), batches):
+            for index, item in zip(indexes, batch):
+                signed[index] = item
+        return signed
+
+    def _pick_proxy(self, account):
+        """
+            配置了代理池时 为请求所用的账号选择代理
+        """
+        if self.proxy_pool is None:
+            return None
+        return self.proxy_pool.pick(account.name if account else None)
+
+    @asynccontextmanager
+    async def _pace(self, api: str, account):
+        """
+            配置了rate_controller时 占用api对应接口的一个并发名额 多账号时每个账号分别计算
+            同时把请求结果记到所用的账号上 排队等待名额的请求也算账号的在途请求 选账号时会避开排队多的账号
+        """
+        outcome = SlotOutcome()
+        if self.rate_controller is None:
+            slot = nullcontext(outcome)
+        elif account is None or len(self.account_pool.accounts) == 1:
+            slot = self.rate_controller.slot(get_api_type_by_url(api), outcome)
+        else:
+            slot = self.rate_controller.slot((account.name, get_api_type_by_url(api)), outcome)
+        with self.account_pool.track(account, outcome):
+            async with slot:
+                yield outcome
+
+    def _track_proxy(self, proxy, outcome: SlotOutcome):
+        """
+            把请求结果记到所用的代理上
+        """
+        return nullcontext() if proxy is None else self.proxy_pool.track(proxy, outcome)
+
+    def _presigner(self, build) -> Presigner:
+        """
+            配置了presign_depth时 为按页码翻页的接口创建提前签名器
+            :param build: build(page) 返回第page页的 (api, data)
+        """
+        if not self._presign_depth:
+            return None
+        return Presigner(self, build, self._presign_depth, self._presign_ttl, self.presign_stats)
+
+    @staticmethod
+    def _request_key(api: str, data: dict = None) -> str:
+        """
+            由请求路径、排序后的参数和post的data组成 去掉CACHE_IGNORED_PARAMS中的参数
+            用作响应缓存和合并请求的key
+        """
+        path, _, query = api.partition('?')
+        params = sorted((key, value) for key, value in urllib.parse.parse_qsl(query, keep_blank_values=True)
+                        if key not in CACHE_IGNORED_PARAMS)
+        key = path + '?' + urllib.parse.urlencode(params)
+        if data is not None:
+            key += '#' + json.dumps(_normalize_cache_params(data), sort_keys=True, ensure_ascii=False,
+                                    separators=(',', ':'))
+        return key
 
-    async def post(self, api: str, data: dict) -> (bool, str, dict):
+    def _cache_ttl(self, api_type) -> float:
+        """
+            返回接口在响应缓存中的缓存时间 0表示不缓存
+        """
+        if self.response_cache is None or api_type in NEVER_CACHED_API_TYPES:
+            return 0
+        return self.response_cache.ttl_for(api_type, DEFAULT_CACHE_TTLS.get(api_type, 0))
+
+    async def get(self, api: str, signed: tuple = None) -> (bool, str, dict):
+        """
+            :param api: 请求的api
+            :param signed: sign/sign_many 提前生成的签名 为空时现场签名
+        """
+        return await self._request('GET', api, None, signed)
+
+    async def post(self, api: str, data: dict, signed: tuple = None) -> (bool, str, dict):
+        """
+            :param api: 请求的api
+            :param data: 请求的参数
+            :param signed: sign/sign_many 提前生成的签名 为空时现场签名
+        """
+        return await self._request('POST', api, data, signed)
+
+    async def _request(self, method: str, api: str, data: dict, signed: tuple) -> (bool, str, dict):
+        """
+            依次经过响应缓存和合并请求 都没有命中时才签名并发送
+        """
+        api_type = get_api_type_by_url(api)
+        cache_ttl = self._cache_ttl(api_type)
+        if cache_ttl <= 0 and (self.single_flight is None or api_type in SINGLE_FLIGHT_EXCLUDED_API_TYPES):
+            return await self._send(method, api, data, signed)
+        request_key = self._request_key(api, data)
+        if cache_ttl > 0:
+            res_json = self.response_cache.get(request_key)
+            if res_json is not None:
+                return True, res_json["msg"], res_json
+        send = lambda: self._send(method, api, data, signed, request_key if cache_ttl > 0 else None, cache_ttl)
+        if self.single_flight is None or api_type in SINGLE_FLIGHT_EXCLUDED_API_TYPES:
+            return await send()
+        # 指定了账号的请求只和指定了同一个账号的请求合并
+        pinned = self._pinned_account.get()
+        flight_key = (method, request_key, pinned.name if pinned else None)
+        return await self.single_flight.do(flight_key, send)
+
+    async def _send(self, method: str, api: str, data: dict, signed: tuple,
+                    cache_key: str = None, cache_ttl: float = 0) -> (bool, str, dict):
         try:
             res_json = None
-            async with (aiohttp.ClientSession() as s):
-                _headers, _cookies, _data = await generate_params(api, data, cookies=self._cookies)
-                url = self._base_url + api
-                async with (
-                    s.post(url, headers=_headers, data=_data, cookies=_cookies, proxy=self._proxies) as response
-                ):
-                    res_json = await response.json()
-                    success, msg = res_json["success"], res_json["msg"]
+            s = self._get_session()
+            url = self._base_url + api
+            # 先选账号、占用并发名额再签名 在降低后的并发上限后排队的请求发出时x-t不会过期
+            account = self.account_pool.account_of(signed) if signed else self._account_for(api)
+            async with self._pace(api, account) as outcome:
+                signed = signed or await self._sign_as(account, api, data)
+                _headers, _cookies, _data = signed
+                proxy = self._pick_proxy(account)
+                with self._track_proxy(proxy, outcome):
+                    async with s.request(method, url, headers=_headers, data=_data, cookies=_cookies,
+                                         proxy=proxy.url if proxy else self._proxies) as response:
+                        outcome.status = response.status
+                        res_json = await response.json()
+                        success, msg = res_json["success"], res_json["msg"]
+                        outcome.ok = success
+                        outcome.code = res_json.get("code")
         except Exception as e:
             success = False
             msg = str(e)
+        if success and cache_key is not None:
+            self.response_cache.put(cache_key, res_json, cache_ttl)
         return success, msg, res_json
 
     async def get_sms_code(self, phone: str)  -> (bool, str, dict):
@@ -335,32 +671,53 @@ class XhsApi:
            :param user_url: 你想要获取的用户的url
            返回用户的所有笔记
         """
-        # 第一个cursor为空
-        cursor = ''
-        note_list = []
+        return await self._collect_pages(lambda: self.iter_user_notes(user_url))
+
+    def iter_user_notes(self, user_url: str):
+        """
+            逐页获取用户的笔记 async for notes in xhs_apis.iter_user_notes(user_url)
+            :param user_url: 你想要获取的用户的url
+        """
+        user_id, xsec_token, xsec_source = self._parse_user_url(user_url, "pc_search")
+        return iter_cursor_pages(lambda cursor: self.get_user_note_info(user_id, cursor, xsec_token, xsec_source), "notes",
+                                 checkpoint=self._page_checkpoint(ApiType.GET_USER_NOTE, user_id, 'note_id'))
+
+    def _page_checkpoint(self, api_type: ApiType, target: str, id_key: str = 'id'):
+        """
+            没有设置checkpoint_store时返回None
+        """
+        if self.checkpoint_store is None:
+            return None
+        return self.checkpoint_store.checkpoint(api_type.name, target, id_key)
+
+    @staticmethod
+    def _parse_user_url(user_url: str, default_source: str) -> (str, str, str):
+        """
+            从用户主页url中解析出 user_id, xsec_token, xsec_source
+        """
+        urlParse = urllib.parse.urlparse(user_url)
+        user_id = urlParse.path.split("/")[-1]
+        kvs = urlParse.query.split('&')
+        kvDist = {kv.split('=')[0]: kv.split('=')[1] for kv in kvs}
+        xsec_token = kvDist['xsec_token'] if 'xsec_token' in kvDist else ""
+        xsec_source = kvDist['xsec_source'] if 'xsec_source' in kvDist else default_source
+        return user_id, xsec_token, xsec_source
+
+    @staticmethod
+    async def _collect_pages(make_pages) -> (bool, str, list):
+        """
+            把逐页返回的结果合并成一个列表 出错时返回已经拿到的部分
+            :param make_pages: 返回分页迭代器的函数 解析参数出错时同样返回失败
+        """
+        result_list = []
         try:
-            urlParse = urllib.parse.urlparse(user_url)
-            user_id = urlParse.path.split("/")[-1]
-            kvs = urlParse.query.split('&')
-            kvDist = {kv.split('=')[0]: kv.split('=')[1] for kv in kvs}
-            xsec_token = kvDist['xsec_token'] if 'xsec_token' in kvDist else ""
-            xsec_source = kvDist['xsec_source'] if 'xsec_source' in kvDist else "pc_search"
-            while True:
-                success, msg, res_json = await self.get_user_note_info(user_id, cursor, xsec_token, xsec_source)
-                if not success:
-                    raise Exception(msg)
-                notes = res_json["data"]["notes"]
-                if 'cursor' in res_json["data"]:
-                    cursor = str(res_json["data"]["cursor"])
-                else:
-                    break
-                note_list.extend(notes)
-                if len(notes) == 0 or not res_json["data"]["has_more"]:
-                    break
+            async for items in make_pages():
+                result_list.extend(items)
+            success, msg = True, '成功'
         except Exception as e:
             success = False
             msg = str(e)
-        return success, msg, note_list
+        return success, msg, result_list
 
     async def get_note_info(self, note_id: str, xsec_source: str, xsec_token: str) -> (bool, str, dict):
         """
@@ -387,41 +744,77 @@ class XhsApi:
         success, msg, res_json = await self.post(api, data)
         return success, msg, res_json
 
-    async def get_video_urls(self, user_url: str) -> (bool, str, list):
-        def handle_video_info(info: dict) -> VideoInfo:
-            _video_info = VideoInfo(
-                title=res_json['data']['items'][0]['note_card']['title'],
-                tag=res_json['data']['items'][0]['note_card']['desc'],
-                cover_url=res_json['data']['items'][0]['note_card']['image_list'][0]['url_pre'],
-                duration=res_json['data']['items'][0]['note_card']['video']['media']['video']['duration'],
-                fps=res_json['data']['items'][0]['note_card']['video']['media']['stream']['h265'][0]['fps'],
-                width=res_json['data']['items'][0]['note_card']['video']['media']['stream']['h265'][0]['width'],
-                height=res_json['data']['items'][0]['note_card']['video']['media']['stream']['h265'][0][
-                    'height'],
-                size=res_json['data']['items'][0]['note_card']['video']['media']['stream']['h265'][0]['size'],
-                h265_url=res_json['data']['items'][0]['note_card']['video']['media']['stream']['h265'][0][
-                    'master_url']
-            )
-            return _video_info
+    @staticmethod
+    def _extract_video_info(res_json: dict) -> VideoInfo:
+        """
+            从笔记详情中提取视频信息
+        """
+        note_card = res_json['data']['items'][0]['note_card']
+        media = note_card['video']['media']
+        h265 = media['stream']['h265'][0]
+        return VideoInfo(
+            title=note_card['title'],
+            tag=note_card['desc'],
+            cover_url=note_card['image_list'][0]['url_pre'],
+            duration=media['video']['duration'],
+            fps=h265['fps'],
+            width=h265['width'],
+            height=h265['height'],
+            size=h265['size'],
+            h265_url=h265['master_url']
+        )
 
-        success, msg, note_list = await self.get_user_all_notes(user_url)
-        note_params = []
-        # 提取必要参数 用于请求获取视频地址
-        for note in note_list:
-            if note['type'] == 'video':
-                note_params.append((note['note_id'], note['xsec_token']))
+    async def iter_video_infos(self, notes: list, concurrency: int = 5):
+        """
+            并发获取视频笔记的视频信息 先拿到的先返回
+            async for note_id, success, msg, video_info in xhs_apis.iter_video_infos(notes)
+            :param notes: 用户笔记列表 非视频笔记会被跳过
+            :param concurrency: 同时请求笔记详情的数量
+        """
+        semaphore = asyncio.Semaphore(concurrency)
 
-        note_list = []
-        for index, params in enumerate(note_params):
-            note_id, xsec_token = params
-            try:
-                success, msg, res_json = await self.get_note_info(note_id, 'pc_user', xsec_token)
-                video_info = handle_video_info(res_json)
-                note_list.append(asdict(video_info))
-            except Exception as e:
-                success = False
-                msg = str(e)
-        return success, msg, note_list
+        async def fetch(note_id, xsec_token):
+            async with semaphore:
+                try:
+                    success, msg, res_json = await self.get_note_info(note_id, 'pc_user', xsec_token)
+                    if not success:
+                        raise Exception(msg)
+                    return note_id, True, msg, asdict(self._extract_video_info(res_json))
+                except Exception as e:
+                    return note_id, False, str(e), None
+
+        pending = {asyncio.create_task(fetch(note['note_id'], note['xsec_token']))
+                   for note in notes if note['type'] == 'video'}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get_video_urls(self, user_url: str, concurrency: int = 5) -> (bool, str, list):
+        """
+            获取用户全部视频笔记的视频信息
+            :param user_url: 你想要获取的用户的url
+            :param concurrency: 同时请求笔记详情的数量
+            返回按笔记顺序排列的视频信息 获取失败的笔记会写在msg里
+        """
+        success, msg, note_list = await self.get_user_all_notes(user_url)
+        order = {note['note_id']: index for index, note in enumerate(note_list)}
+        video_list = []
+        failed = []
+        async for note_id, info_success, info_msg, video_info in self.iter_video_infos(note_list, concurrency):
+            if info_success:
+                video_list.append((order[note_id], video_info))
+            else:
+                failed.append(f'{note_id}: {info_msg}')
+        if failed:
+            failed_msg = f'{len(failed)}条视频笔记获取失败 ' + '; '.join(failed)
+            msg = failed_msg if success else f'{msg}; {failed_msg}'
+            success = False
+        return success, msg, [video_info for _, video_info in sorted(video_list, key=lambda item: item[0])]
 
     async def get_user_like_note_info(self, user_id: str, cursor: str, xsec_token='', xsec_source='') -> (bool, str, dict):
         """
@@ -452,31 +845,16 @@ class XhsApi:
             :param user_url: 你想要获取的用户的url
             返回用户的所有喜欢笔记
         """
-        cursor = ''
-        note_list = []
-        try:
-            urlParse = urllib.parse.urlparse(user_url)
-            user_id = urlParse.path.split("/")[-1]
-            kvs = urlParse.query.split('&')
-            kvDist = {kv.split('=')[0]: kv.split('=')[1] for kv in kvs}
-            xsec_token = kvDist['xsec_token'] if 'xsec_token' in kvDist else ""
-            xsec_source = kvDist['xsec_source'] if 'xsec_source' in kvDist else "pc_user"
-            while True:
-                success, msg, res_json = await self.get_user_like_note_info(user_id, cursor, xsec_token, xsec_source)
-                if not success:
-                    raise Exception(msg)
-                notes = res_json["data"]["notes"]
-                if 'cursor' in res_json["data"]:
-                    cursor = str(res_json["data"]["cursor"])
-                else:
-                    break
-                note_list.extend(notes)
-                if len(notes) == 0 or not res_json["data"]["has_more"]:
-                    break
-        except Exception as e:
-            success = False
-            msg = str(e)
-        return success, msg, note_list
+        return await self._collect_pages(lambda: self.iter_user_like_notes(user_url))
+
+    def iter_user_like_notes(self, user_url: str):
+        """
+            逐页获取用户喜欢的笔记
+            :param user_url: 你想要获取的用户的url
+        """
+        user_id, xsec_token, xsec_source = self._parse_user_url(user_url, "pc_user")
+        return iter_cursor_pages(lambda cursor: self.get_user_like_note_info(user_id, cursor, xsec_token, xsec_source), "notes",
+                                 checkpoint=self._page_checkpoint(ApiType.GET_USER_LIKE_NOTE, user_id, 'note_id'))
 
     async def get_user_collect_note_info(self, user_id: str, cursor: str, xsec_token='', xsec_source='') -> (bool, str, list):
         """
@@ -507,31 +885,16 @@ class XhsApi:
             :param user_url: 你想要获取的用户的url
             返回用户的所有收藏笔记
         """
-        cursor = ''
-        note_list = []
-        try:
-            urlParse = urllib.parse.urlparse(user_url)
-            user_id = urlParse.path.split("/")[-1]
-            kvs = urlParse.query.split('&')
-            kvDist = {kv.split('=')[0]: kv.split('=')[1] for kv in kvs}
-            xsec_token = kvDist['xsec_token'] if 'xsec_token' in kvDist else ""
-            xsec_source = kvDist['xsec_source'] if 'xsec_source' in kvDist else "pc_search"
-            while True:
-                success, msg, res_json = await self.get_user_collect_note_info(user_id, cursor, xsec_token, xsec_source)
-                if not success:
-                    raise Exception(msg)
-                notes = res_json["data"]["notes"]
-                if 'cursor' in res_json["data"]:
-                    cursor = str(res_json["data"]["cursor"])
-                else:
-                    break
-                note_list.extend(notes)
-                if len(notes) == 0 or not res_json["data"]["has_more"]:
-                    break
-        except Exception as e:
-            success = False
-            msg = str(e)
-        return success, msg, note_list
+        return await self._collect_pages(lambda: self.iter_user_collect_notes(user_url))
+
+    def iter_user_collect_notes(self, user_url: str):
+        """
+            逐页获取用户收藏的笔记
+            :param user_url: 你想要获取的用户的url
+        """
+        user_id, xsec_token, xsec_source = self._parse_user_url(user_url, "pc_search")
+        return iter_cursor_pages(lambda cursor: self.get_user_collect_note_info(user_id, cursor, xsec_token, xsec_source), "notes",
+                                 checkpoint=self._page_checkpoint(ApiType.GET_USER_COLLECT_NOTE, user_id, 'note_id'))
 
     async def get_search_keyword(self, word: str) -> (bool, str, dict):
         """
@@ -556,12 +919,18 @@ class XhsApi:
             :param note_type: 笔记类型 0:全部, 1:视频, 2:图文
             返回搜索的结果
         """
+        api, data = self._search_note_request(query, page, sort, note_type)
+        success, msg, res_json = await self.post(api, data)
+        return success, msg, res_json
+
+    @staticmethod
+    def _search_note_request(query: str, page: int, sort: str, note_type: int) -> (str, dict):
         api = get_url_by_api_type(ApiType.GET_SEARCH_NOTE)
         data = {
             "keyword": query,
             "page": page,
             "page_size": 20,
-            "search_id": await MiscEncrypt.x_b3_traceid(),
+            "search_id": MiscEncrypt.x_b3_traceid_sync(),
             "sort": sort,
             "note_type": note_type,
             "ext_flags": [],
@@ -571,38 +940,58 @@ class XhsApi:
                 "avif"
             ]
         }
-        success, msg, res_json = await self.post(api, data)
-        return success, msg, res_json
+        return api, data
 
-    async def search_some_note(self, query: str, require_num: int, sort="general", note_type=0) -> (bool, str, list):
+    async def search_some_note(self, query: str, require_num: int, sort="general", note_type=0,
+                               window: int = 1) -> (bool, str, list):
         """
             指定数量搜索笔记，设置排序方式和笔记类型和笔记数量
             :param query: 搜索的关键词
             :param require_num: 搜索的数量
             :param sort: 排序方式 general:综合排序, time_descending:时间排序, popularity_descending:热度排序
             :param note_type: 笔记类型 0:全部, 1:视频, 2:图文
+            :param window: 同时请求的页数 默认为1逐页请求
             返回搜索的结果
         """
-        page = 1
-        note_list = []
+        return await self._search_some(
+            lambda page: self.search_note(query, page, sort, note_type),
+            lambda page: self._search_note_request(query, page, sort, note_type),
+            'items', require_num, window)
+
+    async def _search_some(self, fetch_page, build, key: str, require_num: int, window: int) -> (bool, str, list):
+        """
+            按页码翻页直到凑够require_num条或者没有更多结果
+            :param fetch_page: fetch_page(page) 请求第page页
+            :param build: build(page) 返回第page页的 (api, data) 用于提前签名
+            :param key: 结果列表在data中的字段名
+            :param require_num: 需要的数量
+            :param window: 同时请求的页数
+            返回按页码顺序排列的结果
+        """
+        result_list = []
+        success, msg = True, '成功'
+        presigner = self._presigner(build)
+        if presigner:
+            fetch_page = presigner.post
         try:
-            while True:
-                success, msg, res_json = await self.search_note(query, page, sort, note_type)
-                if not success:
-                    raise Exception(msg)
-                if "items" not in res_json["data"]:
-                    break
-                notes = res_json["data"]["items"]
-                note_list.extend(notes)
-                page += 1
-                if len(note_list) >= require_num or not res_json["data"]["has_more"]:
-                    break
+            async with aclosing(iter_pages(fetch_page, window)) as pages:
+                async for success, msg, res_json in pages:
+                    if not success:
+                        raise Exception(msg)
+                    if key not in res_json["data"]:
+                        break
+                    result_list.extend(res_json["data"][key])
+                    if len(result_list) >= require_num or not res_json["data"]["has_more"]:
+                        break
         except Exception as e:
             success = False
             msg = str(e)
-        if len(note_list) > require_num:
-            note_list = note_list[:require_num]
-        return success, msg, note_list
+        finally:
+            if presigner:
+                presigner.close()
+        if len(result_list) > require_num:
+            result_list = result_list[:require_num]
+        return success, msg, result_list
 
     async def search_user(self, query: str, page: int=1) -> (bool, str, dict):
         """
@@ -611,6 +1000,12 @@ class XhsApi:
             :param page: 搜索的页数
             返回搜索的结果
         """
+        api, data = self._search_user_request(query, page)
+        success, msg, res_json = await self.post(api, data)
+        return success, msg, res_json
+
+    @staticmethod
+    def _search_user_request(query: str, page: int) -> (str, dict):
         api = get_url_by_api_type(ApiType.GET_SEARCH_USER)
         data = {
             "search_user_request": {
@@ -622,36 +1017,20 @@ class XhsApi:
                 "request_id": "22471139-1723999898524"
             }
         }
-        success, msg, res_json = await self.post(api, data)
-        return success, msg, res_json
+        return api, data
 
-    async def search_some_user(self, query: str, require_num: int) -> (bool, str, list):
+    async def search_some_user(self, query: str, require_num: int, window: int = 1) -> (bool, str, list):
         """
             指定数量搜索用户
             :param query: 搜索的关键词
             :param require_num: 搜索的数量
+            :param window: 同时请求的页数 默认为1逐页请求
             返回搜索的结果
         """
-        page = 1
-        user_list = []
-        try:
-            while True:
-                success, msg, res_json = await self.search_user(query, page)
-                if not success:
-                    raise Exception(msg)
-                if "users" not in res_json["data"]:
-                    break
-                users = res_json["data"]["users"]
-                user_list.extend(users)
-                page += 1
-                if len(user_list) >= require_num or not res_json["data"]["has_more"]:
-                    break
-        except Exception as e:
-            success = False
-            msg = str(e)
-        if len(user_list) > require_num:
-            user_list = user_list[:require_num]
-        return success, msg, user_list
+        return await self._search_some(
+            lambda page: self.search_user(query, page),
+            lambda page: self._search_user_request(query, page),
+            'users', require_num, window)
 
     async def get_note_out_comment(self, note_id: str, cursor: str, xsec_token: str):
         """
@@ -680,25 +1059,17 @@ class XhsApi:
             :param xsec_token 笔记的xsec_token
             返回笔记的全部一级评论
         """
-        cursor = ''
-        note_out_comment_list = []
-        try:
-            while True:
-                success, msg, res_json = await self.get_note_out_comment(note_id, cursor, xsec_token)
-                if not success:
-                    raise Exception(msg)
-                comments = res_json["data"]["comments"]
-                if 'cursor' in res_json["data"]:
-                    cursor = str(res_json["data"]["cursor"])
-                else:
-                    break
-                note_out_comment_list.extend(comments)
-                if len(note_out_comment_list) == 0 or not res_json["data"]["has_more"]:
-                    break
-        except Exception as e:
-            success = False
-            msg = str(e)
-        return success, msg, note_out_comment_list
+        return await self._collect_pages(lambda: self.iter_note_out_comments(note_id, xsec_token))
+
+    def iter_note_out_comments(self, note_id: str, xsec_token: str):
+        """
+            逐页获取笔记的一级评论
+            :param note_id 笔记的id
+            :param xsec_token 笔记的xsec_token
+        """
+        return iter_cursor_pages(lambda cursor: self.get_note_out_comment(note_id, cursor, xsec_token), "comments",
+                                 stop_on_empty=False, stop_on_first_empty=True,
+                                 checkpoint=self._page_checkpoint(ApiType.GET_NOTE_COMMENT, note_id))
 
     async def get_note_inner_comment(self, comment: dict, cursor: str, xsec_token: str) -> (bool, str, dict):
         """
@@ -732,30 +1103,34 @@ class XhsApi:
         try:
             if not comment['sub_comment_has_more']:
                 return True, 'success', comment
-            cursor = comment['sub_comment_cursor']
-            inner_comment_list = []
-            while True:
-                success, msg, res_json = await self.get_note_inner_comment(comment, cursor, xsec_token)
-                if not success:
-                    raise Exception(msg)
-                comments = res_json["data"]["comments"]
-                if 'cursor' in res_json["data"]:
-                    cursor = str(res_json["data"]["cursor"])
-                else:
-                    break
-                inner_comment_list.extend(comments)
-                if not res_json["data"]["has_more"]:
-                    break
+            success, msg, inner_comment_list = await self._collect_pages(
+                lambda: self.iter_note_inner_comments(comment, xsec_token))
+            # 失败前拿到的页已经提交了断点 下次运行会跳过 必须先合并进来
             comment['sub_comments'].extend(inner_comment_list)
+            if not success:
+                raise Exception(msg)
         except Exception as e:
             success = False
             msg = str(e)
         return success, msg, comment
 
-    async def get_note_all_comment(self, url: str) -> (bool, str, list):
+    def iter_note_inner_comments(self, comment: dict, xsec_token: str):
+        """
+            从一级评论自带的sub_comment_cursor开始 逐页获取二级评论
+            :param comment: 笔记的一级评论
+            :param xsec_token: 笔记的xsec_token
+        """
+        return iter_cursor_pages(lambda cursor: self.get_note_inner_comment(comment, cursor, xsec_token),
+                                 "comments", cursor=comment['sub_comment_cursor'], stop_on_empty=False,
+                                 checkpoint=self._page_checkpoint(ApiType.GET_NOTE_REPLY_COMMENT, comment['id']))
+
+    async def get_note_all_comment(self, url: str, concurrency: int = 5) -> (bool, str, list):
         """
             获取一篇文章的所有评论
+            二级评论按一级评论并发展开 某条一级评论展开失败时不影响其它评论
+            失败的一级评论会带上 sub_comment_error 字段
             :param url: 你想要获取的笔记的url
+            :param concurrency: 同时展开二级评论的一级评论数量
             返回一篇文章的所有评论
         """
         out_comment_list = []
@@ -764,13 +1139,24 @@ class XhsApi:
             note_id = urlParse.path.split("/")[-1]
             kvs = urlParse.query.split('&')
             kvDist = {kv.split('=')[0]: kv.split('=')[1] for kv in kvs}
+            # 一级评论翻到一半失败时 已经拿到的一级评论照样展开 它们的断点已经提交 下次运行不会再返回
             success, msg, out_comment_list = await self.get_note_all_out_comment(note_id, kvDist['xsec_token'])
-            if not success:
-                raise Exception(msg)
-            for comment in out_comment_list:
-                success, msg, new_comment = self.get_note_all_inner_comment(comment, kvDist['xsec_token'])
-                if not success:
-                    raise Exception(msg)
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def expand(comment):
+                async with semaphore:
+                    return await self.get_note_all_inner_comment(comment, kvDist['xsec_token'])
+
+            results = await asyncio.gather(*[expand(comment) for comment in out_comment_list])
+            failed = []
+            for comment, (inner_success, inner_msg, _) in zip(out_comment_list, results):
+                if not inner_success:
+                    comment['sub_comment_error'] = inner_msg
+                    failed.append(f"{comment.get('id')}: {inner_msg}")
+            if failed:
+                failed_msg = f'{len(failed)}条一级评论的二级评论获取失败 ' + '; '.join(failed)
+                msg = failed_msg if success else f'{msg}; {failed_msg}'
+                success = False
         except Exception as e:
             success = False
             msg = str(e)
@@ -805,25 +1191,13 @@ class XhsApi:
             获取全部的评论和@提醒
             返回全部的评论和@提醒
         """
-        cursor = ''
-        metions_list = []
-        try:
-            while True:
-                success, msg, res_json = await self.get_metions(cursor)
-                if not success:
-                    raise Exception(msg)
-                metions = res_json["data"]["message_list"]
-                if 'cursor' in res_json["data"]:
-                    cursor = str(res_json["data"]["cursor"])
-                else:
-                    break
-                metions_list.extend(metions)
-                if not res_json["data"]["has_more"]:
-                    break
-        except Exception as e:
-            success = False
-            msg = str(e)
-        return success, msg, metions_list
+        return await self._collect_pages(self.iter_metions)
+
+    def iter_metions(self):
+        """
+            逐页获取评论和@提醒
+        """
+        return iter_cursor_pages(self.get_metions, "message_list", stop_on_empty=False)
 
     async def get_likes_and_collects(self, cursor: str) -> (bool, str, dict):
         """
@@ -845,25 +1219,13 @@ class XhsApi:
             获取全部的赞和收藏
             返回全部的赞和收藏
         """
-        cursor = ''
-        likes_and_collects_list = []
-        try:
-            while True:
-                success, msg, res_json = await self.get_likes_and_collects(cursor)
-                if not success:
-                    raise Exception(msg)
-                like_and_collect = res_json["data"]["message_list"]
-                if 'cursor' in res_json["data"]:
-                    cursor = str(res_json["data"]["cursor"])
-                else:
-                    break
-                likes_and_collects_list.extend(like_and_collect)
-                if not res_json["data"]["has_more"]:
-                    break
-        except Exception as e:
-            success = False
-            msg = str(e)
-        return success, msg, likes_and_collects_list
+        return await self._collect_pages(self.iter_likes_and_collects)
+
+    def iter_likes_and_collects(self):
+        """
+            逐页获取赞和收藏
+        """
+        return iter_cursor_pages(self.get_likes_and_collects, "message_list", stop_on_empty=False)
 
     async def get_new_followers(self, cursor: str) -> (bool, str, dict):
         """
@@ -885,25 +1247,13 @@ class XhsApi:
             获取全部的新增关注
             返回全部的新增关注
         """
-        cursor = ''
-        connections_list = []
-        try:
-            while True:
-                success, msg, res_json = await self.get_new_followers(cursor)
-                if not success:
-                    raise Exception(msg)
-                connections = res_json["data"]["message_list"]
-                if 'cursor' in res_json["data"]:
-                    cursor = str(res_json["data"]["cursor"])
-                else:
-                    break
-                connections_list.extend(connections)
-                if not res_json["data"]["has_more"]:
-                    break
-        except Exception as e:
-            success = False
-            msg = str(e)
-        return success, msg, connections_list
+        return await self._collect_pages(self.iter_new_followers)
+
+    def iter_new_followers(self):
+        """
+            逐页获取新增关注
+        """
+        return iter_cursor_pages(self.get_new_followers, "message_list", stop_on_empty=False)
 
     @staticmethod
     def get_note_no_water_img(img_url):
@@ -961,11 +1311,11 @@ if __name__ == '__main__':
     """
     # cookies是登录后的cookies
     cookies = r'abRequestId=92fcc04b-656b-509f-8a1e-c3ac8e497f23; a1=1956beb135e5lv46l69faxnx5tbuna61jz5pwoev850000427689; webId=e78b2e096f0b8a5aab4ee52ffa364b7d; gid=yj2KDdDJdfVDyj2KDdDyquld2d21h4K1Kji02hYCIC29DU287I0KyE8884JWKYj8S8ySSW80; x-user-id-creator.xiaohongshu.com=5e24fb75000000000100509f; customerClientId=942161409810786; access-token-creator.xiaohongshu.com=customer.creator.AT-68c517486023646732033249ppejtee9xgofm0jp; galaxy_creator_session_id=gMM7NUHERAH9g2VJs89BsXjoRkhcUTGcu5FV; galaxy.creator.beaker.session.id=1742975704346011423609; xsecappid=xhs-pc-web; web_session=0400698f50b83d5600c98361d9354b8bb5902b; webBuild=4.62.1; acw_tc=0a4a661517438347833435632e23dabb3dc4399a0de12944f921ceec5e715e; unread={%22ub%22:%2267e5cd6a000000001a007a3b%22%2C%22ue%22:%2267e23cbe000000000603e2cc%22%2C%22uc%22:18}; loadts=1743835074786; websectiga=9730ffafd96f2d09dc024760e253af6ab1feb0002827740b95a255ddf6847fc8; sec_poison_id=a51d1970-f16e-4338-9763-15f76e46de95'
-    xhs_apis = XhsApi(cookies=cookies)
 
     async def test():
-        success, msg, res_json = await xhs_apis.search_some_note('人口', require_num=10)
-        logger.info(f'登录结果 {json.dumps(res_json, ensure_ascii=False)}: {success}, msg: {msg}')
+        async with XhsApi(cookies=cookies) as xhs_apis:
+            success, msg, res_json = await xhs_apis.search_some_note('人口', require_num=10)
+            logger.info(f'登录结果 {json.dumps(res_json, ensure_ascii=False)}: {success}, msg: {msg}')
 
     asyncio.run(test())
 
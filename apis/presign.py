@@ -0,0 +1,99 @@
+# encoding: utf-8
+import asyncio
+import time
+from dataclasses import dataclass
+
+
+@dataclass(kw_only=True, slots=True)
+class PresignStats:
+    # 使用过的提前签名数量
+    signed: int = 0
+    # 使用过的提前签名在后台的总耗时(秒)
+    sign_time: float = 0.0
+    # 翻页时等待签名的总时间(秒) 包括第一页和过期后重新签名
+    wait_time: float = 0.0
+    # 其中等待后台提前签名完成的时间(秒)
+    presigned_wait_time: float = 0.0
+    # 超过有效期被重新签名的数量
+    stale: int = 0
+    # 翻页提前结束 没用上的签名数量
+    wasted: int = 0
+
+    @property
+    def hidden_time(self) -> float:
+        """
+            提前签名中被I/O等待掩盖 翻页时不用再等的时间(秒)
+            只说明签名没有让翻页等待 线程和事件循环争抢CPU时总耗时不一定减少 以 bench_presign 的总耗时对比为准
+        """
+        return max(self.sign_time - self.presigned_wait_time, 0.0)
+
+    @property
+    def hidden_ratio(self) -> float:
+        return self.hidden_time / self.sign_time if self.sign_time else 0.0
+
+
+class Presigner:
+    """
+        页码可预知的接口 当前页签好名发出后 在等待响应时提前签名后面的depth页
+        提前签名不占用事件循环 配置了签名池时在池中计算 否则在线程中计算
+        省下的时间以总耗时为准 见 benchmarks/bench_presign.py
+        :param xhs_api: XhsApi
+        :param build: build(page) 返回第page页的 (api, data)
+        :param depth: 提前签名的页数
+        :param ttl: 签名的有效期(秒) 超过后重新签名 保证x-t足够新
+        :param stats: 统计信息 一般使用 XhsApi.presign_stats
+    """
+
+    def __init__(self, xhs_api, build, depth: int, ttl: float, stats: PresignStats):
+        self._xhs_api = xhs_api
+        self._build = build
+        self._depth = depth
+        self._ttl = ttl
+        self._stats = stats
+        self._pending = {}
+
+    async def _sign(self, api: str, data: dict):
+        start = time.perf_counter()
+        signed = await self._xhs_api.presign(api, data)
+        return signed, time.perf_counter() - start, time.monotonic()
+
+    def _schedule(self, page: int):
+        if page not in self._pending:
+            api, data = self._build(page)
+            self._pending[page] = (api, data, asyncio.create_task(self._sign(api, data)))
+
+    async def _take(self, page: int):
+        start = time.perf_counter()
+        if page not in self._pending:
+            # 没有提前签名的页直接签名 不用再切到线程
+            api, data = self._build(page)
+            signed = await self._xhs_api.sign(api, data)
+        else:
+            api, data, task = self._pending.pop(page)
+            signed, cost, signed_at = await task
+            self._stats.presigned_wait_time += time.perf_counter() - start
+            self._stats.signed += 1
+            self._stats.sign_time += cost
+            if time.monotonic() - signed_at > self._ttl:
+                self._stats.stale += 1
+                signed = await self._xhs_api.sign(api, data)
+            else:
+                # 提前签名时没有计入账号轮换 用上时再计入
+                self._xhs_api.count_presigned(api, signed)
+        self._stats.wait_time += time.perf_counter() - start
+        return api, data, signed
+
+    async def post(self, page: int) -> (bool, str, dict):
+        """
+            请求第page页 当前页签好名后再在后台签名后面的depth页 不和当前页抢时间
+        """
+        api, data, signed = await self._take(page)
+        for next_page in range(page + 1, page + 1 + self._depth):
+            self._schedule(next_page)
+        return await self._xhs_api.post(api, data, signed)
+
+    def close(self):
+        for api, data, task in self._pending.values():
+            task.cancel()
+        self._stats.wasted += len(self._pending)
+        self._pending.clear()
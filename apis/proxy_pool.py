@@ -0,0 +1,163 @@
+# encoding: utf-8
+import asyncio
+import time
+from contextlib import contextmanager
+
+
+# 代理本身的问题 407为代理认证失败 429为出口IP被限流 另外5xx都算代理故障
+PROXY_ERROR_STATUSES = frozenset({407, 429})
+
+
+def proxy_ok(outcome) -> bool:
+    """
+        请求经过代理拿到了正常的HTTP响应
+        接口返回的业务错误(笔记不存在、参数错误等)说明请求已经到达服务器 不算代理的问题
+    """
+    status = outcome.status
+    return status is not None and status < 500 and status not in PROXY_ERROR_STATUSES
+
+
+class ProxyState:
+    """
+        代理池中一个代理的状态
+        :param url: 代理地址 例如 http://127.0.0.1:7890
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        # 成功响应延迟的指数滑动平均(秒) 没有成功过时为None
+        self.latency = None
+        # 失败率的指数滑动平均 越近的请求权重越大
+        self.failure_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    def is_available(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+
+class ProxyPool:
+    """
+        按延迟和失败率打分的代理池 每次选择分数最低的可用代理
+        分数 = 延迟 * (1 + 在途请求数) * (1 + failure_penalty * 失败率) 还没有延迟数据的代理按平均延迟计算
+        连续失败 eject_after 次或失败率超过 eject_failure_rate 时暂时剔除
+        剔除时间为 eject_time * 2^(连续剔除次数-1) 秒 最多 max_eject_time 秒 成功一次后清零
+        :param proxies: 代理地址列表
+        :param alpha: 延迟和失败率的滑动平均系数
+        :param failure_penalty: 失败率在分数中的权重
+        :param eject_after: 连续失败多少次后剔除
+        :param eject_failure_rate: 失败率超过多少时剔除
+        :param eject_time: 第一次剔除的时间(秒)
+        :param max_eject_time: 剔除时间的上限(秒)
+    """
+
+    def __init__(self, proxies: list, alpha: float = 0.2, failure_penalty: float = 10.0,
+                 eject_after: int = 3, eject_failure_rate: float = 0.5,
+                 eject_time: float = 30.0, max_eject_time: float = 600.0):
+        if not proxies:
+            raise Exception("请传入至少一个代理")
+        self.proxies = [ProxyState(url) for url in proxies]
+        self.alpha = alpha
+        self.failure_penalty = failure_penalty
+        self.eject_after = eject_after
+        self.eject_failure_rate = eject_failure_rate
+        self.eject_time = eject_time
+        self.max_eject_time = max_eject_time
+        self._by_url = {proxy.url: proxy for proxy in self.proxies}
+        self._pairs = {}
+
+    def pair(self, account_name: str, *proxies: str):
+        """
+            指定账号只使用这些代理 同一个账号始终从固定的出口访问
+            :param account_name: 账号的名字(默认为cookies中的a1)
+            :param proxies: 代理地址 必须在代理池中
+        """
+        for url in proxies:
+            if url not in self._by_url:
+                raise Exception(f"代理{url}不在代理池中")
+        self._pairs[account_name] = [self._by_url[url] for url in proxies]
+
+    def score(self, proxy: ProxyState) -> float:
+        latency = proxy.latency
+        if latency is None:
+            known = [item.latency for item in self.proxies if item.latency is not None]
+            latency = sum(known) / len(known) if known else 1.0
+        return latency * (1 + proxy.in_flight) * (1 + self.failure_penalty * proxy.failure_rate)
+
+    def pick(self, account_name: str = None) -> ProxyState:
+        """
+            选择分数最低的可用代理 账号配对了代理时只在配对的代理中选择
+            全部被剔除时选择最早恢复的代理
+        """
+        candidates = self._pairs.get(account_name, self.proxies)
+        now = time.monotonic()
+        available = [proxy for proxy in candidates if proxy.is_available(now)]
+        if not available:
+            return min(candidates, key=lambda item: item.ejected_until)
+        return min(available, key=self.score)
+
+    def _record(self, proxy: ProxyState, ok: bool, latency: float):
+        proxy.failure_rate += self.alpha * ((0.0 if ok else 1.0) - proxy.failure_rate)
+        if ok:
+            proxy.consecutive_failures = 0
+            proxy.ejections = 0
+            if proxy.latency is None:
+                proxy.latency = latency
+            else:
+                proxy.latency += self.alpha * (latency - proxy.latency)
+            return
+        proxy.failures += 1
+        proxy.consecutive_failures += 1
+        if proxy.consecutive_failures >= self.eject_after or proxy.failure_rate >= self.eject_failure_rate:
+            proxy.ejections += 1
+            proxy.consecutive_failures = 0
+            eject_time = min(self.max_eject_time, self.eject_time * 2 ** (proxy.ejections - 1))
+            proxy.ejected_until = time.monotonic() + eject_time
+
+    @contextmanager
+    def track(self, proxy: ProxyState, outcome):
+        """
+            统计一次经过proxy的请求 请求结束后根据HTTP状态码和耗时更新代理的分数
+            只有连接出错和 proxy_ok 认为是代理故障的状态码算失败 接口返回的业务错误不算
+            被取消的请求只计数 不参与打分
+        """
+        if proxy is None:
+            yield
+            return
+        proxy.in_flight += 1
+        proxy.requests += 1
+        start = time.perf_counter()
+        try:
+            yield
+        except (asyncio.CancelledError, GeneratorExit):
+            raise
+        except BaseException:
+            # 拿到响应后解析出错 例如返回了验证页面 代理本身没有问题
+            self._record(proxy, proxy_ok(outcome), time.perf_counter() - start)
+            raise
+        else:
+            self._record(proxy, proxy_ok(outcome), time.perf_counter() - start)
+        finally:
+            proxy.in_flight -= 1
+
+    def stats(self) -> dict:
+        """
+            各代理的分数、延迟、失败率、请求数、失败数、在途请求数和剩余剔除时间(秒)
+        """
+        now = time.monotonic()
+        return {
+            proxy.url: {
+                'score': self.score(proxy),
+                'latency': proxy.latency,
+                'failure_rate': proxy.failure_rate,
+                'requests': proxy.requests,
+                'failures': proxy.failures,
+                'in_flight': proxy.in_flight,
+                'ejected': max(0.0, proxy.ejected_until - now),
+            }
+            for proxy in self.proxies
+        }
@@ -0,0 +1,178 @@
+# encoding: utf-8
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+
+def _key_name(key) -> str:
+    if isinstance(key, tuple):
+        return '/'.join(_key_name(item) for item in key)
+    return getattr(key, 'name', key)
+
+
+class SlotOutcome:
+    """
+        一次请求的结果 由调用方在拿到响应后写入
+        ok为接口是否成功 status为HTTP状态码 code为接口返回的code 没有拿到响应时status为None
+    """
+    __slots__ = ('ok', 'status', 'code')
+
+    def __init__(self):
+        self.ok = False
+        self.status = None
+        self.code = None
+
+
+class AimdLimiter:
+    """
+        单个接口的并发上限 加性增 乘性减
+        每次健康的响应让上限增加 increase / limit 相当于每轮满并发的请求增加 increase
+        失败、返回success为False 或者延迟超过基线的 latency_factor 倍时 上限乘以 decrease
+        同一轮并发中的多个失败只降一次 避免一次风控把上限直接打到最低
+    """
+
+    def __init__(self, initial_limit: float, min_limit: int, max_limit: int,
+                 increase: float, decrease: float, latency_factor: float, latency_floor: float, latency_alpha: float):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.latency_floor = latency_floor
+        self.latency_alpha = latency_alpha
+        # 健康响应延迟的指数滑动平均(秒)
+        self.latency = None
+        self.in_flight = 0
+        self.successes = 0
+        self.failures = 0
+        self.spikes = 0
+        self.decreases = 0
+        self._epoch = 0
+        self._waiters = []
+
+    async def acquire(self) -> int:
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+        return self._epoch
+
+    def _wake_up(self):
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _is_spike(self, latency: float) -> bool:
+        if self.latency is None:
+            return False
+        return latency > self.latency_floor and latency > self.latency * self.latency_factor
+
+    def release(self, epoch: int, ok: bool, latency: float):
+        """
+            :param ok: 为None时表示请求被取消 只归还名额 不参与调整
+        """
+        self.in_flight -= 1
+        if ok is not None:
+            self._adjust(epoch, ok, latency)
+        self._wake_up()
+
+    def _adjust(self, epoch: int, ok: bool, latency: float):
+        spike = ok and self._is_spike(latency)
+        if ok and not spike:
+            self.successes += 1
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self.latency_alpha * (latency - self.latency)
+            self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+            return
+        if spike:
+            self.spikes += 1
+        else:
+            self.failures += 1
+        # 这一轮开始之后已经降过了 不再重复降
+        if epoch == self._epoch:
+            self.limit = max(self.min_limit, self.limit * self.decrease)
+            self.decreases += 1
+            self._epoch += 1
+
+
+class RateController:
+    """
+        按接口(ApiType)分别控制并发的AIMD控制器 同一个控制器可以被多个XhsApi共享
+        使用多账号时按 (账号, ApiType) 分别控制
+        :param initial_limit: 每个接口的初始并发上限
+        :param min_limit: 并发上限的下限
+        :param max_limit: 并发上限的上限
+        :param increase: 每轮满并发的健康响应增加的并发数
+        :param decrease: 出现失败或延迟突增时并发上限乘以的系数
+        :param latency_factor: 延迟超过基线的多少倍视为突增
+        :param latency_floor: 低于该延迟(秒)时不视为突增 避免本地抖动误判
+        :param latency_alpha: 延迟基线的滑动平均系数
+    """
+
+    def __init__(self, initial_limit: float = 4, min_limit: int = 1, max_limit: int = 32,
+                 increase: float = 1.0, decrease: float = 0.5,
+                 latency_factor: float = 3.0, latency_floor: float = 0.2, latency_alpha: float = 0.2):
+        self._options = (initial_limit, min_limit, max_limit, increase, decrease,
+                         latency_factor, latency_floor, latency_alpha)
+        self._limiters = {}
+
+    def limiter(self, key) -> AimdLimiter:
+        if key not in self._limiters:
+            self._limiters[key] = AimdLimiter(*self._options)
+        return self._limiters[key]
+
+    @asynccontextmanager
+    async def slot(self, key, outcome: SlotOutcome = None):
+        """
+            占用key对应接口的一个并发名额
+            async with controller.slot(ApiType.GET_SEARCH_NOTE) as outcome:
+                ...
+                outcome.ok = success
+            抛出异常时按失败处理 被取消时只归还名额
+            :param outcome: 和其它统计共用同一个SlotOutcome时传入 为空时新建
+        """
+        limiter = self.limiter(key)
+        epoch = await limiter.acquire()
+        outcome = outcome or SlotOutcome()
+        start = time.perf_counter()
+        try:
+            yield outcome
+        except (asyncio.CancelledError, GeneratorExit):
+            limiter.release(epoch, None, 0.0)
+            raise
+        except BaseException:
+            limiter.release(epoch, False, time.perf_counter() - start)
+            raise
+        limiter.release(epoch, outcome.ok, time.perf_counter() - start)
+
+    def limits(self) -> dict:
+        """
+            当前各接口的并发上限
+        """
+        return {_key_name(key): int(limiter.limit) for key, limiter in self._limiters.items()}
+
+    def stats(self) -> dict:
+        """
+            各接口的并发上限、在途请求数、成功/失败/延迟突增/降速次数和延迟基线
+        """
+        return {
+            _key_name(key): {
+                'limit': int(limiter.limit),
+                'in_flight': limiter.in_flight,
+                'successes': limiter.successes,
+                'failures': limiter.failures,
+                'spikes': limiter.spikes,
+                'decreases': limiter.decreases,
+                'latency': limiter.latency,
+            }
+            for key, limiter in self._limiters.items()
+        }
@@ -0,0 +1,123 @@
+# encoding: utf-8
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass(kw_only=True, slots=True)
+class CacheStats:
+    # 内存命中次数
+    hits: int = 0
+    # 内存没有 从磁盘命中的次数
+    disk_hits: int = 0
+    # 没有命中的次数
+    misses: int = 0
+    # 写入缓存的响应数量
+    stores: int = 0
+    # 超过内存上限被淘汰的数量
+    evictions: int = 0
+    # 过期被丢弃的数量
+    expired: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / total if total else 0.0
+
+
+class ResponseCache:
+    """
+        接口响应的TTL + LRU缓存 只保存success为True的响应
+        内存中最多保存max_entries条 传入path时同时写入sqlite文件 下次运行可以直接从磁盘命中
+        缓存的是序列化后的json 每次命中都返回新的对象 调用方修改返回值不会影响缓存
+        :param ttls: {ApiType: 秒} 覆盖XhsApi中各接口的默认缓存时间 0表示不缓存
+        :param max_entries: 内存中最多缓存的响应数量
+        :param path: 磁盘缓存的sqlite文件路径 为空时只缓存在内存中
+    """
+
+    def __init__(self, ttls: dict = None, max_entries: int = 1024, path: str = None):
+        self.ttls = dict(ttls or {})
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._db = None
+        if path:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, isolation_level=None)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute('CREATE TABLE IF NOT EXISTS response_cache '
+                             '(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, body TEXT NOT NULL)')
+
+    def ttl_for(self, api_type, default: float = 0) -> float:
+        return self.ttls.get(api_type, default)
+
+    def _remember(self, key: str, expires_at: float, body: str):
+        self._entries[key] = (expires_at, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def get(self, key: str):
+        """
+            返回缓存的响应 没有或者已过期时返回None
+        """
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, body = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return json.loads(body)
+            del self._entries[key]
+            self.stats.expired += 1
+        if self._db is not None:
+            row = self._db.execute('SELECT expires_at, body FROM response_cache WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                expires_at, body = row
+                if expires_at > now:
+                    self._remember(key, expires_at, body)
+                    self.stats.disk_hits += 1
+                    return json.loads(body)
+                self._db.execute('DELETE FROM response_cache WHERE key = ?', (key,))
+                self.stats.expired += 1
+        self.stats.misses += 1
+        return None
+
+    def put(self, key: str, res_json: dict, ttl: float):
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        body = json.dumps(res_json, ensure_ascii=False)
+        self._remember(key, expires_at, body)
+        self.stats.stores += 1
+        if self._db is not None:
+            self._db.execute('INSERT OR REPLACE INTO response_cache (key, expires_at, body) VALUES (?, ?, ?)',
+                             (key, expires_at, body))
+
+    def purge(self):
+        """
+            删除内存和磁盘中所有过期的响应
+        """
+        now = time.time()
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+            self.stats.expired += 1
+        if self._db is not None:
+            self.stats.expired += self._db.execute('DELETE FROM response_cache WHERE expires_at <= ?', (now,)).rowcount
+
+    def clear(self):
+        self._entries.clear()
+        if self._db is not None:
+            self._db.execute('DELETE FROM response_cache')
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
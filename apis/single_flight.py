@@ -0,0 +1,59 @@
+# encoding: utf-8
+import asyncio
+import copy
+from dataclasses import dataclass
+
+
+@dataclass(kw_only=True, slots=True)
+class SingleFlightStats:
+    # 经过合并层的调用次数
+    calls: int = 0
+    # 合并到正在进行的相同请求上 省下的请求数量
+    saved: int = 0
+
+
+class SingleFlight:
+    """
+        相同key的并发调用只执行一次 其余调用等待同一个结果
+        第一个调用拿到原始结果 其余调用拿到深拷贝 互相修改不会影响
+        请求放在独立的task中执行 某个调用方被取消不会影响其它等待者
+        全部等待者都被取消后 请求也会被取消 和没有合并时一样
+    """
+
+    def __init__(self):
+        self.stats = SingleFlightStats()
+        self._in_flight = {}
+        # task -> 还在等待结果的调用数
+        self._waiters = {}
+
+    def _forget(self, key, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        self._waiters.pop(task, None)
+
+    async def do(self, key, fn):
+        """
+            :param key: 判断调用是否相同的key
+            :param fn: 没有相同的调用在进行时执行 fn() 返回协程
+        """
+        self.stats.calls += 1
+        task = self._in_flight.get(key)
+        first = task is None
+        if first:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            self._waiters[task] = 0
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.stats.saved += 1
+        self._waiters[task] += 1
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            if task in self._waiters:
+                self._waiters[task] -= 1
+                if self._waiters[task] == 0 and not task.done():
+                    # 最后一个等待者被取消 没有人需要这个结果了
+                    task.cancel()
+                    self._forget(key, task)
+        return result if first else copy.deepcopy(result)
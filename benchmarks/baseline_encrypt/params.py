@@ -0,0 +1,227 @@
+headers = {
+    "authority": "edith.xiaohongshu.com",
+    "accept": "application/json, text/plain, */*",
+    "accept-language": "zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6",
+    "cache-control": "no-cache",
+    "content-type": "application/json;charset=UTF-8",
+    "origin": "https://www.xiaohongshu.com",
+    "pragma": "no-cache",
+    "referer": "https://www.xiaohongshu.com/",
+    "sec-ch-ua": "\"Not A(Brand\";v=\"99\", \"Microsoft Edge\";v=\"121\", \"Chromium\";v=\"121\"",
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": "\"Windows\"",
+    "sec-fetch-dest": "empty",
+    "sec-fetch-mode": "cors",
+    "sec-fetch-site": "same-site",
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36 Edg/121.0.0.0",
+    "x-b3-traceid": "",
+    "x-s": "",
+    "x-s-common": "",
+    "x-t": "",
+    "x-xray-traceid": ""
+}
+
+cookies = {
+    "a1": "",
+    "web_session": "",
+}
+
+url_list = {
+    "profile_index_url": "https://www.xiaohongshu.com/user/profile/{}",
+    "captcha_info_url": "https://edith.xiaohongshu.com/api/redcaptcha/v2/captcha/register",
+}
+
+lookup = [
+    "Z", "m", "s", "e", "r", "b", "B", "o", "H", "Q", "t", "N", "P", "+", "w", "O", "c", "z", "a", "/", "L", "p", "n",
+    "g", "G", "8", "y", "J", "q", "4", "2", "K", "W", "Y", "j", "0", "D", "S", "f", "d", "i", "k", "x", "3", "V", "T",
+    "1", "6", "I", "l", "U", "A", "F", "M", "9", "7", "h", "E", "C", "v", "u", "R", "X", "5",
+]
+
+xn = 'A4NjFqYu5wPHsO0XTdDgMa2r1ZQocVte9UJBvk6/7=yRnhISGKblCWi+LpfE8xzm3'
+xn64 = xn[64]
+
+replacements = {
+    'undefined': 'null',
+    "'": '"',
+    'True': 'true',
+    'False': 'false',
+    'None': 'null'
+}
+
+bg_nums = {
+    "bg_s708337425": 1,
+    "bg_s709457733": 2,
+    "bg_s710376633": 3,
+    "bg_s710780084": 4,
+    "bg_s710205874": 5,
+    "bg_s710119332": 6,
+    "bg_s710459486": 7,
+    "bg_s710031677": 8,
+    "bg_s708588302": 9,
+    "bg_s709399955": 10,
+    "bg_s709147905": 11,
+    "bg_s708137773": 12,
+    "bg_s708839756": 13,
+    "bg_s708449445": 14,
+    "bg_s711847839": 15,
+    "bg_s709714842": 16,
+    "bg_s711988780": 17,
+    "bg_s709802734": 18,
+    "bg_s709175936": 19,
+    "bg_s710003908": 20,
+    "bg_s710525836": 21,
+    "bg_s709830587": 22,
+    "bg_s711004442": 23,
+    "bg_s710667690": 24,
+    "bg_s708674458": 25,
+    "bg_s710610492": 26,
+    "bg_s711146091": 27,
+    "bg_s709685807": 28,
+    "bg_s711569654": 29,
+    "bg_s710233766": 30,
+    "bg_s710583208": 31,
+    "bg_s709944802": 32,
+    "bg_s708812519": 33,
+    "bg_s709034147": 34,
+    "bg_s709006182": 35,
+    "bg_s708052126": 36,
+    "bg_s711736688": 37,
+    "bg_s709859068": 38,
+    "bg_s710091130": 39,
+    "bg_s708978012": 40,
+    "bg_s709744626": 41,
+    "bg_s710976852": 42,
+    "bg_s711597060": 43,
+    "bg_s709260910": 44,
+    "bg_s708309483": 45,
+    "bg_s711486673": 46,
+    "bg_s708081433": 47,
+    "bg_s708421426": 48,
+    "bg_s710060605": 49,
+    "bg_s709063029": 50,
+    "bg_s711062356": 51,
+    "bg_s709514565": 52,
+    "bg_s709344849": 53,
+    "bg_s708758218": 54,
+    "bg_s710290559": 55,
+    "bg_s709916436": 56,
+    "bg_s710751231": 57,
+    "bg_s711875620": 58,
+    "bg_s708560597": 59,
+    "bg_s708253485": 60,
+    "bg_s708505382": 61,
+    "bg_s711792343": 62,
+    "bg_s710148732": 63,
+    "bg_s711653891": 64,
+    "bg_s709627238": 65,
+    "bg_s708108990": 66,
+    "bg_s708949873": 67,
+    "bg_s709570933": 68,
+    "bg_s711903665": 69,
+    "bg_s709288675": 70,
+    "bg_s708895054": 71,
+    "bg_s708477343": 72,
+    "bg_s708533162": 73,
+    "bg_s711175325": 74,
+    "bg_s710177628": 75,
+    "bg_s708167551": 76,
+    "bg_s710404511": 77,
+    "bg_s710487009": 78,
+    "bg_s711626001": 79,
+    "bg_s711960593": 80,
+    "bg_s711458502": 81,
+    "bg_s709599452": 82,
+    "bg_s710808559": 83,
+    "bg_s710262631": 84,
+    "bg_s711090583": 85,
+    "bg_s711231769": 86,
+    "bg_s709119528": 87,
+    "bg_s711430747": 88,
+    "bg_s711316785": 89,
+    "bg_s708785855": 90,
+    "bg_s709888223": 91,
+    "bg_s708645684": 92,
+    "bg_s710865092": 93,
+    "bg_s711542870": 94,
+    "bg_s710837211": 95,
+    "bg_s711118482": 96,
+    "bg_s709486115": 97,
+    "bg_s710638685": 98,
+    "bg_s708281609": 99,
+    "bg_s710431781": 100,
+    "bg_s708731448": 101,
+    "bg_s708224924": 102,
+    "bg_s708921653": 103,
+    "bg_s709091638": 104,
+    "bg_s711680094": 105,
+    "bg_s711764708": 106,
+    "bg_s709203804": 107,
+    "bg_s710346980": 108,
+    "bg_s711515126": 109,
+    "bg_s711344255": 110,
+    "bg_s710319571": 111,
+    "bg_s708365207": 112,
+    "bg_s711033675": 113,
+    "bg_s711820071": 114,
+    "bg_s711932395": 115,
+    "bg_s709316700": 116,
+    "bg_s709773734": 117,
+    "bg_s711708558": 118,
+    "bg_s711402235": 119,
+    "bg_s708866717": 120,
+    "bg_s708196378": 121,
+    "bg_s711373692": 122,
+    "bg_s710722297": 123,
+    "bg_s708022359": 124,
+    "bg_s709428568": 125,
+    "bg_s709542630": 126,
+    "bg_s710893051": 127,
+    "bg_s710695206": 128,
+    "bg_s711203534": 129,
+    "bg_s708703129": 130,
+    "bg_s708616724": 131,
+    "bg_s710949136": 132,
+    "bg_s710920632": 133,
+    "bg_s711259848": 134,
+    "bg_s709656864": 135,
+    "bg_s710555138": 136,
+    "bg_s711287999": 137,
+    "bg_s708392900": 138,
+    "bg_s709974203": 139,
+    "bg_s709372879": 140,
+    "bg_s709232084": 141
+}
+
+ie = [
+    0, 1996959894, 3993919788, 2567524794,124634137,1886057615,3915621685,2657392035,249268274,2044508324,
+    3772115230,2547177864,162941995,2125561021,3887607047,2428444049,498536548,1789927666,4089016648,
+    2227061214,450548861,1843258603,4107580753,2211677639,325883990,1684777152,4251122042,2321926636,
+    335633487,1661365465,4195302755,2366115317,997073096,1281953886,3579855332,2724688242,1006888145,
+    1258607687,3524101629,2768942443,901097722,1119000684,3686517206,2898065728,853044451,1172266101,
+    3705015759,2882616665,651767980,1373503546,3369554304,3218104598,565507253,1454621731,3485111705,
+    3099436303,671266974,1594198024,3322730930,2970347812,795835527,1483230225,3244367275,3060149565,
+    1994146192,31158534,2563907772,4023717930,1907459465,112637215,2680153253,3904427059,2013776290,
+    251722036,2517215374,3775830040,2137656763,141376813,2439277719,3865271297,1802195444,476864866,
+    2238001368,4066508878,1812370925,453092731,2181625025,4111451223,1706088902,314042704,2344532202,
+    4240017532,1658658271,366619977,2362670323,4224994405,1303535960,984961486,2747007092,3569037538,
+    1256170817,1037604311,2765210733,3554079995,1131014506,879679996,2909243462,3663771856,1141124467,
+    855842277,2852801631,3708648649,1342533948,654459306,3188396048,3373015174,1466479909,544179635,
+    3110523913,3462522015,1591671054,702138776,2966460450,3352799412,1504918807,783551873,3082640443,
+    3233442989,3988292384,2596254646,62317068,1957810842,3939845945,2647816111,81470997,1943803523,
+    3814918930,2489596804,225274430,2053790376,3826175755,2466906013,167816743,2097651377,4027552580,
+    2265490386,503444072,1762050814,4150417245,2154129355,426522225,1852507879,4275313526,2312317920,
+    282753626,1742555852,4189708143,2394877945,397917763,1622183637,3604390888,2714866558,953729732,
+    1340076626,3518719985,2797360999,1068828381,1219638859,3624741850,2936675148,906185462,1090812512,
+    3747672003,2825379669,829329135,1181335161,3412177804,3160834842,628085408,1382605366,3423369109,
+    3138078467,570562233,1426400815,3317316542,2998733608,733239954,1555261956,3268935591,3050360625,
+    752459403,1541320221,2607071920,3965973030,1969922972,40735498,2617837225,3943577151,1913087877,
+    83908371,2512341634,3803740692,2075208622,213261112,2463272603,3855990285,2094854071,198958881,
+    2262029012,4057260610,1759359992,534414190,2176718541,4139329115,1873836001,414664567,2282248934,
+    4279200368,1711684554,285281116,2405801727,4167216745,1634467795,376229701,2685067896,3608007406,
+    1308918612,956543938,2808555105,3495958263,1231636301,1047427035,2932959818,3654703836,1088359270,
+    936918000,2847714899,3736837829,1202900863,817233897,3183342108,3401237130,1404277552,615818150,
+    3134207493,3453421203,1423857449,601450431,3009837614,3294710456,1567103746,711928724,3020668471,
+    3272380065,1510334235,755167117
+]
+
+browser_fingerprint = 'fff = "I38rHdgsjopgIvesdVwgIC+oIELmBZ5e3VwXLgFTIxS3bqwErFeexd0ekncAzMFYnqthIhJeSfMDKutRI3KsYorWHPtGrbV0P9WfIi/eWc6eYqtyQApPI37ekmR1QL+5Ii6sdnoeSfqYHqwl2qt5B0DoIx+PGDi/sVtkIxdeTqwGtuwWIEhBIE3s3Mi3ICLdI3Oe0Vtl2ADmsLveDSJsSPw5IEvsiVtJOqw8BVwfPpdeTFWOIx4TIiu6ZPwbPut5IvlaLbgs3qtxIxes1VwHIkumIkIyejgsY/WTge7eSqte/D7sDcpipBKefm4sIx/efutZIE0ejutImcLj8fPHIx5e3ut3gIoe19kKIESPIhhgHgGUI38P4m+oIhLu/uwMI3qV2d3ejIgs6PwRIvge0fvejAR2IideTbVUqqwkIkOs196s6Y3eiVwopa/eDuwFICFeoBKsWqt1msoeYqtoIvIQIvm5muwGmPwJoei4KWKed77eiPwcIioejAAeVMDYIiNsWMvs3nV7Ikge1Vt6IkiIPqwwNqtUI3OeiVtdIkKsVqwVIENsDqtXNPwnsuwFIvGUI3HgGBIW2IveiPtMIhPKIi0eSPw4eY4KLa6sYjYdIirw4VtOZuw5ICKe3qtd+L/eTlJs1rSwIhOs3oNs3qts/VwqI3Ae0PwAIkge6sR+Ixds0UgsSPtRIh/eSPwUH0PwIiLpI33sxMgeka/ejFdsYPtQIiFFI3EYmutcICEIIEgs3SFSNsOsWutsIEbQmqtWGIKsjMveYPwrsPwZIvEDIhh+LuwtyPtbIC7eWMAs6Vt2ZVwHIiHQLPw5IvG4L9MgIEJe0L/sY9Ne3VwsHVt4I3HyIx0s6PtRIEKe0WPAI3bebW42ICSKIv0e1VwvbVww4VwFICb3IkJexfgskutTmI8lIC4LqPtseuteIxGiIibyIiT3IE/ekSKe3WLItuwKICLEpPwQrVwVIh6sT/lvIEm3sUNs0VwdcqwmzLYKr/DXIiMlaVwtIkdsDWY/IiTHrPwYIhZO2utfbPtwIEDIIClMICk/zVtjIE4OIiee6VtFLbV1IkbNI3gedo5ekPwkICYkIEPAnjHdIvpf/Wq9IxgedYoeSuwZIENsiVtQIEZ8IC3s0PtwIxIpzPtYI3ve1FTnouw6GuwQIx0eSPwwIEJsSDzSIEJsDoAsTVtrtsvsSuwOcm7e6utrIx/sxYJe3PtaIEq0Ikq2autQyMFnIv5sjVtap7Ks1LFEsuwNIxRPIivsdYYrIiAeDPtrIvHyIEgeWZFdIkHLIico8M8nICJeYWYFIkWMIvb9I3oeSdWLJuwzbuwynmgsdF5sfqtYIv6ejbNejqwzZVtNI3QPnqw0outHHqtUGqwEtVtWt06s6z5ei9/skl6e6uwqIiPGIhT6I3QFI3OsiBgsT7hUHVtGIEMEmut4P03ekPt8ICAsfZOefezZIvAsSqwmPpmxI36sfPt6IvesVuw7HqtyI3JefdDzOutZbc7ejph="'
@@ -0,0 +1,107 @@
+# encoding: utf-8
+"""
+    账号池在替身接口上的表现
+    替身接口里每个账号同时只能处理capacity个请求 超过时返回 访问频次异常 其中一个账号始终返回失败
+    对比不同账号数量下的耗时 并确认坏账号被冷却、请求在好账号之间均匀分配、指定账号的请求不会被分走
+    以及接口返回的业务错误(笔记不存在)不会让账号冷却
+    python -m benchmarks.bench_account_pool
+"""
+import asyncio
+import json
+import time
+
+from aiohttp import web
+
+from apis.pc_apis import XhsApi, ApiType, get_url_by_api_type
+from apis.rate_controller import RateController
+from benchmarks.stub_server import start_stub_server, ok_response
+
+SEARCH_API = get_url_by_api_type(ApiType.GET_SEARCH_NOTE)
+SELF_INFO_API = get_url_by_api_type(ApiType.GET_MY_INFO_V2)
+BAD_A1 = 'bench-bad'
+# 这个账号的请求全部返回业务错误 账号本身没有问题
+DELETED_A1 = 'bench-deleted'
+
+
+def account_cookies(count: int) -> list:
+    return [f'a1=bench-{index}; web_session=bench-{index}' for index in range(count)]
+
+
+def per_account_handler(capacity: int = 4, latency: float = 0.02):
+    in_flight = {}
+
+    async def handler(request: web.Request) -> web.Response:
+        a1 = request.cookies.get('a1')
+        in_flight[a1] = in_flight.get(a1, 0) + 1
+        try:
+            await asyncio.sleep(latency)
+            if a1 == BAD_A1 or in_flight[a1] > capacity:
+                body = {"success": False, "msg": "访问频次异常，请勿频繁操作或重启试试", "code": 300013, "data": {'a1': a1}}
+                return web.Response(text=json.dumps(body, ensure_ascii=False), content_type='application/json')
+            if a1 == DELETED_A1:
+                body = {"success": False, "msg": "笔记不存在", "code": -510001, "data": {'a1': a1}}
+                return web.Response(text=json.dumps(body, ensure_ascii=False), content_type='application/json')
+            return ok_response({'a1': a1})
+        finally:
+            in_flight[a1] -= 1
+    return handler
+
+
+async def run(base_url: str, cookies_list: list, total: int, workers: int):
+    async with XhsApi(cookies=cookies_list, limit_per_host=workers * 2, rate_controller=RateController(), single_flight=False,
+                      account_cooldown=1.0) as xhs_apis:
+        xhs_apis._base_url = base_url
+        results = []
+
+        async def worker(count: int):
+            for _ in range(count):
+                success, msg, _ = await xhs_apis.get(SEARCH_API)
+                results.append(success)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(total // workers) for _ in range(workers)])
+        elapsed = time.perf_counter() - start
+
+        # 指定账号和与账号绑定的接口
+        pinned_index = len(xhs_apis.account_pool.accounts) // 2
+        with xhs_apis.pin_account(pinned_index):
+            pinned = await asyncio.gather(*[xhs_apis.get(SEARCH_API) for _ in range(10)])
+        bound = await asyncio.gather(*[xhs_apis.get(SELF_INFO_API) for _ in range(10)])
+        names = xhs_apis.account_pool.accounts
+        assert all(res_json['data']['a1'] == names[pinned_index].name for _, _, res_json in pinned)
+        assert all(res_json['data']['a1'] == names[0].name for _, _, res_json in bound)
+        return elapsed, results.count(True) / len(results), xhs_apis.account_pool.stats()
+
+
+async def main(total: int = 960, workers: int = 32):
+    runner, base_url = await start_stub_server(per_account_handler())
+    try:
+        base = None
+        for count in (1, 2, 4):
+            elapsed, success_rate, _ = await run(base_url, account_cookies(count), total, workers)
+            base = base or elapsed
+            print(f'accounts={count}  {elapsed * 1000:8.1f} ms  x{base / elapsed:.1f}  成功率 {success_rate:6.1%}')
+
+        cookies_list = account_cookies(3) + [f'a1={BAD_A1}; web_session=bad']
+        elapsed, success_rate, stats = await run(base_url, cookies_list, total, workers)
+        print(f'3个好账号+1个坏账号 {elapsed * 1000:8.1f} ms  成功率 {success_rate:6.1%}')
+        for name, item in stats.items():
+            print(f"  {name:<10} requests={item['requests']:<5} errors={item['errors']:<4} "
+                  f"error_rate={item['error_rate']:6.1%} cooldown={item['cooldown']:.1f}s")
+        good = [item['requests'] for name, item in stats.items() if name != BAD_A1]
+        assert stats[BAD_A1]['requests'] < min(good) / 4, stats
+        assert max(good) < min(good) * 2, stats
+
+        cookies_list = account_cookies(3) + [f'a1={DELETED_A1}; web_session=deleted']
+        elapsed, success_rate, stats = await run(base_url, cookies_list, total, workers)
+        item = stats[DELETED_A1]
+        print(f"3个好账号+1个只拿到业务错误的账号 {elapsed * 1000:8.1f} ms  成功率 {success_rate:6.1%}  "
+              f"{DELETED_A1} requests={item['requests']} errors={item['errors']} cooldown={item['cooldown']:.1f}s")
+        good = [item['requests'] for name, item in stats.items() if name != DELETED_A1]
+        assert item['errors'] == 0 and item['cooldown'] == 0 and item['requests'] > min(good) / 2, stats
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
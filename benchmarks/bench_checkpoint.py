@@ -0,0 +1,168 @@
+# encoding: utf-8
+"""
+    翻页断点 替身评论接口共300页 第一次运行在第200页失败
+    对比没有断点(第二次从头翻页)和有断点(从第200页继续)的总请求数 确认合并后的评论不重复不遗漏
+    以及调用方处理到一半中断时这一页会重新返回 翻完后重新爬取只返回新的评论
+    python -m benchmarks.bench_checkpoint
+"""
+import asyncio
+import json
+import os
+import tempfile
+import time
+from contextlib import aclosing
+
+from aiohttp import web
+
+from apis.checkpoint import CheckpointStore
+from apis.pc_apis import XhsApi
+from benchmarks.stub_server import start_stub_server, ok_response
+
+COOKIES = 'a1=1956beb135e5lv46l69faxnx5tbuna61jz5pwoev850000427689; web_session=bench'
+USER_URL = 'https://www.xiaohongshu.com/user/profile/bench_user?xsec_token=bench'
+PAGE_SIZE = 20
+
+
+def paged_handler(state: dict):
+    """
+        评论和用户笔记都按 state['ids'] 分页 cursor是页码 state['fail_at']中的页码第一次请求时失败
+        二级评论按 state['sub_ids'][一级评论id] 分页 state['sub_fail_at']中的页码第一次请求时失败
+    """
+    async def handler(request: web.Request) -> web.Response:
+        state['requests'] += 1
+        page = int(request.query.get('cursor') or 0)
+        root_id = request.query.get('root_comment_id')
+        fail_at = state['fail_at'] if root_id is None else state.setdefault('sub_fail_at', set())
+        if page in fail_at:
+            fail_at.discard(page)
+            body = {"success": False, "msg": f"替身接口拒绝 第{page}页", "code": -1, "data": {}}
+            return web.Response(text=json.dumps(body, ensure_ascii=False), content_type='application/json')
+        all_ids = state['ids'] if root_id is None else state['sub_ids'][root_id]
+        ids = all_ids[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+        has_more = (page + 1) * PAGE_SIZE < len(all_ids)
+        if 'user_id' in request.query:
+            return ok_response({'notes': [{'note_id': id} for id in ids], 'cursor': str(page + 1), 'has_more': has_more})
+        comments = [{'id': id, 'note_id': 'bench'} for id in ids]
+        if root_id is None and 'sub_ids' in state:
+            for comment in comments:
+                comment.update(sub_comment_has_more=True, sub_comment_cursor='0', sub_comments=[])
+        return ok_response({'comments': comments, 'cursor': str(page + 1), 'has_more': has_more})
+    return handler
+
+
+def new_state(pages: int = 300, fail_at: int = 200) -> dict:
+    return {'ids': [f'c{i}' for i in range(pages * PAGE_SIZE)], 'fail_at': {fail_at}, 'requests': 0}
+
+
+async def crawl_twice(base_url: str, state: dict, checkpoint_store: CheckpointStore = None) -> list:
+    """
+        第一次运行中途失败 第二次运行 返回两次拿到的全部评论
+        拿到的评论像正常任务一样在每次运行后保存
+    """
+    stored = []
+    async with XhsApi(cookies=COOKIES, single_flight=False, checkpoint_store=checkpoint_store) as xhs_apis:
+        xhs_apis._base_url = base_url
+        for run in (1, 2):
+            success, msg, comments = await xhs_apis.get_note_all_out_comment('bench', 'bench')
+            assert success == (run == 2), msg
+            stored.extend(comment['id'] for comment in comments)
+    return stored
+
+
+async def main():
+    state = new_state()
+    runner, base_url = await start_stub_server(paged_handler(state))
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            stored = await crawl_twice(base_url, state)
+            print(f'没有断点  两次运行共请求 {state["requests"]:<4} 页  保存 {len(stored)} 条 '
+                  f'其中重复 {len(stored) - len(set(stored))} 条  {time.perf_counter() - start:5.2f} s')
+            assert state['requests'] == 201 + 300
+
+            state.update(new_state())
+            checkpoint_store = CheckpointStore(os.path.join(directory, 'checkpoints.db'))
+            start = time.perf_counter()
+            stored = await crawl_twice(base_url, state, checkpoint_store)
+            print(f'有断点    两次运行共请求 {state["requests"]:<4} 页  保存 {len(stored)} 条 '
+                  f'其中重复 {len(stored) - len(set(stored))} 条  {time.perf_counter() - start:5.2f} s  '
+                  f'{checkpoint_store.stats}')
+            assert state['requests'] == 201 + 100 and stored == state['ids']
+
+            # 翻完后重新爬取 前面新增了两条评论 已经保存过的评论全部跳过
+            state['ids'][:0] = ['new0', 'new1']
+            state['requests'] = 0
+            async with XhsApi(cookies=COOKIES, single_flight=False, checkpoint_store=checkpoint_store) as xhs_apis:
+                xhs_apis._base_url = base_url
+                success, msg, comments = await xhs_apis.get_note_all_out_comment('bench', 'bench')
+                assert success and [comment['id'] for comment in comments] == ['new0', 'new1']
+                print(f'翻完后重新爬取  请求 {state["requests"]} 页  只返回新增的 {len(comments)} 条')
+
+                # 处理第3页时中断 这一页没有提交 下次运行重新返回
+                checkpoint_store.reset('GET_NOTE_COMMENT')
+                state['ids'] = [f'c{i}' for i in range(10 * PAGE_SIZE)]
+                async with aclosing(xhs_apis.iter_note_out_comments('bench', 'bench')) as pages:
+                    page = 0
+                    async for comments in pages:
+                        page += 1
+                        if page == 3:
+                            break
+                async with aclosing(xhs_apis.iter_note_out_comments('bench', 'bench')) as pages:
+                    first = await anext(pages)
+                assert first[0]['id'] == f'c{2 * PAGE_SIZE}'
+                print(f'处理第3页时中断  下次从第3页的 {first[0]["id"]} 开始')
+
+                # 用户笔记同样可以续传
+                state.update(new_state(pages=30, fail_at=20))
+                success, msg, notes = await xhs_apis.get_user_all_notes(USER_URL)
+                assert not success and len(notes) == 20 * PAGE_SIZE
+                success, msg, rest = await xhs_apis.get_user_all_notes(USER_URL)
+                assert success and [note['note_id'] for note in notes + rest] == state['ids']
+                assert state['requests'] == 21 + 10
+                print(f'用户笔记  第20页失败后续传  共请求 {state["requests"]} 页')
+
+                # 二级评论第3页失败 已经拿到的前两页要保留在一级评论里 下次运行从第3页继续
+                state.update(new_state(pages=1, fail_at=-1))
+                state.update(sub_ids={'root': [f'sub{i}' for i in range(4 * PAGE_SIZE)]}, sub_fail_at={2})
+                stored = []
+                for run in (1, 2):
+                    comment = {'id': 'root', 'note_id': 'bench', 'sub_comment_has_more': True,
+                               'sub_comment_cursor': '0', 'sub_comments': []}
+                    success, msg, comment = await xhs_apis.get_note_all_inner_comment(comment, 'bench')
+                    assert success == (run == 2), msg
+                    stored.extend(sub['id'] for sub in comment['sub_comments'])
+                assert stored == state['sub_ids']['root']
+                print(f'二级评论第3页失败后续传  两次运行保存 {len(stored)} 条  没有遗漏')
+
+                # 一级评论第3页失败 已经拿到的40条一级评论照样展开二级评论
+                checkpoint_store.reset('GET_NOTE_COMMENT')
+                state.update(new_state(pages=3, fail_at=2))
+                state.update(sub_ids={id: [f'{id}-sub{i}' for i in range(3)] for id in state['ids']})
+                stored = []
+                for run in (1, 2):
+                    success, msg, comments = await xhs_apis.get_note_all_comment(
+                        'https://www.xiaohongshu.com/explore/bench?xsec_token=bench')
+                    assert success == (run == 2), msg
+                    assert all(len(comment['sub_comments']) == 3 for comment in comments)
+                    stored.extend(comment['id'] for comment in comments)
+                assert stored == state['ids']
+                print(f'一级评论第3页失败后续传  两次运行保存 {len(stored)} 条一级评论 二级评论全部展开')
+
+            # 每页提交断点的开销
+            for store in (None, checkpoint_store):
+                checkpoint_store.reset('GET_NOTE_COMMENT')
+                state.update(new_state(pages=1000, fail_at=-1))
+                async with XhsApi(cookies=COOKIES, single_flight=False, checkpoint_store=store) as xhs_apis:
+                    xhs_apis._base_url = base_url
+                    start = time.perf_counter()
+                    success, msg, comments = await xhs_apis.get_note_all_out_comment('bench', 'bench')
+                    elapsed = time.perf_counter() - start
+                assert success and len(comments) == 1000 * PAGE_SIZE
+                print(f'checkpoint={"开" if store else "关"}  1000页  {elapsed * 1000 / 1000:6.3f} ms/页')
+            checkpoint_store.close()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+# encoding: utf-8
+"""
+    列式导出 ColumnarExporter 和 XlsxExporter 的写入速度、文件大小
+    以及 105万条评论 按笔记汇总点赞数 从Parquet读取和从xlsx重新解析字符串的耗时
+    需要安装pyarrow
+    python -m benchmarks.bench_columnar_export
+"""
+import os
+import tempfile
+import time
+
+import openpyxl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from benchmarks.bench_xlsx_export import comment_records
+from xhs_utils.columnar_exporter import ColumnarExporter
+from xhs_utils.data_util import parse_count
+from xhs_utils.xlsx_exporter import XlsxExporter
+
+
+def display_counts(records):
+    """
+        一部分点赞数换成 '1.2万' 这样的展示格式
+    """
+    for i, record in enumerate(records):
+        if i % 10 == 0:
+            record['like_count'] = f'{i % 97 / 10}万'
+        yield record
+
+
+def export(exporter_class, file_path: str, rows: int) -> float:
+    start = time.perf_counter()
+    with exporter_class(file_path, type='comment') as exporter:
+        exporter.write_rows(display_counts(comment_records(rows)))
+    return time.perf_counter() - start
+
+
+def likes_by_note_xlsx(file_path: str) -> dict:
+    workbook = openpyxl.load_workbook(file_path, read_only=True)
+    likes = {}
+    for row in workbook.active.iter_rows(min_row=2, values_only=True):
+        likes[row[0]] = likes.get(row[0], 0) + parse_count(row[9])
+    workbook.close()
+    return likes
+
+
+def likes_by_note_parquet(file_path: str) -> dict:
+    table = pq.read_table(file_path, columns=['note_id', 'like_count'])
+    grouped = table.group_by('note_id').aggregate([('like_count', 'sum')])
+    return dict(zip(grouped['note_id'].to_pylist(), grouped['like_count_sum'].to_pylist()))
+
+
+def main(small: int = 50000, large: int = 1050000):
+    with tempfile.TemporaryDirectory() as directory:
+        results = {}
+        for name, exporter_class in (('xlsx', XlsxExporter), ('parquet', ColumnarExporter)):
+            file_path = os.path.join(directory, f'small.{name}')
+            elapsed = export(exporter_class, file_path, small)
+            results[name] = file_path
+            print(f'{name:<8} {small} 行  写入 {elapsed:6.2f} s  {small / elapsed:8.0f} 行/s  '
+                  f'文件 {os.path.getsize(file_path) / 1024 / 1024:6.2f} MB')
+
+        start = time.perf_counter()
+        xlsx_likes = likes_by_note_xlsx(results['xlsx'])
+        xlsx_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        parquet_likes = likes_by_note_parquet(results['parquet'])
+        parquet_elapsed = time.perf_counter() - start
+        print(f'按笔记汇总点赞数 {small} 行  xlsx重新解析 {xlsx_elapsed:6.2f} s  parquet {parquet_elapsed * 1000:6.1f} ms')
+        assert xlsx_likes == parquet_likes
+
+        file_path = os.path.join(directory, 'large.parquet')
+        elapsed = export(ColumnarExporter, file_path, large)
+        metadata = pq.ParquetFile(file_path).metadata
+        start = time.perf_counter()
+        likes = likes_by_note_parquet(file_path)
+        query_elapsed = time.perf_counter() - start
+        print(f'parquet  {large} 行  写入 {elapsed:6.2f} s  {large / elapsed:8.0f} 行/s  '
+              f'文件 {os.path.getsize(file_path) / 1024 / 1024:6.2f} MB  row group {metadata.num_row_groups}  '
+              f'汇总 {query_elapsed * 1000:6.1f} ms')
+        assert metadata.num_rows == large and metadata.num_row_groups == -(-large // 65536)
+        assert sum(likes.values()) == sum(parse_count(record['like_count'])
+                                          for record in display_counts(comment_records(large)))
+
+        schema = pq.read_schema(file_path)
+        assert schema.field('like_count').type == pa.int64()
+        assert schema.field('upload_time').type == pa.timestamp('ms', tz='UTC')
+        assert schema.field('pictures').type == pa.list_(pa.string())
+        first = pq.read_table(file_path).slice(0, 1).to_pylist()[0]
+        assert first['like_count'] == 0 and first['content'] == '评论内容\x070 好看!'
+
+        arrow_path = os.path.join(directory, 'small.arrow')
+        export(ColumnarExporter, arrow_path, small)
+        with pa.ipc.open_file(arrow_path) as reader:
+            assert reader.read_all().num_rows == small
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# encoding: utf-8
+"""
+    get_note_all_comment 不同二级评论并发数下的耗时对比
+    替身接口中有一条一级评论的二级评论始终失败 用来确认失败只影响该条评论
+    python -m benchmarks.bench_comments
+"""
+import asyncio
+import json
+import time
+
+from aiohttp import web
+
+from apis.pc_apis import XhsApi
+from benchmarks.stub_server import start_stub_server, delayed, ok_response
+
+COOKIES = 'a1=1956beb135e5lv46l69faxnx5tbuna61jz5pwoev850000427689; web_session=bench'
+NOTE_URL = 'https://www.xiaohongshu.com/explore/bench?xsec_token=bench'
+FAILED_ROOT = 'r12'
+
+
+def comment_handler(out_pages: int = 10, inner_pages: int = 3):
+    """
+        一级评论每页10条 其中一半带有更多的二级评论 每条需要再翻inner_pages页
+    """
+    async def handler(request: web.Request) -> web.Response:
+        cursor = int(request.query.get('cursor') or 0)
+        if request.path.endswith('/comment/page'):
+            comments = [{
+                'id': f'r{cursor * 10 + k}',
+                'note_id': 'bench',
+                'sub_comments': [{'id': 'preview'}],
+                'sub_comment_has_more': k % 2 == 0,
+                'sub_comment_cursor': '0',
+            } for k in range(10)]
+            return ok_response({'comments': comments, 'cursor': str(cursor + 1), 'has_more': cursor < out_pages - 1})
+        root = request.query['root_comment_id']
+        if root == FAILED_ROOT:
+            body = {"success": False, "msg": "替身接口拒绝", "code": -1, "data": {}}
+            return web.Response(text=json.dumps(body, ensure_ascii=False), content_type='application/json')
+        return ok_response({'comments': [{'id': f'{root}-{cursor}'}], 'cursor': str(cursor + 1),
+                            'has_more': cursor < inner_pages - 1})
+    return handler
+
+
+async def run(base_url: str, concurrency: int):
+    async with XhsApi(cookies=COOKIES, limit_per_host=max(concurrency, 10)) as xhs_apis:
+        xhs_apis._base_url = base_url
+        start = time.perf_counter()
+        success, msg, comment_list = await xhs_apis.get_note_all_comment(NOTE_URL, concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+    assert not success and FAILED_ROOT in msg, msg
+    for comment in comment_list:
+        if comment['id'] == FAILED_ROOT:
+            assert 'sub_comment_error' in comment and len(comment['sub_comments']) == 1
+        elif comment['sub_comment_has_more']:
+            expected = ['preview'] + [f"{comment['id']}-{i}" for i in range(3)]
+            assert [sub['id'] for sub in comment['sub_comments']] == expected, comment['id']
+    return elapsed
+
+
+async def main(latency: float = 0.02):
+    runner, base_url = await start_stub_server(delayed(comment_handler(), latency))
+    try:
+        base = None
+        for concurrency in (1, 4, 16):
+            elapsed = await run(base_url, concurrency)
+            base = base or elapsed
+            print(f'concurrency={concurrency:<3} {elapsed * 1000:8.1f} ms  x{base / elapsed:.1f}')
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+# encoding: utf-8
+"""
+    JsonlSink 在不同fsync策略和压缩下的写入速度 和每条记录单独打开文件追加的写法对比
+    读回全部文件确认条数和顺序 按大小、按时间切分文件
+    python -m benchmarks.bench_jsonl_sink
+"""
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.bench_xlsx_export import comment_records
+from xhs_utils.jsonl_sink import JsonlSink, read_jsonl
+
+
+def naive_append(path: str, rows: int, fsync: bool) -> float:
+    """
+        每条记录打开文件 追加一行 关闭
+    """
+    os.makedirs(path, exist_ok=True)
+    start = time.perf_counter()
+    for record in comment_records(rows):
+        with open(f'{path}/records.jsonl', mode='a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+    return time.perf_counter() - start
+
+
+def read_back(files: list) -> int:
+    count = 0
+    for file_path in files:
+        for record in read_jsonl(file_path):
+            assert record['comment_id'] == f'66f1{count:020d}'
+            count += 1
+    return count
+
+
+def sink_run(path: str, rows: int, **kwargs) -> JsonlSink:
+    start = time.perf_counter()
+    with JsonlSink(path, prefix='comment', **kwargs) as sink:
+        sink.write_rows(comment_records(rows))
+    elapsed = time.perf_counter() - start
+    label = ' '.join(f'{key}={value}' for key, value in kwargs.items())
+    print(f'JsonlSink {label:<40} {rows:>8} 条  {rows / elapsed:9.0f} 条/s  fsync {sink.stats.fsyncs:<6} '
+          f'文件 {sink.stats.files:<3} {sink.stats.bytes / 1024 / 1024:7.1f} MB')
+    assert read_back(sink.files) == rows
+    assert sink.stats.bytes == sum(os.path.getsize(file_path) for file_path in sink.files)
+    return sink
+
+
+def main(rows: int = 1000000, naive_rows: int = 20000):
+    with tempfile.TemporaryDirectory() as directory:
+        for fsync in (False, True):
+            elapsed = naive_append(os.path.join(directory, f'naive_{fsync}'), naive_rows, fsync)
+            print(f'每条记录单独追加 fsync={fsync!s:<5}                        {naive_rows:>8} 条  '
+                  f'{naive_rows / elapsed:9.0f} 条/s')
+
+        sink_run(os.path.join(directory, 'record_fsync'), naive_rows, batch_size=1, fsync='batch')
+        for fsync in ('batch', 'interval', 'never'):
+            sink_run(os.path.join(directory, fsync), rows, fsync=fsync)
+        sink = sink_run(os.path.join(directory, 'gzip'), rows, fsync='interval', compression='gzip')
+        plain = sink_run(os.path.join(directory, 'rotate'), rows, fsync='never', max_bytes=64 * 1024 * 1024)
+        assert plain.stats.files > 1 and all(os.path.getsize(file_path) < 65 * 1024 * 1024 for file_path in plain.files)
+        assert sink.stats.bytes * 5 < plain.stats.bytes
+
+        # 按时间切分 每批之间间隔0.1秒
+        with JsonlSink(os.path.join(directory, 'timed'), batch_size=10, fsync='never', max_seconds=0.25) as sink:
+            for index, record in enumerate(comment_records(100)):
+                sink.write(record)
+                if index % 10 == 9:
+                    time.sleep(0.1)
+        print(f'max_seconds=0.25 每0.1秒一批 共10批  文件 {sink.stats.files}')
+        assert 3 <= sink.stats.files <= 5 and read_back(sink.files) == 100
+
+        # 进程被杀时最后一行只写了一半
+        with open(sink.files[-1], mode='a', encoding='utf-8') as f:
+            f.write('{"comment_id": "half')
+        assert read_back(sink.files) == 100
+
+
+if __name__ == '__main__':
+    main()
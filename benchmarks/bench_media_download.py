@@ -0,0 +1,90 @@
+# encoding: utf-8
+"""
+    媒体下载 同步包装逐篇下载(data_util.download_note) 和共用一个 MediaDownloader 的吞吐对比
+    替身cdn上图片200KB 视频4MB 每个请求有固定的首包延迟 其中一张图片始终返回404
+    python -m benchmarks.bench_media_download
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+from aiohttp import web
+
+from benchmarks.stub_server import start_stub_server
+from xhs_utils.data_util import download_note
+from xhs_utils.media_downloader import MediaDownloader
+
+IMAGE = os.urandom(200 * 1024)
+VIDEO = os.urandom(4 * 1024 * 1024)
+MISSING = '/img/missing'
+
+
+def cdn_handler(latency: float = 0.03):
+    async def handler(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        if request.path == MISSING:
+            return web.Response(status=404)
+        body = VIDEO if request.path.startswith('/video/') else IMAGE
+        return web.Response(body=body, content_type='application/octet-stream')
+    return handler
+
+
+def make_notes(base_url: str, albums: int = 15, images: int = 6, videos: int = 5) -> list:
+    notes = []
+    for i in range(albums):
+        notes.append({'note_id': f'album{i}', 'user_id': 'bench', 'nickname': 'bench', 'title': f'album{i}',
+                      'note_type': '图集', 'image_list': [f'{base_url}/img/{i}-{j}' for j in range(images)]})
+    for i in range(videos):
+        notes.append({'note_id': f'video{i}', 'user_id': 'bench', 'nickname': 'bench', 'title': f'video{i}',
+                      'note_type': '视频', 'video_cover': f'{base_url}/img/cover{i}',
+                      'video_addr': f'{base_url}/video/{i}'})
+    return notes
+
+
+def fill_detail(note: dict) -> dict:
+    keys = ['note_url', 'home_url', 'avatar', 'desc', 'liked_count', 'collected_count', 'comment_count',
+            'share_count', 'video_cover', 'video_addr', 'image_list', 'tags', 'upload_time', 'ip_location']
+    return {**{key: '' for key in keys}, **note}
+
+
+def directory_size(path: str) -> (int, int):
+    files, size = 0, 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            if name.endswith(('.jpg', '.mp4')):
+                files += 1
+                size += os.path.getsize(os.path.join(root, name))
+            assert not name.endswith('.part'), name
+    return files, size
+
+
+async def main():
+    runner, base_url = await start_stub_server(cdn_handler())
+    notes = [fill_detail(note) for note in make_notes(base_url)]
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sync')
+            start = time.perf_counter()
+            await asyncio.to_thread(lambda: [download_note(note, path) for note in notes])
+            elapsed = time.perf_counter() - start
+            files, size = directory_size(path)
+            print(f'同步逐篇下载        {elapsed:6.2f} s  {size / 1024 / 1024 / elapsed:7.1f} MB/s  '
+                  f'{files / elapsed:7.1f} files/s')
+
+            for concurrency in (4, 16):
+                path = os.path.join(directory, f'async{concurrency}')
+                broken = dict(notes[0], image_list=notes[0]['image_list'] + [base_url + MISSING])
+                async with MediaDownloader(concurrency=concurrency, limit_per_host=concurrency, delay=0.1) as downloader:
+                    results = await downloader.download_notes([broken] + notes[1:], path)
+                stats = downloader.stats
+                print(f'MediaDownloader x{concurrency:<3} {stats.elapsed:6.2f} s  {stats.mb_per_s:7.1f} MB/s  '
+                      f'{stats.files_per_s:7.1f} files/s  failed={stats.failed}')
+                assert stats.failed == 1 and not results[0][0] and all(success for success, _, _ in results[1:])
+                assert directory_size(path) == (files, size) == (stats.files, stats.bytes)
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+# encoding: utf-8
+"""
+    按媒体id去重的仓库 在替身cdn上对比网络请求数和占用的磁盘
+    笔记之间有转发的图片和相同的视频封面 第二次爬取时url中的 时间/签名 全部变化
+    python -m benchmarks.bench_media_store
+"""
+import asyncio
+import hashlib
+import os
+import random
+import tempfile
+import time
+
+from aiohttp import web
+
+from benchmarks.bench_media_download import fill_detail
+from benchmarks.stub_server import start_stub_server
+from xhs_utils.data_util import download_note, note_media_list
+from xhs_utils.media_downloader import MediaDownloader
+from xhs_utils.media_store import MediaStore, media_key
+
+
+def media_body(key: str, size: int) -> bytes:
+    return hashlib.sha256(key.encode('utf-8')).digest() * (size // 32)
+
+
+def cdn_handler(counter: dict, latency: float = 0.02):
+    async def handler(request: web.Request) -> web.Response:
+        counter['requests'] = counter.get('requests', 0) + 1
+        await asyncio.sleep(latency)
+        key = media_key(request.path)
+        size = 2 * 1024 * 1024 if key.startswith('video/') else 200 * 1024
+        return web.Response(body=media_body(key, size), content_type='application/octet-stream')
+    return handler
+
+
+def signed_url(base_url: str, img_id: str, crawl: int) -> str:
+    sign = hashlib.md5(f'{crawl}{img_id}'.encode('utf-8')).hexdigest()
+    return f'{base_url}/2024101812{crawl:02d}/{sign}/{img_id}!nd_dft_wlteh_webp_3'
+
+
+def make_notes(base_url: str, crawl: int, albums: int = 30, videos: int = 6, pool: int = 60) -> list:
+    """
+        图集从 pool 张图片中抽取 视频封面只有两种
+    """
+    rand = random.Random(0)
+    notes = []
+    for i in range(albums):
+        images = rand.sample(range(pool), 6)
+        notes.append(fill_detail({
+            'note_id': f'album{i}', 'user_id': f'user{i % 5}', 'nickname': 'bench', 'title': f'album{i}',
+            'note_type': '图集', 'image_list': [signed_url(base_url, f'1040g{j:05d}', crawl) for j in images]}))
+    for i in range(videos):
+        notes.append(fill_detail({
+            'note_id': f'video{i}', 'user_id': 'user0', 'nickname': 'bench', 'title': f'video{i}',
+            'note_type': '视频', 'video_cover': signed_url(base_url, f'cover{i % 2}', crawl),
+            'video_addr': f'{base_url}/video/{i}'}))
+    return notes
+
+
+def directory_usage(path: str) -> (int, int):
+    """
+        (媒体文件数量, 去掉硬链接重复后实际占用的字节数)
+    """
+    files, inodes = 0, {}
+    for root, _, names in os.walk(path):
+        for name in names:
+            if name.endswith(('.jpg', '.mp4')):
+                stat = os.stat(os.path.join(root, name))
+                files += 1
+                inodes[stat.st_ino] = stat.st_size
+    return files, sum(inodes.values())
+
+
+def check_contents(notes: list, path: str):
+    for note in notes:
+        media = [('video', note['video_addr'])] if note['note_type'] == '视频' else []
+        for file_name, url in media:
+            with open(f"{path}/bench_{note['user_id']}/{note['title']}_{note['note_id']}/{file_name}.mp4", 'rb') as f:
+                assert f.read() == media_body(media_key(url), 2 * 1024 * 1024)
+        for index, url in enumerate(note['image_list']):
+            with open(f"{path}/bench_{note['user_id']}/{note['title']}_{note['note_id']}/image_{index}.jpg", 'rb') as f:
+                assert f.read() == media_body(media_key(url), 200 * 1024)
+
+
+async def crawl(base_url: str, counter: dict, path: str, crawl_index: int, store: MediaStore = None) -> list:
+    counter.clear()
+    notes = make_notes(base_url, crawl_index)
+    start = time.perf_counter()
+    async with MediaDownloader(concurrency=16, limit_per_host=16, store=store) as downloader:
+        results = await downloader.download_notes(notes, path)
+    elapsed = time.perf_counter() - start
+    assert all(success for success, _, _ in results)
+    check_contents(notes, path)
+    files, size = directory_usage(os.path.dirname(path))
+    label = f'store 第{crawl_index}次' if store else f'无仓库 第{crawl_index}次'
+    print(f'{label:<10} {elapsed:6.2f} s  网络请求 {counter.get("requests", 0):<4} '
+          f'累计媒体文件 {files:<4} 累计占用 {size / 1024 / 1024:6.1f} MB')
+    return [counter.get('requests', 0), size]
+
+
+async def main():
+    counter = {}
+    runner, base_url = await start_stub_server(cdn_handler(counter))
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            plain = [await crawl(base_url, counter, os.path.join(directory, 'plain', f'crawl{i}'), i) for i in (1, 2)]
+            store = MediaStore(os.path.join(directory, 'stored', 'blobs'))
+            stored = [await crawl(base_url, counter, os.path.join(directory, 'stored', f'crawl{i}'), i, store)
+                      for i in (1, 2)]
+            blobs, blob_size = store.disk_usage()
+            print(f'仓库 {blobs} 个文件 {blob_size / 1024 / 1024:.1f} MB  {store.stats}')
+            unique = {media_key(url) for note in make_notes(base_url, 1) for _, url, _ in note_media_list(note)}
+            assert stored[0][0] == blobs == len(unique)
+            assert stored[1][0] == 0 and stored[1][1] == stored[0][1] == blob_size
+            assert plain[1][1] > 2 * blob_size
+
+            # 同步下载使用同一个仓库 不产生网络请求
+            counter.clear()
+            notes = make_notes(base_url, 3)[:5]
+            await asyncio.to_thread(lambda: [download_note(note, os.path.join(directory, 'sync'), store) for note in notes])
+            check_contents(notes, os.path.join(directory, 'sync'))
+            assert counter.get('requests', 0) == 0
+            print('同步 download_note 使用仓库  网络请求 0')
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
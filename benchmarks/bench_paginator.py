@@ -0,0 +1,86 @@
+# encoding: utf-8
+"""
+    按cursor翻页的迭代器在替身接口上的行为
+    调用方拿到前几页后停止 确认后面的页没有被请求 以及拿到第一页的耗时和翻完全部页的耗时对比
+    一级评论只在第一页为空时停止 中间的空页继续翻 和原来的循环一致
+    python -m benchmarks.bench_paginator
+"""
+import asyncio
+import time
+from contextlib import aclosing
+
+from aiohttp import web
+
+from apis.pc_apis import XhsApi
+from benchmarks.stub_server import start_stub_server, delayed, ok_response
+
+COOKIES = 'a1=1956beb135e5lv46l69faxnx5tbuna61jz5pwoev850000427689; web_session=bench'
+USER_URL = 'https://www.xiaohongshu.com/user/profile/bench_user?xsec_token=bench'
+PAGE_SIZE = 30
+
+
+def paged_handler(state: dict):
+    """
+        cursor是页码 用户笔记共state['pages']页 一级评论每页的条数为state['comment_pages']
+    """
+    async def handler(request: web.Request) -> web.Response:
+        state['requests'] += 1
+        page = int(request.query.get('cursor') or 0)
+        if 'user_id' in request.query:
+            notes = [{'note_id': f'{page}-{i}'} for i in range(PAGE_SIZE)]
+            return ok_response({'notes': notes, 'cursor': str(page + 1), 'has_more': page + 1 < state['pages']})
+        sizes = state['comment_pages']
+        comments = [{'id': f'{page}-{i}', 'note_id': 'bench'} for i in range(sizes[page])]
+        return ok_response({'comments': comments, 'cursor': str(page + 1), 'has_more': page + 1 < len(sizes)})
+    return handler
+
+
+async def main(pages: int = 50, latency: float = 0.02):
+    state = {'requests': 0, 'pages': pages}
+    runner, base_url = await start_stub_server(delayed(paged_handler(state), latency))
+    try:
+        async with XhsApi(cookies=COOKIES, single_flight=False) as xhs_apis:
+            xhs_apis._base_url = base_url
+
+            start = time.perf_counter()
+            success, msg, notes = await xhs_apis.get_user_all_notes(USER_URL)
+            total = time.perf_counter() - start
+            assert success and len(notes) == pages * PAGE_SIZE and state['requests'] == pages, msg
+            print(f'翻完全部 {pages} 页  {total * 1000:7.1f} ms  请求 {state["requests"]} 页')
+
+            # 处理两页后停止
+            state['requests'] = 0
+            start = time.perf_counter()
+            async with aclosing(xhs_apis.iter_user_notes(USER_URL)) as pages_iter:
+                seen = 0
+                async for notes in pages_iter:
+                    seen += 1
+                    if seen == 1:
+                        first = time.perf_counter() - start
+                    if seen == 2:
+                        break
+            await asyncio.sleep(latency * 5)
+            print(f'两页后停止  第一页 {first * 1000:7.1f} ms  请求 {state["requests"]} 页')
+            assert state['requests'] == 2, state
+
+            # url解析错误在调用时抛出 合并成列表的接口返回失败
+            try:
+                xhs_apis.iter_user_notes('https://www.xiaohongshu.com/user/profile/bench_user')
+                raise AssertionError('没有xsec_token参数的url应该在调用时报错')
+            except (IndexError, KeyError):
+                pass
+            success, msg, notes = await xhs_apis.get_user_all_notes('https://www.xiaohongshu.com/user/profile/bench_user')
+            assert not success and notes == []
+
+            # 一级评论 中间的空页继续翻 第一页为空时停止
+            for sizes, expected in (([10, 0, 10], 20), ([0, 10, 10], 0)):
+                state.update(requests=0, comment_pages=sizes)
+                success, msg, comments = await xhs_apis.get_note_all_out_comment('bench', 'bench')
+                print(f'一级评论每页 {sizes}  请求 {state["requests"]} 页  拿到 {len(comments)} 条')
+                assert success and len(comments) == expected, msg
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+# encoding: utf-8
+"""
+    按页码翻页时提前签名 对比总耗时 省下的时间以总耗时的差为准
+    不同depth轮流运行多轮 每个depth取最短的一次 减少机器负载波动的影响
+    python -m benchmarks.bench_presign
+"""
+import asyncio
+import time
+
+from apis.pc_apis import XhsApi
+from benchmarks.stub_server import start_stub_server, delayed, search_handler
+
+COOKIES = 'a1=1956beb135e5lv46l69faxnx5tbuna61jz5pwoev850000427689; web_session=bench'
+
+
+async def run(base_url: str, require_num: int, **kwargs):
+    async with XhsApi(cookies=COOKIES, **kwargs) as xhs_apis:
+        xhs_apis._base_url = base_url
+        start = time.perf_counter()
+        success, msg, note_list = await xhs_apis.search_some_note('bench', require_num=require_num)
+        elapsed = time.perf_counter() - start
+        assert success and len(note_list) == require_num, msg
+        assert [note['page'] for note in note_list] == sorted(note['page'] for note in note_list)
+        return elapsed, xhs_apis.presign_stats
+
+
+async def main(pages: int = 200, latency: float = 0.005, rounds: int = 7, depths: tuple = (0, 1, 2)):
+    require_num = pages * 20
+    runner, base_url = await start_stub_server(delayed(search_handler(total_pages=pages), latency))
+    try:
+        await run(base_url, 20)
+        times = {depth: [] for depth in depths}
+        stats = {}
+        for _ in range(rounds):
+            for depth in depths:
+                elapsed, stats[depth] = await run(base_url, require_num, presign_depth=depth)
+                times[depth].append(elapsed)
+        base = min(times[0])
+        for depth in depths:
+            best = min(times[depth])
+            median = sorted(times[depth])[rounds // 2]
+            print(f'presign_depth={depth} {pages}页  最短 {best * 1000:7.1f} ms  中位数 {median * 1000:7.1f} ms  '
+                  f'省下 {(base - best) * 1000:5.1f} ms ({(base - best) / pages * 1e6:5.1f} us/页)  '
+                  f'等待签名 {stats[depth].wait_time * 1000:5.1f} ms  '
+                  f'被I/O掩盖 {stats[depth].hidden_time * 1000:5.1f}/{stats[depth].sign_time * 1000:5.1f} ms '
+                  f'({stats[depth].hidden_ratio:.0%})  stale={stats[depth].stale} '
+                  f'wasted={stats[depth].wasted}')
+
+        # 多账号时 提前签名了但没用上的页不计入账号轮换 每个发出的请求只计一次
+        async with XhsApi(cookies=[COOKIES, COOKIES.replace('a1=1956', 'a1=2956')], presign_depth=2) as xhs_apis:
+            xhs_apis._base_url = base_url
+            success, msg, note_list = await xhs_apis.search_some_note('bench', require_num=10 * 20)
+            picks = sum(account.picks for account in xhs_apis.account_pool.accounts)
+            print(f'2个账号 翻10页  账号轮换计数 {picks}  没用上的提前签名 {xhs_apis.presign_stats.wasted}')
+            assert success and picks == 10 and xhs_apis.presign_stats.wasted == 2, msg
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,138 @@
+# encoding: utf-8
+"""
+    代理池在本地替身代理上的表现
+    替身代理直接返回接口响应 分别模拟 快代理、偶尔很慢的代理、经常返回502的代理 和已经挂掉的代理
+    对比随机选择代理和按分数选择代理的成功率、p50/p95/p99延迟 并确认账号和代理的配对生效
+    以及接口返回的业务错误(笔记不存在)不算代理失败 不会把正常的代理剔除
+    python -m benchmarks.bench_proxy_pool
+"""
+import asyncio
+import json
+import random
+import time
+
+from aiohttp import web
+
+from apis.pc_apis import XhsApi, ApiType, get_url_by_api_type
+from apis.proxy_pool import ProxyPool
+from benchmarks.stub_server import start_stub_server, ok_response
+
+COOKIES = ['a1=bench-0; web_session=bench-0', 'a1=bench-1; web_session=bench-1']
+SEARCH_API = get_url_by_api_type(ApiType.GET_SEARCH_NOTE)
+# 经过代理访问 这个地址不需要能解析
+BASE_URL = 'http://edith.stand-in'
+
+
+def stand_in_proxy(name: str, latency: float, slow_rate: float = 0.0, slow_latency: float = 0.5,
+                   failure_rate: float = 0.0, business_error: bool = False, seed: int = 0):
+    rng = random.Random(seed)
+
+    async def handler(request: web.Request) -> web.Response:
+        slow = rng.random() < slow_rate
+        await asyncio.sleep(slow_latency if slow else latency)
+        if rng.random() < failure_rate:
+            return web.Response(status=502, text='Bad Gateway')
+        if business_error:
+            body = {"success": False, "msg": "笔记不存在", "code": -510001, "data": {}}
+            return web.Response(text=json.dumps(body, ensure_ascii=False), content_type='application/json')
+        return ok_response({'proxy': name, 'a1': request.cookies.get('a1')})
+    return handler
+
+
+class RandomProxyPool(ProxyPool):
+    """
+        对照组 随机选择代理 只记录统计不参与选择
+    """
+
+    def pick(self, account_name: str = None):
+        return random.choice(self.proxies)
+
+
+async def start_proxies():
+    runners, urls = [], {}
+    profiles = {
+        'fast': dict(latency=0.02),
+        'tail': dict(latency=0.02, slow_rate=0.3, seed=1),
+        'flaky': dict(latency=0.02, failure_rate=0.3, seed=2),
+    }
+    for name, profile in profiles.items():
+        runner, url = await start_stub_server(stand_in_proxy(name, **profile))
+        runners.append(runner)
+        urls[name] = url
+    # 监听后立刻关闭 得到一个连不上的端口
+    runner, url = await start_stub_server()
+    await runner.cleanup()
+    urls['dead'] = url
+    return runners, urls
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def run(pool: ProxyPool, total: int, workers: int):
+    async with XhsApi(cookies=COOKIES, proxies=pool, limit_per_host=workers, single_flight=False) as xhs_apis:
+        xhs_apis._base_url = BASE_URL
+        latencies, results = [], []
+
+        async def worker(count: int):
+            for _ in range(count):
+                start = time.perf_counter()
+                success, msg, res_json = await xhs_apis.get(SEARCH_API)
+                latencies.append(time.perf_counter() - start)
+                results.append((success, res_json))
+
+        await asyncio.gather(*[worker(total // workers) for _ in range(workers)])
+    success_rate = sum(success for success, _ in results) / len(results)
+    return success_rate, [percentile(latencies, q) for q in (0.5, 0.95, 0.99)], results
+
+
+async def main(total: int = 800, workers: int = 16):
+    runners, urls = await start_proxies()
+    names = {url: name for name, url in urls.items()}
+    try:
+        baseline = None
+        for label, pool_class in (('随机选择', RandomProxyPool), ('按分数选择', ProxyPool)):
+            pool = pool_class(list(urls.values()), eject_time=2.0)
+            success_rate, quantiles, _ = await run(pool, total, workers)
+            p50, p95, p99 = quantiles
+            print(f'{label:<6} 成功率 {success_rate:6.1%}  p50 {p50 * 1000:6.1f} ms  '
+                  f'p95 {p95 * 1000:6.1f} ms  p99 {p99 * 1000:6.1f} ms')
+            for url, item in pool.stats().items():
+                latency = item['latency'] * 1000 if item['latency'] else float('nan')
+                print(f"    {names[url]:<6} requests={item['requests']:<4} failures={item['failures']:<4} "
+                      f"latency={latency:6.1f} ms failure_rate={item['failure_rate']:.2f} ejected={item['ejected']:.1f}s")
+            if pool_class is ProxyPool:
+                stats = {names[url]: item for url, item in pool.stats().items()}
+                assert stats['fast']['requests'] > total / 2, stats
+                assert stats['dead']['requests'] < total / 20, stats
+                assert success_rate > baseline[0] and success_rate > 0.95, (success_rate, baseline)
+                assert p95 < baseline[1] / 2, (p95, baseline)
+            else:
+                baseline = (success_rate, p95)
+
+        # 配对 bench-0 只走 tail 代理 bench-1 不受限制
+        pool = ProxyPool(list(urls.values()))
+        pool.pair('bench-0', urls['tail'])
+        _, _, results = await run(pool, 200, 8)
+        paired = {res_json['data']['proxy'] for success, res_json in results
+                  if success and res_json['data']['a1'] == 'bench-0'}
+        print('bench-0 使用的代理', paired)
+        assert paired == {'tail'}, paired
+
+        # 代理正常 接口全部返回业务错误
+        runner, url = await start_stub_server(stand_in_proxy('deleted', latency=0.01, business_error=True))
+        runners.append(runner)
+        pool = ProxyPool([url])
+        success_rate, _, _ = await run(pool, 100, 4)
+        item = pool.stats()[url]
+        print(f"业务错误 成功率 {success_rate:6.1%}  代理 failures={item['failures']} ejected={item['ejected']:.1f}s")
+        assert success_rate == 0 and item['failures'] == 0 and item['ejected'] == 0, item
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
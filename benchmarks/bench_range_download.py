@@ -0,0 +1,164 @@
+# encoding: utf-8
+"""
+    断点续传和分段并行下载 在本地支持Range的文件服务上测试
+    1. 每个文件的第一次连接传到一半时被服务端断开 确认重试时只补下载剩下的部分
+    2. 上次运行留下的 .part 文件 确认只下载缺少的部分
+    3. 服务端限制每个连接的带宽 对比单连接和分段并行下载的耗时
+    4. 服务端不支持Range时退回到从头下载
+    python -m benchmarks.bench_range_download
+"""
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+from aiohttp import web
+
+from benchmarks.stub_server import start_stub_server
+from xhs_utils.media_downloader import MediaDownloader
+
+MB = 1024 * 1024
+
+
+def range_file_handler(root: str, bandwidth: float = None, drop_first: bool = False):
+    """
+        从root目录读取文件 支持 Range: bytes=start-end
+        :param bandwidth: 每个连接的带宽(字节/秒) 为空时不限速
+        :param drop_first: 每个文件的第一次连接传到一半时断开
+        /norange/ 开头的路径忽略Range头 总是返回整个文件
+    """
+    dropped = set()
+    chunk = 256 * 1024
+
+    async def handler(request: web.Request) -> web.Response:
+        ignore_range = request.path.startswith('/norange/')
+        name = request.path.split('/')[-1]
+        file_path = os.path.join(root, name)
+        if not os.path.exists(file_path):
+            return web.Response(status=404)
+        total = os.path.getsize(file_path)
+        start, end, status = 0, total - 1, 200
+        match = re.match(r'bytes=(\d+)-(\d*)', request.headers.get('Range', ''))
+        if match and not ignore_range:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), total - 1) if match.group(2) else total - 1
+            if start >= total:
+                return web.Response(status=416, headers={'Content-Range': f'bytes */{total}'})
+            status = 206
+        headers = {'Content-Length': str(end - start + 1)}
+        if not ignore_range:
+            headers['Accept-Ranges'] = 'bytes'
+        if status == 206:
+            headers['Content-Range'] = f'bytes {start}-{end}/{total}'
+        response = web.StreamResponse(status=status, headers=headers)
+        await response.prepare(request)
+        drop_at = None
+        if drop_first and request.path not in dropped and end - start + 1 > 1:
+            dropped.add(request.path)
+            drop_at = start + (end - start + 1) // 2
+        with open(file_path, mode='rb') as f:
+            f.seek(start)
+            position = start
+            try:
+                while position <= end:
+                    data = f.read(min(chunk, end - position + 1))
+                    if drop_at is not None and position + len(data) > drop_at:
+                        await response.write(data[:drop_at - position])
+                        request.transport.close()
+                        return response
+                    await response.write(data)
+                    position += len(data)
+                    if bandwidth:
+                        await asyncio.sleep(len(data) / bandwidth)
+            except ConnectionError:
+                # 客户端提前断开 例如探测大小时收到200就不再读取
+                return response
+        await response.write_eof()
+        return response
+    return handler
+
+
+def md5(path: str) -> str:
+    with open(path, mode='rb') as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+
+def make_files(root: str, sizes: dict) -> dict:
+    digests = {}
+    for name, size in sizes.items():
+        with open(os.path.join(root, name), mode='wb') as f:
+            f.write(os.urandom(size))
+        digests[name] = md5(os.path.join(root, name))
+    return digests
+
+
+async def resume_after_drop(root: str, out: str):
+    names = [f'video{i}.mp4' for i in range(8)]
+    digests = make_files(root, {name: 4 * MB for name in names})
+    runner, base_url = await start_stub_server(range_file_handler(root, drop_first=True))
+    try:
+        async with MediaDownloader(delay=0) as downloader:
+            results = await asyncio.gather(*[downloader.download(f'{base_url}/{name}', os.path.join(out, name))
+                                              for name in names])
+        stats = downloader.stats
+        total = 4 * MB * len(names)
+        print(f'断线续传  files={stats.files} resumed={stats.resumed} 传输 {stats.bytes / MB:.1f} MB '
+              f'(文件共 {total / MB:.0f} MB 不续传需要 {total * 1.5 / MB:.0f} MB)')
+        assert all(success for success, _, _ in results)
+        assert all(md5(os.path.join(out, name)) == digests[name] for name in names)
+        assert stats.resumed == len(names) and stats.bytes == total
+    finally:
+        await runner.cleanup()
+
+
+async def resume_from_previous_run(root: str, out: str):
+    digests = make_files(root, {'previous.mp4': 6 * MB})
+    with open(os.path.join(root, 'previous.mp4'), mode='rb') as f, \
+            open(os.path.join(out, 'previous.mp4.part'), mode='wb') as part:
+        part.write(f.read(2 * MB))
+    runner, base_url = await start_stub_server(range_file_handler(root))
+    try:
+        async with MediaDownloader() as downloader:
+            success, msg, size = await downloader.download(f'{base_url}/previous.mp4', os.path.join(out, 'previous.mp4'))
+        print(f'上次的 .part  传输 {downloader.stats.bytes / MB:.1f} MB / 文件 {size / MB:.0f} MB')
+        assert success and md5(os.path.join(out, 'previous.mp4')) == digests['previous.mp4']
+        assert downloader.stats.bytes == 4 * MB and not os.path.exists(os.path.join(out, 'previous.mp4.part'))
+    finally:
+        await runner.cleanup()
+
+
+async def parallel_download(root: str, out: str, bandwidth: float = 16 * MB):
+    digests = make_files(root, {'large.mp4': 16 * MB})
+    runner, base_url = await start_stub_server(range_file_handler(root, bandwidth=bandwidth))
+    try:
+        for parts in (1, 4):
+            file_path = os.path.join(out, f'large_{parts}.mp4')
+            async with MediaDownloader(parallel_parts=parts, parallel_min_size=MB) as downloader:
+                start = time.perf_counter()
+                success, msg, _ = await downloader.download(f'{base_url}/large.mp4', file_path, parallel=True)
+                elapsed = time.perf_counter() - start
+            print(f'parallel_parts={parts}  {elapsed:5.2f} s  {16 / elapsed:6.1f} MB/s  '
+                  f'(每个连接限速 {bandwidth / MB:.0f} MB/s)')
+            assert success and md5(file_path) == digests['large.mp4'], msg
+            assert downloader.stats.parallel == (1 if parts > 1 else 0)
+        # 服务端不支持Range时退回单连接
+        file_path = os.path.join(out, 'large_norange.mp4')
+        async with MediaDownloader(parallel_parts=4, parallel_min_size=MB) as downloader:
+            success, msg, _ = await downloader.download(f'{base_url}/norange/large.mp4', file_path, parallel=True)
+        assert success and md5(file_path) == digests['large.mp4'] and downloader.stats.parallel == 0, msg
+        print('不支持Range的服务端  退回单连接下载 文件一致')
+    finally:
+        await runner.cleanup()
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as out:
+        await resume_after_drop(root, out)
+        await resume_from_previous_run(root, out)
+        await parallel_download(root, out)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
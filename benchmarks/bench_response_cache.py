@@ -0,0 +1,82 @@
+# encoding: utf-8
+"""
+    响应缓存在替身接口上的效果
+    同一个任务里重复请求用户信息、笔记详情、第一页评论和搜索 对比不缓存、内存缓存 以及第二次运行从磁盘命中
+    同时确认通知类接口始终不缓存
+    python -m benchmarks.bench_response_cache
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+from aiohttp import web
+
+from apis.pc_apis import XhsApi
+from apis.response_cache import ResponseCache
+from benchmarks.stub_server import start_stub_server, delayed, ok_response
+
+COOKIES = 'a1=1956beb135e5lv46l69faxnx5tbuna61jz5pwoev850000427689; web_session=bench'
+
+
+def counting_handler(counter: dict):
+    async def handler(request: web.Request) -> web.Response:
+        counter[request.path] = counter.get(request.path, 0) + 1
+        if request.path.endswith('/search/notes'):
+            page = (await request.json())['page']
+            return ok_response({'items': [{'id': f'{page}-{i}'} for i in range(20)], 'has_more': True})
+        return ok_response({'path': request.path, 'query': dict(request.query), 'comments': [], 'cursor': ''})
+    return handler
+
+
+async def job(base_url: str, cache: ResponseCache, users: int = 40, repeat: int = 3):
+    async with XhsApi(cookies=COOKIES, response_cache=cache) as xhs_apis:
+        xhs_apis._base_url = base_url
+        for _ in range(repeat):
+            await asyncio.gather(*[xhs_apis.get_user_info(f'user{i}') for i in range(users)])
+            await asyncio.gather(*[xhs_apis.get_note_info(f'note{i}', 'pc_search', f'token{i}') for i in range(users)])
+            await asyncio.gather(*[xhs_apis.get_note_out_comment(f'note{i}', '', 'token') for i in range(users)])
+            await xhs_apis.search_some_note('bench', require_num=100)
+            success, msg, res_json = await xhs_apis.get_unread_message()
+            assert success, msg
+
+
+async def run(base_url: str, counter: dict, label: str, cache: ResponseCache):
+    counter.clear()
+    start = time.perf_counter()
+    await job(base_url, cache)
+    elapsed = time.perf_counter() - start
+    requests = sum(counter.values())
+    line = f'{label:<10} {elapsed * 1000:8.1f} ms  网络请求 {requests:<4}'
+    if cache is not None:
+        stats = cache.stats
+        line += (f' hits={stats.hits} disk_hits={stats.disk_hits} misses={stats.misses} '
+                 f'hit_ratio={stats.hit_ratio:.1%}')
+    print(line)
+    return requests
+
+
+async def main(latency: float = 0.03):
+    counter = {}
+    runner, base_url = await start_stub_server(delayed(counting_handler(counter), latency))
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'response_cache.db')
+            uncached = await run(base_url, counter, '不缓存', None)
+            memory = await run(base_url, counter, '内存缓存', ResponseCache())
+            first = ResponseCache(path=path)
+            await run(base_url, counter, '磁盘 第一次', first)
+            first.close()
+            second = ResponseCache(path=path)
+            repeat = await run(base_url, counter, '磁盘 第二次', second)
+            second.close()
+        # 每轮3次的用户信息、笔记详情、评论和搜索只在第一次访问网络 通知接口每次都访问
+        assert memory == (uncached - 3) // 3 + 3, (memory, uncached)
+        assert repeat == 3, counter
+        assert counter == {'/api/sns/web/unread_count': 3}, counter
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
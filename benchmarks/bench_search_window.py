@@ -0,0 +1,41 @@
+# encoding: utf-8
+"""
+    search_some_note / search_some_user 逐页请求和窗口并发请求的耗时对比
+    python -m benchmarks.bench_search_window
+"""
+import asyncio
+import time
+
+from apis.pc_apis import XhsApi
+from benchmarks.stub_server import start_stub_server, delayed, search_handler
+
+COOKIES = 'a1=1956beb135e5lv46l69faxnx5tbuna61jz5pwoev850000427689; web_session=bench'
+
+
+async def run(base_url: str, search, require_num: int, window: int):
+    async with XhsApi(cookies=COOKIES, limit_per_host=max(window, 10)) as xhs_apis:
+        xhs_apis._base_url = base_url
+        start = time.perf_counter()
+        success, msg, result_list = await getattr(xhs_apis, search)('bench', require_num=require_num, window=window)
+        elapsed = time.perf_counter() - start
+        assert success and len(result_list) == require_num, msg
+        pages = [item['page'] for item in result_list]
+        assert pages == sorted(pages), '结果没有按页码顺序排列'
+        return elapsed
+
+
+async def main(require_num: int = 1000, latency: float = 0.05):
+    runner, base_url = await start_stub_server(delayed(search_handler(total_pages=100), latency))
+    try:
+        for search in ('search_some_note', 'search_some_user'):
+            base = None
+            for window in (1, 4, 8, 16):
+                elapsed = await run(base_url, search, require_num, window)
+                base = base or elapsed
+                print(f'{search:<17} window={window:<3} {elapsed * 1000:8.1f} ms  x{base / elapsed:.1f}')
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,41 @@
+# encoding: utf-8
+"""
+    对比每次请求新建ClientSession和XhsApi共享连接池的吞吐
+    python -m benchmarks.bench_session
+"""
+import asyncio
+import time
+
+from apis.pc_apis import XhsApi
+from benchmarks.stub_server import start_stub_server
+
+COOKIES = 'a1=1956beb135e5lv46l69faxnx5tbuna61jz5pwoev850000427689; web_session=bench'
+API = '/api/sns/web/v1/user/otherinfo?target_user_id=bench'
+
+
+async def run(base_url: str, total: int, pooled: bool) -> float:
+    async with XhsApi(cookies=COOKIES) as xhs_apis:
+        xhs_apis._base_url = base_url
+        start = time.perf_counter()
+        for _ in range(total):
+            success, msg, _ = await xhs_apis.get(API)
+            assert success, msg
+            if not pooled:
+                # 模拟旧行为 每次请求后丢弃会话和连接
+                await xhs_apis.close()
+        elapsed = time.perf_counter() - start
+    return total / elapsed
+
+
+async def main(total: int = 2000):
+    runner, base_url = await start_stub_server()
+    try:
+        for pooled in (False, True):
+            rps = await run(base_url, total, pooled)
+            print(f'{"pooled session" if pooled else "session per call":<18} {rps:10.1f} req/s')
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+# encoding: utf-8
+"""
+    对比在事件循环中直接签名和使用签名池时的吞吐与事件循环卡顿
+    签名池只在多于一个cpu核心时有收益 单核时进程池会退回线程池 两者都比直接签名慢
+    python -m benchmarks.bench_signer_pool
+"""
+import asyncio
+import os
+import time
+
+from apis.pc_apis import XhsApi
+from benchmarks.stub_server import start_stub_server, delayed, default_handler
+
+COOKIES = 'a1=1956beb135e5lv46l69faxnx5tbuna61jz5pwoev850000427689; web_session=bench'
+
+
+async def heartbeat(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """
+        返回事件循环的最大调度延迟
+    """
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run(base_url: str, total: int, concurrency: int, **kwargs):
+    async with XhsApi(cookies=COOKIES, limit_per_host=concurrency, **kwargs) as xhs_apis:
+        xhs_apis._base_url = base_url
+        apis = [f'/api/sns/web/v1/user/otherinfo?target_user_id={i}' for i in range(total)]
+        # 预热 进程池启动不计入
+        await xhs_apis.sign_many([(apis[0], None)])
+
+        start = time.perf_counter()
+        signed = await xhs_apis.sign_many([(api, None) for api in apis])
+        sign_elapsed = time.perf_counter() - start
+
+        # 每个请求在get中现场签名 同时观察事件循环的卡顿
+        semaphore = asyncio.Semaphore(concurrency)
+        stop = asyncio.Event()
+        lag = asyncio.create_task(heartbeat(stop))
+        start = time.perf_counter()
+
+        async def fetch(api):
+            async with semaphore:
+                success, msg, _ = await xhs_apis.get(api)
+                assert success, msg
+
+        await asyncio.gather(*[fetch(api) for api in apis])
+        elapsed = time.perf_counter() - start
+        stop.set()
+        worst_lag = await lag
+        pool = xhs_apis._signer_pool
+        mode = 'inline' if pool is None else f'{"processes" if pool.use_process else "threads"} x{pool.max_workers}'
+    assert len(signed) == total
+    return total / sign_elapsed, total / elapsed, worst_lag, mode
+
+
+async def main(total: int = 4000, concurrency: int = 50, workers: int = 4):
+    runner, base_url = await start_stub_server(delayed(default_handler, 0.02))
+    print(f'cpu核数 {os.cpu_count()}')
+    try:
+        cases = [
+            ('inline', {}),
+            (f'threads x{workers}', {'sign_workers': workers, 'sign_in_process': False}),
+            (f'processes x{workers}', {'sign_workers': workers, 'sign_in_process': True}),
+        ]
+        for name, kwargs in cases:
+            sign_rate, req_rate, worst_lag, mode = await run(base_url, total, concurrency, **kwargs)
+            print(f'{name:<14} 实际 {mode:<14} sign_many {sign_rate:9.1f} signs/s  get {req_rate:8.1f} req/s  '
+                  f'max loop lag {worst_lag * 1000:7.1f} ms')
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
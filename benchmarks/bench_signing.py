@@ -0,0 +1,108 @@
+# encoding: utf-8
+"""
+    单核签名吞吐 对比基线提交中的generate_params（benchmarks/baseline_encrypt）与SigningContext
+    以及异步接口、typeguard运行时检查带来的额外开销
+    python -m benchmarks.bench_signing
+"""
+import asyncio
+import inspect
+import time
+import timeit
+
+from typeguard import typechecked
+
+from benchmarks.baseline_encrypt import generate_params as baseline_generate_params
+from encrypt import SigningContext
+
+COOKIES = 'a1=1956beb135e5lv46l69faxnx5tbuna61jz5pwoev850000427689; web_session=bench'
+API = '/api/sns/web/v1/user/otherinfo?target_user_id=bench'
+
+
+async def per_call(sign, number: int) -> float:
+    """
+        连续调用number次 返回每次的秒数 同步和异步的签名方式走同一段循环
+    """
+    start = time.perf_counter()
+    for _ in range(number):
+        result = sign()
+        if inspect.isawaitable(result):
+            await result
+    return (time.perf_counter() - start) / number
+
+
+async def compare(variants: dict, number: int = 1000, repeat: int = 15) -> dict:
+    """
+        各种签名方式交替运行repeat轮 每轮各调用number次 每种方式取最快的一轮
+        交替运行让机器负载的波动落到每种方式上 取最小值去掉被调度打断的轮次
+        返回 {名字: 每次签名的微秒数}
+    """
+    best = {name: float('inf') for name in variants}
+    for _ in range(repeat):
+        for name, sign in variants.items():
+            best[name] = min(best[name], await per_call(sign, number))
+    for name, seconds in best.items():
+        print(f'{name:<16} {1 / seconds:10.1f} signs/s  {seconds * 1e6:8.2f} us/sign')
+    return {name: seconds * 1e6 for name, seconds in best.items()}
+
+
+class NoopContext:
+    """
+        签名本身什么都不做 只保留 SigningContext.sign 这层异步包装
+    """
+
+    def sign_sync(self, url: str, data: dict = None):
+        return None
+
+    sign = SigningContext.sign
+
+
+def xs_stub(url: str, a1: str, ts: str, platform: str = 'xhs-pc-web') -> str:
+    """
+        和 XsEncrypt.encrypt_xs_sync 相同的签名和注解 函数体为空
+    """
+    return url
+
+
+def overhead(wrapped, plain, number: int = 20000, repeat: int = 15) -> float:
+    """
+        单独测量一层包装的开销 被包装的函数体为空 不会被签名本身的波动淹没
+        两者交替用timeit.repeat各测repeat轮取最小值 返回每次调用多出的微秒数
+    """
+    best_wrapped = best_plain = float('inf')
+    for _ in range(repeat):
+        best_wrapped = min(best_wrapped, timeit.repeat(wrapped, number=number, repeat=1)[0])
+        best_plain = min(best_plain, timeit.repeat(plain, number=number, repeat=1)[0])
+    return (best_wrapped - best_plain) / number * 1e6
+
+
+def run_coroutine(coro):
+    """
+        不经过事件循环驱动一个不会挂起的协程 和在事件循环中await的开销相同
+    """
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+
+
+async def main():
+    context = SigningContext(COOKIES)
+    us = await compare({
+        'baseline': lambda: baseline_generate_params(API, None, COOKIES),
+        'SigningContext': lambda: context.sign(API),
+        'sign_sync': lambda: context.sign_sync(API),
+    }, number=300)
+    print(f'speedup x{us["baseline"] / us["sign_sync"]:.2f}')
+
+    noop = NoopContext()
+    print(f'async wrapper overhead {overhead(lambda: run_coroutine(noop.sign(API)), lambda: noop.sign_sync(API)):.2f} us/sign')
+
+    # 旧版本 encrypt_xs/encrypt_payload 默认带有 @typechecked
+    checked = typechecked(xs_stub)
+    a1 = context.a1
+    print(f'typeguard overhead {overhead(lambda: checked(API, a1, "1732352811091"), lambda: xs_stub(API, a1, "1732352811091")):.2f} '
+          f'us/sign (encrypt_xs)')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
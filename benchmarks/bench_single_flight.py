@@ -0,0 +1,93 @@
+# encoding: utf-8
+"""
+    合并请求在替身接口上的效果
+    模拟很多条评论来自少数几个作者 同时查询作者信息 对比关闭和开启合并请求时的网络请求数和耗时
+    以及窗口翻页提前结束时 开启合并请求后不再需要的页仍然会被取消
+    python -m benchmarks.bench_single_flight
+"""
+import asyncio
+import time
+
+from aiohttp import web
+
+from apis.pc_apis import XhsApi
+from benchmarks.stub_server import start_stub_server, delayed, ok_response, search_handler
+
+COOKIES = 'a1=1956beb135e5lv46l69faxnx5tbuna61jz5pwoev850000427689; web_session=bench'
+
+
+def counting_handler(counter: dict):
+    async def handler(request: web.Request) -> web.Response:
+        counter['requests'] = counter.get('requests', 0) + 1
+        return ok_response({'user_id': request.query.get('target_user_id'), 'tags': []})
+    return handler
+
+
+async def run(base_url: str, counter: dict, single_flight: bool, comments: int, authors: int):
+    counter.clear()
+    async with XhsApi(cookies=COOKIES, single_flight=single_flight) as xhs_apis:
+        xhs_apis._base_url = base_url
+        start = time.perf_counter()
+        results = await asyncio.gather(*[xhs_apis.get_user_info(f'user{i % authors}') for i in range(comments)])
+        elapsed = time.perf_counter() - start
+        assert all(success for success, _, _ in results)
+        assert [res_json['data']['user_id'] for _, _, res_json in results] == [f'user{i % authors}' for i in range(comments)]
+        # 合并后每个调用方拿到的是各自的对象
+        results[0][2]['data']['tags'].append('changed')
+        assert results[authors][2]['data']['tags'] == []
+        saved = xhs_apis.single_flight.stats.saved if xhs_apis.single_flight else 0
+    return elapsed, counter['requests'], saved
+
+
+def slow_search_handler(counter: dict, slow: float):
+    """
+        第一页立即返回 后面的页要slow秒 记录服务端开始和被客户端放弃的请求数
+    """
+    handler = search_handler(total_pages=100)
+
+    async def _handler(request: web.Request) -> web.Response:
+        counter['started'] += 1
+        try:
+            if (await request.json()).get('page') != 1:
+                await asyncio.sleep(slow)
+            return await handler(request)
+        except asyncio.CancelledError:
+            counter['cancelled'] += 1
+            raise
+    return _handler
+
+
+async def run_cancel(base_url: str, counter: dict, single_flight: bool, window: int):
+    counter.update(started=0, cancelled=0)
+    async with XhsApi(cookies=COOKIES, limit_per_host=window, single_flight=single_flight) as xhs_apis:
+        xhs_apis._base_url = base_url
+        success, msg, notes = await xhs_apis.search_some_note('bench', require_num=20, window=window)
+        assert success and len(notes) == 20, msg
+        # 在关闭连接池之前统计 确认是翻页结束时取消的
+        await asyncio.sleep(0.2)
+        return counter['started'], counter['cancelled']
+
+
+async def main(comments: int = 500, authors: int = 20, latency: float = 0.05, window: int = 8):
+    counter = {}
+    runner, base_url = await start_stub_server(delayed(counting_handler(counter), latency))
+    try:
+        for single_flight in (False, True):
+            elapsed, requests, saved = await run(base_url, counter, single_flight, comments, authors)
+            print(f'single_flight={single_flight!s:<5} {elapsed * 1000:8.1f} ms  网络请求 {requests:<4} 省下 {saved}')
+        assert requests == authors and saved == comments - authors
+    finally:
+        await runner.cleanup()
+
+    runner, base_url = await start_stub_server(slow_search_handler(counter, slow=5), handler_cancellation=True)
+    try:
+        for single_flight in (False, True):
+            started, cancelled = await run_cancel(base_url, counter, single_flight, window)
+            print(f'single_flight={single_flight!s:<5} window={window} 只要第一页  请求 {started} 页  取消 {cancelled} 页')
+            assert started == window and cancelled == window - 1
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
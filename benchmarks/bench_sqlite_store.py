@@ -0,0 +1,102 @@
+# encoding: utf-8
+"""
+    SqliteStore 批量事务和逐条提交的写入速度 重复upsert 以及按用户查询已保存笔记走索引和全表扫描的耗时
+    python -m benchmarks.bench_sqlite_store
+"""
+import os
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.bench_xlsx_export import comment_records
+from xhs_utils.data_util import timestamp_to_str
+from xhs_utils.sqlite_store import SqliteStore
+
+
+def note_records(users: int, notes_per_user: int, liked: str = '1.2万'):
+    for u in range(users):
+        for n in range(notes_per_user):
+            note_id = f'66f0{u:06d}{n:014d}'
+            yield {
+                'note_id': note_id, 'note_url': f'https://www.xiaohongshu.com/explore/{note_id}', 'note_type': '图集',
+                'user_id': f'user{u:06d}', 'home_url': f'https://www.xiaohongshu.com/user/profile/user{u:06d}',
+                'nickname': f'用户{u}', 'avatar': 'https://sns-avatar-qc.xhscdn.com/avatar/1040g2jo31abc',
+                'title': f'标题{n}', 'desc': '描述 #标签[话题]#', 'liked_count': liked, 'collected_count': '356',
+                'comment_count': '10+', 'share_count': '1', 'video_cover': None, 'video_addr': None,
+                'image_list': [f'http://sns-webpic-qc.xhscdn.com/1040g{u:05d}{n:04d}{i}' for i in range(3)],
+                'tags': ['穿搭', '日常'], 'upload_time': timestamp_to_str(1700000000000 + n * 3600000),
+                'ip_location': '上海',
+            }
+
+
+def write_rate(path: str, rows: int, batch_size: int) -> (float, int):
+    """
+        返回 (每秒写入的条数, 提交的事务数)
+    """
+    with SqliteStore(path, batch_size=batch_size) as store:
+        start = time.perf_counter()
+        store.upsert_notes(note_records(rows // 100, 100))
+        store.flush()
+        elapsed = time.perf_counter() - start
+        return rows / elapsed, store.stats.commits
+
+
+def main(users: int = 2000, notes_per_user: int = 100, comments: int = 500000, lookups: int = 1000):
+    with tempfile.TemporaryDirectory() as directory:
+        single, single_commits = write_rate(os.path.join(directory, 'single.db'), 10000, batch_size=1)
+        batched, batched_commits = write_rate(os.path.join(directory, 'batched.db'), 10000, batch_size=1000)
+        # 速度只供参考 WAL加synchronous=NORMAL时逐条提交也不慢 差距随机器变化
+        print(f'逐条提交 {single:8.0f} 条/s 事务 {single_commits}   '
+              f'每1000条一个事务 {batched:8.0f} 条/s 事务 {batched_commits}')
+        assert single_commits == 10000 and batched_commits == 10
+
+        path = os.path.join(directory, 'xhs.db')
+        notes = users * notes_per_user
+        with SqliteStore(path) as store:
+            start = time.perf_counter()
+            store.upsert_notes(note_records(users, notes_per_user))
+            store.upsert_comments(comment_records(comments))
+            store.flush()
+            elapsed = time.perf_counter() - start
+            print(f'写入 {notes} 篇笔记 {comments} 条评论  {elapsed:6.2f} s  {(notes + comments) / elapsed:8.0f} 条/s  '
+                  f'事务 {store.stats.commits}')
+
+            # 第二次爬取 点赞数变化 主键相同的记录被覆盖
+            start = time.perf_counter()
+            store.upsert_notes(note_records(users, notes_per_user, liked='2.5万'))
+            store.flush()
+            print(f'重复upsert {notes} 篇笔记  {time.perf_counter() - start:6.2f} s')
+            assert store.count('note') == notes and store.count('comment') == comments
+            note = store.get('note', '66f0000007' + '0' * 13 + '5')
+            assert note['liked_count'] == 25000 and note['comment_count'] == 10 and note['tags'] == ['穿搭', '日常']
+            assert note['upload_time'] == 1700000000000 + 5 * 3600000
+
+            # 用户主页列出的笔记 前100篇已保存 20篇是新的
+            listing = [f'66f0{7:06d}{n:014d}' for n in range(notes_per_user + 20)]
+            start = time.perf_counter()
+            for _ in range(lookups):
+                missing = store.missing_note_ids(listing)
+            missing_elapsed = (time.perf_counter() - start) / lookups
+            assert missing == listing[notes_per_user:]
+
+            start = time.perf_counter()
+            for i in range(lookups):
+                stored = store.stored_note_ids(f'user{i % users:06d}')
+            indexed = (time.perf_counter() - start) / lookups
+            assert len(stored) == notes_per_user
+            assert store.latest_upload_time('user000007') == 1700000000000 + (notes_per_user - 1) * 3600000
+
+        db = sqlite3.connect(path)
+        plan = db.execute('EXPLAIN QUERY PLAN SELECT note_id FROM notes WHERE user_id = ?', ('user000001',)).fetchall()
+        start = time.perf_counter()
+        for i in range(20):
+            db.execute('SELECT note_id FROM notes NOT INDEXED WHERE user_id = ?', (f'user{i:06d}',)).fetchall()
+        scan = (time.perf_counter() - start) / 20
+        db.close()
+        print(f'用户的120篇笔记中哪些没保存 {missing_elapsed * 1000:7.3f} ms')
+        print(f'用户已保存的笔记  索引 {indexed * 1000:7.3f} ms  全表扫描 {scan * 1000:7.3f} ms  ({plan[0][-1]})')
+        assert 'INDEX notes_user_time' in plan[0][-1] and indexed * 20 < scan
+
+
+if __name__ == '__main__':
+    main()
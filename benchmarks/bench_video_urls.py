@@ -0,0 +1,77 @@
+# encoding: utf-8
+"""
+    get_video_urls 不同并发数下的耗时对比
+    替身接口中有一条视频笔记的详情始终失败 用来确认失败只影响该条笔记
+    python -m benchmarks.bench_video_urls
+"""
+import asyncio
+import json
+import time
+
+from aiohttp import web
+
+from apis.pc_apis import XhsApi
+from benchmarks.stub_server import start_stub_server, delayed, ok_response
+
+COOKIES = 'a1=1956beb135e5lv46l69faxnx5tbuna61jz5pwoev850000427689; web_session=bench'
+USER_URL = 'https://www.xiaohongshu.com/user/profile/bench?xsec_token=bench&xsec_source=pc_user'
+FAILED_NOTE = 'n6'
+
+
+def video_detail(note_id: str) -> dict:
+    h265 = {'fps': 30, 'width': 1080, 'height': 1920, 'size': 1024, 'master_url': f'http://cdn/{note_id}.mp4'}
+    note_card = {
+        'title': note_id,
+        'desc': '',
+        'image_list': [{'url_pre': f'http://cdn/{note_id}.jpg'}],
+        'video': {'media': {'video': {'duration': 10}, 'stream': {'h265': [h265]}}},
+    }
+    return {'items': [{'note_card': note_card}]}
+
+
+def video_handler(total_notes: int = 200, page_size: int = 30):
+    """
+        用户主页每页page_size条笔记 每4条里有3条视频笔记
+    """
+    async def handler(request: web.Request) -> web.Response:
+        if request.path.endswith('/user_posted'):
+            cursor = int(request.query.get('cursor') or 0)
+            notes = [{'note_id': f'n{i}', 'xsec_token': 'bench', 'type': 'normal' if i % 4 == 3 else 'video'}
+                     for i in range(cursor, min(cursor + page_size, total_notes))]
+            next_cursor = cursor + page_size
+            return ok_response({'notes': notes, 'cursor': str(next_cursor), 'has_more': next_cursor < total_notes})
+        note_id = (await request.json())['source_note_id']
+        if note_id == FAILED_NOTE:
+            body = {"success": False, "msg": "替身接口拒绝", "code": -1, "data": {}}
+            return web.Response(text=json.dumps(body, ensure_ascii=False), content_type='application/json')
+        return ok_response(video_detail(note_id))
+    return handler
+
+
+async def run(base_url: str, concurrency: int):
+    async with XhsApi(cookies=COOKIES, limit_per_host=max(concurrency, 10)) as xhs_apis:
+        xhs_apis._base_url = base_url
+        start = time.perf_counter()
+        success, msg, video_list = await xhs_apis.get_video_urls(USER_URL, concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+    assert not success and FAILED_NOTE in msg, msg
+    titles = [video['title'] for video in video_list]
+    expected = [f'n{i}' for i in range(200) if i % 4 != 3 and f'n{i}' != FAILED_NOTE]
+    assert titles == expected, '视频信息没有按笔记顺序排列'
+    return elapsed
+
+
+async def main(latency: float = 0.02):
+    runner, base_url = await start_stub_server(delayed(video_handler(), latency))
+    try:
+        base = None
+        for concurrency in (1, 4, 16):
+            elapsed = await run(base_url, concurrency)
+            base = base or elapsed
+            print(f'concurrency={concurrency:<3} {elapsed * 1000:8.1f} ms  x{base / elapsed:.1f}')
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
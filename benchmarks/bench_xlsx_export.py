@@ -0,0 +1,116 @@
+# encoding: utf-8
+"""
+    xlsx导出 原来的整本内存写入 和 XlsxExporter 流式写入的耗时和峰值内存
+    每次导出在单独的子进程中运行 峰值内存取子进程的 ru_maxrss
+    105万行的评论导出超过excel上限 确认自动拆分到新的sheet 用较小的上限确认拆分到新的文件
+    python -m benchmarks.bench_xlsx_export
+"""
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+import openpyxl
+
+from xhs_utils.xlsx_exporter import XLSX_HEADERS, XlsxExporter
+
+
+def comment_records(count: int):
+    for i in range(count):
+        yield {
+            'note_id': f'66f0c1a2000000001e0{i % 1000:05d}', 'note_url': f'https://www.xiaohongshu.com/explore/{i % 1000}',
+            'comment_id': f'66f1{i:020d}', 'user_id': f'5f00{i % 5000:020d}',
+            'home_url': f'https://www.xiaohongshu.com/user/profile/{i % 5000}', 'nickname': f'用户{i % 5000}',
+            'avatar': 'https://sns-avatar-qc.xhscdn.com/avatar/1040g2jo31abc', 'content': f'评论内容\x07{i} 好看!',
+            'show_tags': [], 'like_count': str(i % 97), 'upload_time': '2024-10-18 12:00:00', 'ip_location': '上海',
+            'pictures': [],
+        }
+
+
+def legacy_save_to_xlsx(datas, file_path, type='note'):
+    """
+        改动前的 data_util.save_to_xlsx
+    """
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(XLSX_HEADERS.get(type, XLSX_HEADERS['comment']))
+    for data in datas:
+        ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
+        data = {k: ILLEGAL_CHARACTERS_RE.sub(r'', str(v)) for k, v in data.items()}
+        ws.append(list(data.values()))
+    wb.save(file_path)
+
+
+def run(mode: str, rows: int, file_path: str) -> dict:
+    start = time.perf_counter()
+    files = [file_path]
+    if mode == 'legacy':
+        legacy_save_to_xlsx(comment_records(rows), file_path, 'comment')
+    else:
+        with XlsxExporter(file_path, type='comment', rollover=mode) as exporter:
+            exporter.write_rows(comment_records(rows))
+        files = exporter.files
+    elapsed = time.perf_counter() - start
+    return {'elapsed': elapsed, 'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            'files': files}
+
+
+def run_in_subprocess(mode: str, rows: int, file_path: str) -> dict:
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.bench_xlsx_export', mode, str(rows), file_path],
+                            check=True, capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    print(f'{mode:<7} {rows:>9} 行  {result["elapsed"]:7.1f} s  {rows / result["elapsed"]:8.0f} 行/s  '
+          f'峰值内存 {result["max_rss_mb"]:7.1f} MB  文件 {len(result["files"])}')
+    return result
+
+
+def sheet_rows(file_path: str) -> list:
+    """
+        每个sheet的行数 write_only模式不写入dimension 直接读sheet的xml找最后一行的行号
+    """
+    rows = []
+    with zipfile.ZipFile(file_path) as archive:
+        names = sorted(name for name in archive.namelist() if re.match(r'xl/worksheets/sheet\d+\.xml$', name))
+        for name in names:
+            with archive.open(name) as f:
+                f.seek(max(archive.getinfo(name).file_size - 64 * 1024, 0))
+                rows.append(int(re.findall(rb'<row r="(\d+)"', f.read())[-1]))
+    return rows
+
+
+def main(small: int = 50000, large: int = 1050000):
+    with tempfile.TemporaryDirectory() as directory:
+        legacy = run_in_subprocess('legacy', small, os.path.join(directory, 'legacy.xlsx'))
+        stream = run_in_subprocess('sheet', small, os.path.join(directory, 'small.xlsx'))
+        assert stream['max_rss_mb'] < legacy['max_rss_mb']
+
+        result = run_in_subprocess('sheet', large, os.path.join(directory, 'sheets.xlsx'))
+        rows = sheet_rows(result['files'][0])
+        print(f'  rollover=sheet 每个sheet的行数(含表头) {rows}')
+        assert rows == [1048576, large - 1048575 + 1]
+        # 行数增加到21倍 峰值内存基本不变
+        assert result['max_rss_mb'] < stream['max_rss_mb'] * 1.5
+
+        # rollover=file 的拆分逻辑和行数上限无关 用较小的上限验证
+        with XlsxExporter(os.path.join(directory, 'files.xlsx'), type='comment', rollover='file',
+                          max_rows=1000) as exporter:
+            exporter.write_rows(comment_records(2500))
+        rows = [sheet_rows(file_path) for file_path in exporter.files]
+        print(f'  rollover=file max_rows=1000  {[os.path.basename(file_path) for file_path in exporter.files]} 行数 {rows}')
+        assert rows == [[1000], [1000], [503]]
+        workbook = openpyxl.load_workbook(exporter.files[1], read_only=True)
+        first = next(workbook.active.iter_rows(min_row=2, max_row=2, values_only=True))
+        workbook.close()
+        assert first[7] == '评论内容999 好看!'
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        print(json.dumps(run(sys.argv[1], int(sys.argv[2]), sys.argv[3])))
+    else:
+        main()
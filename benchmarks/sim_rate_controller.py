@@ -0,0 +1,105 @@
+# encoding: utf-8
+"""
+    RateController 在会限流的替身接口上的模拟
+    搜索接口同时处理超过capacity个请求时直接返回 访问频次异常 评论接口不限流
+    对比不限速和使用AIMD控制器时被限流的比例 以及两个接口各自的并发上限变化
+    请求在拿到并发名额后才签名 替身接口记录请求到达时x-t的年龄 排队等待名额不会让x-t过期
+    python -m benchmarks.sim_rate_controller
+"""
+import asyncio
+import json
+import time
+
+from aiohttp import web
+
+from apis.pc_apis import XhsApi, ApiType, get_url_by_api_type
+from apis.rate_controller import RateController
+from benchmarks.stub_server import start_stub_server, ok_response
+
+COOKIES = 'a1=1956beb135e5lv46l69faxnx5tbuna61jz5pwoev850000427689; web_session=bench'
+THROTTLED_API = get_url_by_api_type(ApiType.GET_SEARCH_NOTE)
+FREE_API = get_url_by_api_type(ApiType.GET_NOTE_COMMENT)
+
+
+def throttling_handler(capacity: int = 8, latency: float = 0.02, overload_latency: float = 0.02, ages: list = None):
+    in_flight = {'count': 0}
+
+    async def handler(request: web.Request) -> web.Response:
+        if ages is not None:
+            ages.append(time.time() * 1000 - int(request.headers['x-t']))
+        if request.path != THROTTLED_API:
+            await asyncio.sleep(latency)
+            return ok_response({'items': []})
+        in_flight['count'] += 1
+        try:
+            if in_flight['count'] > capacity:
+                await asyncio.sleep(overload_latency)
+                body = {"success": False, "msg": "访问频次异常，请勿频繁操作或重启试试", "code": 300013, "data": {}}
+                return web.Response(text=json.dumps(body, ensure_ascii=False), content_type='application/json')
+            await asyncio.sleep(latency)
+            return ok_response({'items': []})
+        finally:
+            in_flight['count'] -= 1
+    return handler
+
+
+async def run(base_url: str, controller, total: int, workers: int):
+    async with XhsApi(cookies=COOKIES, limit_per_host=workers * 2, rate_controller=controller,
+                      single_flight=False) as xhs_apis:
+        xhs_apis._base_url = base_url
+        results = {THROTTLED_API: [], FREE_API: []}
+        trace = []
+
+        async def worker(api: str, count: int):
+            for _ in range(count):
+                success, msg, _ = await xhs_apis.get(api)
+                results[api].append(success)
+
+        async def sample():
+            while True:
+                trace.append(controller.limits() if controller else {})
+                await asyncio.sleep(0.1)
+
+        sampler = asyncio.create_task(sample())
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(api, total // workers) for api in (THROTTLED_API, FREE_API) for _ in range(workers)])
+        elapsed = time.perf_counter() - start
+        sampler.cancel()
+    throttled = results[THROTTLED_API].count(False) / len(results[THROTTLED_API])
+    return elapsed, throttled, trace
+
+
+async def main(total: int = 1200, workers: int = 48, capacity: int = 8):
+    ages = []
+    runner, base_url = await start_stub_server(throttling_handler(capacity, ages=ages))
+    try:
+        elapsed, throttled, _ = await run(base_url, None, total, workers)
+        print(f'不限速       {elapsed:6.2f} s  搜索接口被限流 {throttled:6.1%}')
+
+        ages.clear()
+        controller = RateController()
+        elapsed, throttled, trace = await run(base_url, controller, total, workers)
+        ages.sort()
+        print(f'AIMD控制器   {elapsed:6.2f} s  搜索接口被限流 {throttled:6.1%}  '
+              f'请求到达时x-t的年龄 p50 {ages[len(ages) // 2]:.0f} ms  p99 {ages[len(ages) * 99 // 100]:.0f} ms  '
+              f'平均每个请求 {elapsed * 1000 * workers * 2 / len(ages):.0f} ms')
+        search = [limits.get(ApiType.GET_SEARCH_NOTE.name, 0) for limits in trace]
+        comment = [limits.get(ApiType.GET_NOTE_COMMENT.name, 0) for limits in trace]
+        print('搜索接口并发上限', search)
+        print('评论接口并发上限', comment)
+        for name, stats in controller.stats().items():
+            print(name, stats)
+
+        # 限流的接口最终稳定在容量附近 不限流的接口不受影响 被限流的比例明显下降
+        settled = search[len(search) // 2:]
+        assert max(settled) <= capacity * 2 and min(settled) >= 1, settled
+        assert max(comment) > capacity, comment
+        assert throttled < 0.1, throttled
+        # 先签名再排队时 p99在1.8秒左右
+        assert ages[len(ages) * 99 // 100] < 200, ages[-10:]
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,40 @@
+# encoding: utf-8
+"""
+    并发签名压力测试 检查每个请求拿到的都是自己的 x-s/x-t
+    python -m benchmarks.stress_signing
+"""
+import asyncio
+import hashlib
+
+from encrypt import generate_params, cookies_to_dict
+from encrypt.xs_encrypt import XsEncrypt
+
+COOKIES = 'a1=1956beb135e5lv46l69faxnx5tbuna61jz5pwoev850000427689; web_session=stress'
+
+
+async def sign(index: int):
+    api = f'/api/sns/web/v1/user/otherinfo?target_user_id={index}'
+    _headers, _cookies, _data = await generate_params(api, data=None, cookies=COOKIES)
+    return api, _headers
+
+
+async def main(total: int = 5000):
+    a1 = cookies_to_dict(COOKIES)['a1']
+    results = await asyncio.gather(*[sign(i) for i in range(total)])
+    assert len({id(h) for _, h in results}) == total, '请求头对象被多个请求共享'
+    for api, _headers in results:
+        # x-s 由 url + a1 + x-t 确定 不一致说明签名被其它请求覆盖
+        expect = await XsEncrypt.encrypt_xs(url=api, a1=a1, ts=_headers['x-t'], platform='xhs-pc-web')
+        assert _headers['x-s'] == expect, f'{api} 的 x-s 与 x-t 不匹配'
+        assert _headers['x-xray-traceid'] == hashlib.md5(_headers['x-b3-traceid'].encode('utf-8')).hexdigest()
+        try:
+            _headers['x-s'] = ''
+        except TypeError:
+            pass
+        else:
+            raise AssertionError('请求头应为只读')
+    print(f'{total} 个并发签名全部独立且正确')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+# encoding: utf-8
+import asyncio
+import json
+
+from aiohttp import web
+
+
+def ok_response(data: dict = None) -> web.Response:
+    body = {"success": True, "msg": "成功", "code": 0, "data": data if data is not None else {}}
+    return web.Response(text=json.dumps(body, ensure_ascii=False), content_type='application/json')
+
+
+async def default_handler(request: web.Request) -> web.Response:
+    return ok_response()
+
+
+async def start_stub_server(handler=default_handler, host: str = '127.0.0.1', port: int = 0,
+                            handler_cancellation: bool = False):
+    """
+        启动一个本地的小红书接口替身 所有路径都交给handler处理
+        :param handler: aiohttp的请求处理函数
+        :param host: 监听地址
+        :param port: 监听端口 0表示随机端口
+        :param handler_cancellation: 客户端断开时取消handler 用来确认客户端真的放弃了请求
+        返回 (runner, base_url) 用完后调用 runner.cleanup()
+    """
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', handler)
+    runner = web.AppRunner(app, access_log=None, handler_cancellation=handler_cancellation)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://{host}:{port}'
+
+
+def delayed(handler, delay: float):
+    """
+        给handler加上固定的网络延迟
+    """
+    async def _handler(request):
+        await asyncio.sleep(delay)
+        return await handler(request)
+    return _handler
+
+
+def search_handler(total_pages: int = 50):
+    """
+        模拟按页码翻页的搜索接口 笔记每页20条 用户每页15条 最后一页 has_more 为 false
+    """
+    async def _handler(request: web.Request) -> web.Response:
+        body = await request.json()
+        if 'search_user_request' in body:
+            page, size, key = body['search_user_request']['page'], 15, 'users'
+        else:
+            page, size, key = body['page'], 20, 'items'
+        items = [{'id': f'{page}-{i}', 'page': page} for i in range(size)]
+        return ok_response({key: items, 'has_more': page < total_pages})
+    return _handler
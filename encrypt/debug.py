@@ -0,0 +1,14 @@
+import os
+
+# 设置环境变量 XHS_SIGN_DEBUG=1 后 签名函数会使用typeguard做运行时类型检查
+SIGN_DEBUG = os.getenv('XHS_SIGN_DEBUG', '').lower() not in ('', '0', 'false')
+
+
+def debug_typechecked(func):
+    """
+    调试模式下等价于 typeguard.typechecked 否则原样返回 不产生额外开销
+    """
+    if not SIGN_DEBUG:
+        return func
+    from typeguard import typechecked
+    return typechecked(func)
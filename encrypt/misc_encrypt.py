@@ -11,12 +11,16 @@ from encrypt.params import lookup
 
 class CustomFieldDecrypt:
     @staticmethod
-    async def random_str(length: Integral) -> str:
+    def random_str_sync(length: Integral) -> str:
         alphabet = string.ascii_letters + string.digits
         return ''.join(random.choice(alphabet) for _ in range(length))
 
     @staticmethod
-    async def base36encode(number: Integral, alphabet: Iterable[str] = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ') -> str:
+    async def random_str(length: Integral) -> str:
+        return CustomFieldDecrypt.random_str_sync(length)
+
+    @staticmethod
+    def base36encode_sync(number: Integral, alphabet: Iterable[str] = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ') -> str:
         """
         将数字转换为base36编码
         Args:
@@ -37,7 +41,11 @@ class CustomFieldDecrypt:
         return sign + (base36 or alphabet[0])
 
     @staticmethod
-    async def b64Encode(e: str) -> str:
+    async def base36encode(number: Integral, alphabet: Iterable[str] = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ') -> str:
+        return CustomFieldDecrypt.base36encode_sync(number, alphabet)
+
+    @staticmethod
+    def b64Encode_sync(e: str) -> str:
         P = len(e)
         W = P % 3
         U = []
@@ -45,7 +53,7 @@ class CustomFieldDecrypt:
         H = 0
         Z = P - W
         while H < Z:
-            U.append(await CustomFieldDecrypt.encodeChunk(e, H, Z if H + z > Z else H + z))
+            U.append(CustomFieldDecrypt.encodeChunk_sync(e, H, Z if H + z > Z else H + z))
             H += z
         if 1 == W:
             F = e[P - 1]
@@ -55,7 +63,12 @@ class CustomFieldDecrypt:
             U.append(lookup[F >> 10] + lookup[63 & (F >> 4)] + lookup[(F << 2) & 63] + "=")
         return "".join(U)
 
-    async def encodeChunk(e, t, r):
+    @staticmethod
+    async def b64Encode(e: str) -> str:
+        return CustomFieldDecrypt.b64Encode_sync(e)
+
+    @staticmethod
+    def encodeChunk_sync(e, t, r):
         m = []
         for b in range(t, r, 3):
             n = (16711680 & (e[b] << 16)) + \
@@ -63,6 +76,9 @@ class CustomFieldDecrypt:
             m.append(CustomFieldDecrypt.tripletToBase64(n))
         return ''.join(m)
 
+    async def encodeChunk(e, t, r):
+        return CustomFieldDecrypt.encodeChunk_sync(e, t, r)
+
     @staticmethod
     def tripletToBase64(e):
         return (
@@ -72,20 +88,24 @@ class CustomFieldDecrypt:
 
 class CookieFieldEncrypt():
     @classmethod
-    async def get_a1_and_web_id(cls) -> tuple:
+    def get_a1_and_web_id_sync(cls) -> tuple:
         """
         生成 a1 和 webid
         Returns:
             tuple(a1, webid)
         """
-        d = hex(int(time.time() * 1000))[2:] + await CustomFieldDecrypt.random_str(30) + "5" + "0" + "000"
+        d = hex(int(time.time() * 1000))[2:] + CustomFieldDecrypt.random_str_sync(30) + "5" + "0" + "000"
         g = (d + str(binascii.crc32(str(d).encode('utf-8'))))[:52]
         return g, hashlib.md5(g.encode('utf-8')).hexdigest()
 
+    @classmethod
+    async def get_a1_and_web_id(cls) -> tuple:
+        return cls.get_a1_and_web_id_sync()
+
 
 class MiscEncrypt(CookieFieldEncrypt):
     @staticmethod
-    async def x_b3_traceid() -> str:
+    def x_b3_traceid_sync() -> str:
         """
         生成 x_b3_traceid
         Returns:
@@ -96,11 +116,23 @@ class MiscEncrypt(CookieFieldEncrypt):
         return trace_id
 
     @staticmethod
-    async def search_id():
+    async def x_b3_traceid() -> str:
+        return MiscEncrypt.x_b3_traceid_sync()
+
+    @staticmethod
+    def search_id_sync():
         e = int(time.time() * 1000) << 64
         t = int(random.uniform(0, 2147483646))
-        return await CustomFieldDecrypt.base36encode((e + t))
+        return CustomFieldDecrypt.base36encode_sync((e + t))
+
+    @staticmethod
+    async def search_id():
+        return MiscEncrypt.search_id_sync()
+
+    @staticmethod
+    def x_xray_traceid_sync(x_b3: str) -> str:
+        return hashlib.md5(x_b3.encode('utf-8')).hexdigest()
 
     @staticmethod
     async def x_xray_traceid(x_b3: str) -> str:
-        return hashlib.md5(x_b3.encode('utf-8')).hexdigest()
\ No newline at end of file
+        return MiscEncrypt.x_xray_traceid_sync(x_b3)
\ No newline at end of file
@@ -0,0 +1,88 @@
+import asyncio
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from types import MappingProxyType
+
+from encrypt.signing_context import get_signing_context
+
+
+def _sign_batch(cookies: str, batch: list) -> list:
+    """
+    在线程或子进程中批量签名 每个进程只创建一次SigningContext
+    返回普通dict 方便跨进程传输
+    """
+    context = get_signing_context(cookies)
+    result = []
+    for url, data in batch:
+        _headers, _cookies, _data = context.sign_sync(url, data)
+        result.append((dict(_headers), _data))
+    return result
+
+
+def spare_cpus() -> int:
+    """
+    除去事件循环所在核心后剩余的cpu核数
+    """
+    return max((os.cpu_count() or 1) - 1, 0)
+
+
+class SignerPool:
+    """
+    独立的签名线程池/进程池 签名计算不占用事件循环
+    池的大小和网络连接数互相独立
+    只有多于一个cpu核心时才能提高签名吞吐 单核时签名和事件循环抢同一个核心 反而比直接签名慢
+    """
+
+    def __init__(self, cookies: str, max_workers: int = None, use_process: bool = True):
+        """
+        Args:
+            cookies: 账号的cookies字符串
+            max_workers: 签名worker数量 默认为cpu核数减一 进程池最多使用cpu核数减一个进程
+            use_process: True使用进程池 False使用线程池 单核机器上总是使用线程池
+        """
+        self._cookies = cookies
+        self._context = get_signing_context(cookies)
+        spare = spare_cpus()
+        self.use_process = use_process and spare > 0
+        self.max_workers = max_workers or spare or 1
+        if self.use_process:
+            self.max_workers = min(self.max_workers, spare)
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=get_signing_context,
+                                                 initargs=(cookies,))
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='xhs-signer')
+
+    def _wrap(self, signed: list, cookies: str) -> list:
+        context = self._context if cookies == self._cookies else get_signing_context(cookies)
+        return [(MappingProxyType(_headers), context.cookies, _data) for _headers, _data in signed]
+
+    async def sign(self, url: str, data: dict = None, cookies: str = None):
+        """
+        签名单个请求 返回值和 SigningContext.sign_sync 相同
+        """
+        return (await self.sign_many([(url, data)], cookies))[0]
+
+    async def sign_many(self, requests: list, cookies: str = None) -> list:
+        """
+        批量签名 按worker数量切分后并行计算
+        Args:
+            requests: [(url, data), ...] get请求的data为None
+            cookies: 使用其它账号签名时传入该账号的cookies 默认为创建池时的账号
+        Returns:
+            [(只读请求头, cookies, 序列化后的data), ...] 顺序和requests一致
+        """
+        if not requests:
+            return []
+        cookies = cookies or self._cookies
+        loop = asyncio.get_running_loop()
+        size = math.ceil(len(requests) / self.max_workers)
+        futures = [loop.run_in_executor(self._executor, _sign_batch, cookies, requests[i:i + size])
+                   for i in range(0, len(requests), size)]
+        signed = []
+        for batch in await asyncio.gather(*futures):
+            signed.extend(batch)
+        return self._wrap(signed, cookies)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,147 @@
+import base64
+import json
+import time
+import urllib.parse
+from functools import lru_cache
+from types import MappingProxyType
+
+from encrypt.params import headers, browser_fingerprint
+from encrypt.misc_encrypt import MiscEncrypt
+from encrypt.xs_encrypt import XsEncrypt
+from encrypt.xsc_encrypt import XscEncrypt, MrcSuffix
+
+
+# 每次请求都会变化的请求头 其余的请求头只在导入时复制一次
+_dynamic_header_keys = ('x-s', 'x-t', 'x-s-common', 'x-b3-traceid', 'x-xray-traceid')
+_base_headers = {k: v for k, v in headers.items() if k not in _dynamic_header_keys}
+
+
+def cookies_to_dict(cookies: str) -> dict:
+    if '; ' in cookies:
+        ck = {i.split('=')[0]: '='.join(i.split('=')[1:]) for i in cookies.split('; ')}
+    else:
+        ck = {i.split('=')[0]: '='.join(i.split('=')[1:]) for i in cookies.split(';')}
+    return ck
+
+
+class SigningContext:
+    """
+    单个账号的签名上下文
+    cookies解析、a1、x-s明文、x-s-common json中不随请求变化的部分和指纹的mrc在创建时计算一次
+    每次请求只计算和url、时间戳相关的部分
+    """
+
+    def __init__(self, cookies: str, platform: str = 'xhs-pc-web', x1: str = '3.8.7', x4: str = '4.45.1',
+                 b1: str = browser_fingerprint):
+        """
+        Args:
+            cookies: 账号的cookies字符串
+            platform: 登录平台
+            x1: xsc版本
+            x4: 内部版本
+            b1: 浏览器指纹
+        """
+        ck = cookies_to_dict(cookies)
+        if 'a1' not in ck:
+            raise Exception("cookies中缺少a1")
+        self.cookies = MappingProxyType(ck)
+        self.a1 = ck['a1']
+        self.platform = platform
+        self.b1 = b1
+        # 浏览器指纹对x9(mrc)的贡献只算一次
+        self._mrc_suffix = MrcSuffix(b1)
+
+        # x-s 明文 x1=md5(url) 之后的固定部分
+        self._xs_text_suffix = f';x2=0|0|0|1|0|0|1|0|0|0|1|0|0|0|0|1|0|0|0;x3={self.a1};x4='
+        # x-s payload json 中 payload 之前的固定部分
+        self._xs_payload_prefix = ('{"signSvn":"56","signType":"x2","appID":'
+                                   + json.dumps(platform) + ',"signVersion":"1","payload":"')
+
+        # x-s-common json 的固定片段 按字符做url编码后的结果可以直接拼接
+        # x6(xt) x7(xs) x9(crc) 只含数字和base64字符 不需要json转义
+        # 编码结果和片段的起始位置模3有关 每个固定片段预先算好三种对齐方式
+        dumps = lambda obj: json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+        quote = urllib.parse.quote
+        static_head = dumps({
+            "s0": 5,
+            "s1": "",
+            "x0": "1",
+            "x1": x1,
+            "x2": "Windows",
+            "x3": platform,
+            "x4": x4,
+            "x5": self.a1,
+        })
+        quoted_head = quote(static_head[:-1] + ',"x6":"')
+        self._xsc_head = XscEncrypt.quoted_to_bytes(quoted_head)
+        self._xsc_head_len = len(quoted_head)
+        self._xsc_x7, self._xsc_x7_len = self._aligned(quote('","x7":"'))
+        self._xsc_x8, self._xsc_x8_len = self._aligned(quote('","x8":' + dumps(b1) + ',"x9":"'))
+        self._xsc_tail, _ = self._aligned(quote('","x10":24}'))
+
+    @staticmethod
+    def _aligned(quoted: str) -> (tuple, int):
+        """
+        计算已url编码的固定片段在三种起始位置下的编码结果
+        """
+        return tuple(XscEncrypt.quoted_to_bytes(quoted, offset) for offset in range(3)), len(quoted)
+
+    def encrypt_xs_sync(self, url: str, ts: str) -> str:
+        """
+        生成x-s 等价于 XsEncrypt.encrypt_xs_sync(url, a1, ts, platform)
+        """
+        text = f'x1={XsEncrypt.encrypt_md5_sync(url="url=" + url)}{self._xs_text_suffix}{ts};'
+        payload = self._xs_payload_prefix + XsEncrypt.aes_encrypt(text).hex() + '"}'
+        return 'XYW_' + base64.b64encode(payload.encode()).decode()
+
+    def encrypt_xsc_sync(self, xs: str, xt: str) -> str:
+        """
+        生成x-s-common 等价于 XscEncrypt.encrypt_xsc_sync(...) 之后再 XscEncrypt.b64_encode_sync
+        """
+        x9 = str(self._mrc_suffix.mrc(xt + xs))
+        quoted_xs = urllib.parse.quote(xs)
+        # pos 是当前片段在整个url编码字符串中的起始位置
+        pos = self._xsc_head_len + len(xt)
+        x7 = self._xsc_x7[pos % 3]
+        pos += self._xsc_x7_len
+        x7_value = XscEncrypt.quoted_to_bytes(quoted_xs, pos)
+        pos += len(quoted_xs)
+        x8 = self._xsc_x8[pos % 3]
+        pos += self._xsc_x8_len + len(x9)
+        tail = self._xsc_tail[pos % 3]
+        encoded = b''.join((self._xsc_head, xt.encode('ascii'), x7, x7_value, x8, x9.encode('ascii'), tail))
+        return XscEncrypt.b64_encode_bytes(encoded)
+
+    def sign_sync(self, url: str, data: dict = None):
+        """
+        生成单个请求的签名 纯计算 可以在线程或进程中调用
+        Args:
+            url: API的url
+            data: post请求的参数
+        Returns:
+            (只读请求头, cookies, 序列化后的data)
+        """
+        x_t = str(int(time.time() * 1_000))
+        x_b3_traceid = MiscEncrypt.x_b3_traceid_sync()
+        x_ray_traceid = MiscEncrypt.x_xray_traceid_sync(x_b3_traceid)
+        x_s = self.encrypt_xs_sync(url, x_t)
+        x_s_c = self.encrypt_xsc_sync(x_s, x_t)
+
+        # 每个请求独立的只读请求头 并发签名时互不覆盖
+        _headers = dict(_base_headers)
+        _headers['x-s'] = x_s
+        _headers['x-t'] = x_t
+        _headers['x-s-common'] = x_s_c
+        _headers['x-b3-traceid'] = x_b3_traceid
+        _headers['x-xray-traceid'] = x_ray_traceid
+        if data:
+            data = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+        return MappingProxyType(_headers), self.cookies, data
+
+    async def sign(self, url: str, data: dict = None):
+        return self.sign_sync(url, data)
+
+
+@lru_cache(maxsize=64)
+def get_signing_context(cookies: str) -> SigningContext:
+    return SigningContext(cookies)
@@ -6,9 +6,9 @@ import struct
 
 import Crypto.Cipher.AES as AES
 from Crypto.Util.Padding import pad
-from typeguard import typechecked
 
 from encrypt import xn, xn64
+from encrypt.debug import debug_typechecked
 
 
 class XsEncrypt:
@@ -17,7 +17,7 @@ class XsEncrypt:
     iv = b'4uzjr7mbsibcaldp'
 
     @staticmethod
-    async def encrypt_md5(url: str) -> str:
+    def encrypt_md5_sync(url: str) -> str:
         """
         根据传入的url和params生成MD5摘要
 
@@ -30,7 +30,11 @@ class XsEncrypt:
         return md5_hash
 
     @staticmethod
-    async def encrypt_text(text: str) -> str:
+    async def encrypt_md5(url: str) -> str:
+        return XsEncrypt.encrypt_md5_sync(url)
+
+    @staticmethod
+    def encrypt_text_sync(text: str) -> str:
         """
         根据传入的text生成AES加密后的内容，并将其转为base64编码
 
@@ -39,16 +43,31 @@ class XsEncrypt:
         Returns:
             加密后的base64编码字符串
         """
-        text_encoded = base64.b64encode(text.encode())
-
-        cipher = AES.new(XsEncrypt.key_bytes, AES.MODE_CBC, XsEncrypt.iv)
-        ciphertext = cipher.encrypt(pad(text_encoded, AES.block_size))
-        ciphertext_base64 = base64.b64encode(ciphertext).decode()
+        ciphertext_base64 = base64.b64encode(XsEncrypt.aes_encrypt(text)).decode()
 
         return ciphertext_base64
 
     @staticmethod
-    async def base64_to_hex(encoded_data):
+    async def encrypt_text(text: str) -> str:
+        return XsEncrypt.encrypt_text_sync(text)
+
+    @staticmethod
+    def aes_encrypt(text: str) -> bytes:
+        """
+        将text做base64编码后使用固定的key和iv进行AES-CBC加密
+
+        Args:
+            text: 需要加密的字符串
+        Returns:
+            加密后的原始字节
+        """
+        text_encoded = base64.b64encode(text.encode())
+        # CBC模式的cipher对象带有链式状态 不能跨请求复用
+        cipher = AES.new(XsEncrypt.key_bytes, AES.MODE_CBC, XsEncrypt.iv)
+        return cipher.encrypt(pad(text_encoded, AES.block_size))
+
+    @staticmethod
+    def base64_to_hex_sync(encoded_data):
         """
         把加密后的payload转为16进制
 
@@ -62,8 +81,12 @@ class XsEncrypt:
         return hex_string
 
     @staticmethod
-    @typechecked
-    async def encrypt_payload(payload: str, platform: str) -> str:
+    async def base64_to_hex(encoded_data):
+        return XsEncrypt.base64_to_hex_sync(encoded_data)
+
+    @staticmethod
+    @debug_typechecked
+    def encrypt_payload_sync(payload: str, platform: str) -> str:
         """
         把小红书加密参数payload转16进制 再使用base64编码
 
@@ -78,13 +101,17 @@ class XsEncrypt:
             "signType": "x2",
             "appID": platform,
             "signVersion": "1",
-            "payload": await XsEncrypt.base64_to_hex(payload)
+            "payload": XsEncrypt.base64_to_hex_sync(payload)
         }
         return base64.b64encode(json.dumps(obj, separators=(',', ':')).encode()).decode()
 
     @staticmethod
-    @typechecked
-    async def encrypt_xs(url: str, a1: str, ts: str, platform: str = 'xhs-pc-web') -> str:
+    async def encrypt_payload(payload: str, platform: str) -> str:
+        return XsEncrypt.encrypt_payload_sync(payload, platform)
+
+    @staticmethod
+    @debug_typechecked
+    def encrypt_xs_sync(url: str, a1: str, ts: str, platform: str = 'xhs-pc-web') -> str:
         """
         将传入的参数加密为小红书的xs
 
@@ -95,15 +122,19 @@ class XsEncrypt:
         Returns:
             最终的加密签名字符串，前缀为“XYW_”
         """
-        text = (f'x1={await XsEncrypt.encrypt_md5(url="url=" + url)};'
+        text = (f'x1={XsEncrypt.encrypt_md5_sync(url="url=" + url)};'
                 f'x2=0|0|0|1|0|0|1|0|0|0|1|0|0|0|0|1|0|0|0;'
                 f'x3={a1};'
                 f'x4={ts};')
-        return 'XYW_' + await XsEncrypt.encrypt_payload(await XsEncrypt.encrypt_text(text), platform=platform)
+        return 'XYW_' + XsEncrypt.encrypt_payload_sync(XsEncrypt.encrypt_text_sync(text), platform=platform)
 
     @staticmethod
-    @typechecked
-    async def encrypt_sign(ts: str, payload: dict) -> str:
+    async def encrypt_xs(url: str, a1: str, ts: str, platform: str = 'xhs-pc-web') -> str:
+        return XsEncrypt.encrypt_xs_sync(url, a1, ts, platform)
+
+    @staticmethod
+    @debug_typechecked
+    def encrypt_sign_sync(ts: str, payload: dict) -> str:
         """
         小红书验证码签名
         Args:
@@ -115,7 +146,7 @@ class XsEncrypt:
         url = f"{ts}test/api/redcaptcha/v2/captcha/register{json.dumps(payload, separators=(',', ':'), ensure_ascii=False)}"
 
         result = ''
-        md5_ascii = [ord(char) for char in await XsEncrypt.encrypt_md5(url)]
+        md5_ascii = [ord(char) for char in XsEncrypt.encrypt_md5_sync(url)]
         chunks = itertools.zip_longest(md5_ascii[::3], md5_ascii[1::3], md5_ascii[2::3], fillvalue=0)
 
         for u, c, s in chunks:
@@ -125,4 +156,8 @@ class XsEncrypt:
             d = s & 63 if s else 64
 
             result += xn[l] + xn[f] + (xn[p] if p < 64 else xn64) + (xn[d] if d < 64 else xn64)
-        return result
\ No newline at end of file
+        return result
+
+    @staticmethod
+    async def encrypt_sign(ts: str, payload: dict) -> str:
+        return XsEncrypt.encrypt_sign_sync(ts, payload)
\ No newline at end of file
@@ -1,8 +1,64 @@
+import base64
 import json
+import re
 import urllib.parse
+import zlib
 
 from encrypt import ie, lookup
 
+# 标准base64字母表到自定义lookup字母表的映射 '='填充保持不变
+_b64_to_lookup = bytes.maketrans(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/',
+                                 ''.join(lookup).encode('ascii'))
+_percent_re = re.compile(rb'%([0-9A-Fa-f]{2})')
+
+
+def _crc_register(state: int, data: bytes) -> int:
+    """
+    从寄存器状态state开始处理data 返回处理后的CRC寄存器(不做最终取反)
+    ie就是标准CRC-32(0xEDB88320)的查表 所以可以直接用zlib计算
+    """
+    return zlib.crc32(data, state ^ 0xFFFFFFFF) ^ 0xFFFFFFFF
+
+
+class MrcSuffix:
+    """
+    预先计算固定后缀(浏览器指纹)对mrc的贡献
+    CRC寄存器的更新是线性的: R(s, suffix) = L(s) ^ R(0, suffix)
+    L是处理len(suffix)个0字节的线性变换 拆成4张按字节查询的表
+    之后 mrc(prefix + suffix) 只需要处理较短的prefix
+    """
+
+    def __init__(self, suffix: str):
+        data = suffix.encode('latin-1')
+        zeros = bytes(len(data))
+        self.suffix = suffix
+        self._suffix_register = _crc_register(0, data)
+        basis = [_crc_register(1 << i, zeros) for i in range(32)]
+        self._tables = []
+        for k in range(4):
+            table = []
+            for b in range(256):
+                v = 0
+                for i in range(8):
+                    if b >> i & 1:
+                        v ^= basis[8 * k + i]
+                table.append(v)
+            self._tables.append(table)
+
+    def mrc(self, prefix: str) -> int:
+        """
+        计算 XscEncrypt.mrc(prefix + suffix) 结果完全一致
+        Args:
+            prefix: 每次请求变化的前缀 xt + xs
+        Returns:
+            32位整数校验值
+        """
+        s = _crc_register(0xFFFFFFFF, prefix.encode('latin-1'))
+        t0, t1, t2, t3 = self._tables
+        o = (t0[s & 255] ^ t1[(s >> 8) & 255] ^ t2[(s >> 16) & 255] ^ t3[s >> 24]
+             ^ self._suffix_register)
+        return ((o ^ 0xFFFFFFFF ^ 3988292384) + 2 ** 31) % 2 ** 32 - 2 ** 31
+
 
 class XscEncrypt:
     """
@@ -10,7 +66,7 @@ class XscEncrypt:
     """
 
     @staticmethod
-    async def encrypt_encode_utf8(text) -> list:
+    def encrypt_encode_utf8_sync(text) -> list:
         """
         对输入的文本进行URL编码 转换百分号编码为十进制ASCII值
         Args:
@@ -18,12 +74,57 @@ class XscEncrypt:
         Returns:
             编码后的整数列表
         """
-        encoded = urllib.parse.quote(text)
+        return XscEncrypt.quoted_to_list_sync(urllib.parse.quote(text))
+
+    @staticmethod
+    async def encrypt_encode_utf8(text) -> list:
+        return XscEncrypt.encrypt_encode_utf8_sync(text)
+
+    @staticmethod
+    def quoted_to_list_sync(encoded: str) -> list:
+        """
+        将已经URL编码的字符串转换为整数列表
+        Args:
+            encoded: urllib.parse.quote 的结果
+        Returns:
+            编码后的整数列表
+        """
         return [int(encoded[i + 1:i + 3], 16) if encoded[i] == '%' else ord(encoded[i])
                 for i in range(len(encoded)) if encoded[i] != '%' or i % 3 == 0]
 
     @staticmethod
-    async def triplet_to_base64(e) -> str:
+    async def quoted_to_list(encoded: str) -> list:
+        return XscEncrypt.quoted_to_list_sync(encoded)
+
+    @staticmethod
+    def quoted_to_bytes(encoded: str, offset: int = 0) -> bytes:
+        """
+        quoted_to_list 的字节版本
+        和原实现保持一致: 所有的'%'都被去掉 后面的两个十六进制字符原样保留
+        位置是3的倍数的'%XX'还会在前面多插入一个还原后的字节
+        Args:
+            encoded: urllib.parse.quote 的结果
+            offset: encoded 在整个编码字符串中的起始位置
+        Returns:
+            编码后的字节
+        """
+        return _percent_re.sub(
+            lambda m: bytes((int(m.group(1), 16),)) + m.group(1) if (m.start() + offset) % 3 == 0 else m.group(1),
+            encoded.encode('ascii'))
+
+    @staticmethod
+    def b64_encode_bytes(e: bytes) -> str:
+        """
+        b64_encode 的字节版本 使用标准base64后再转换为自定义字母表
+        Args:
+            e: 字节
+        Returns:
+            Base64字符串
+        """
+        return base64.b64encode(e).translate(_b64_to_lookup).decode('ascii')
+
+    @staticmethod
+    def triplet_to_base64_sync(e) -> str:
         """
         将24位整数分成4个6位部分 转换为Base64字符串
         Args:
@@ -35,7 +136,11 @@ class XscEncrypt:
                 lookup[(e >> 6) & 63] + lookup[e & 63])
 
     @staticmethod
-    async def encode_chunk(e, t, r) -> str:
+    async def triplet_to_base64(e) -> str:
+        return XscEncrypt.triplet_to_base64_sync(e)
+
+    @staticmethod
+    def encode_chunk_sync(e, t, r) -> str:
         """
         将编码后的整数列表分成3字节一组转换为Base64
         Args:
@@ -48,12 +153,16 @@ class XscEncrypt:
         chunks = []
         for b in range(t, r, 3):
             if b + 2 < len(e):  # 确保有完整的三个字节
-                chunk = await XscEncrypt.triplet_to_base64((e[b] << 16) + (e[b + 1] << 8) + e[b + 2])
+                chunk = XscEncrypt.triplet_to_base64_sync((e[b] << 16) + (e[b + 1] << 8) + e[b + 2])
                 chunks.append(chunk)
         return ''.join(chunks)
 
     @staticmethod
-    async def b64_encode(e) -> str:
+    async def encode_chunk(e, t, r) -> str:
+        return XscEncrypt.encode_chunk_sync(e, t, r)
+
+    @staticmethod
+    def b64_encode_sync(e) -> str:
         """
         将整数列表编码为Base64格式
         Args:
@@ -64,7 +173,7 @@ class XscEncrypt:
         P = len(e)
         W = P % 3
         Z = P - W
-        result = [await XscEncrypt.encode_chunk(e, i, min(i + 16383, Z)) for i in range(0, Z, 16383)]
+        result = [XscEncrypt.encode_chunk_sync(e, i, min(i + 16383, Z)) for i in range(0, Z, 16383)]
 
         if W == 1:
             F = e[-1]
@@ -75,7 +184,11 @@ class XscEncrypt:
         return "".join(result)
 
     @staticmethod
-    async def mrc(e) -> int:
+    async def b64_encode(e) -> str:
+        return XscEncrypt.b64_encode_sync(e)
+
+    @staticmethod
+    def mrc_sync(e) -> int:
         """
         使用自定义CRC算法生成校验值
         Args:
@@ -96,7 +209,11 @@ class XscEncrypt:
         return to_js_int(~o ^ 3988292384)
 
     @staticmethod
-    async def encrypt_xsc(xs: str, xt: str, platform: str, a1: str, x1: str, x4: str, b1: str):
+    async def mrc(e) -> int:
+        return XscEncrypt.mrc_sync(e)
+
+    @staticmethod
+    def encrypt_xsc_sync(xs: str, xt: str, platform: str, a1: str, x1: str, x4: str, b1: str):
         """
         生成xsc
         Args:
@@ -110,7 +227,7 @@ class XscEncrypt:
         Returns:
             xsc
         """
-        x9 = str(await XscEncrypt.mrc(xt + xs + b1))
+        x9 = str(XscEncrypt.mrc_sync(xt + xs + b1))
         st = json.dumps({
             "s0": 5,
             "s1": "",
@@ -127,19 +244,58 @@ class XscEncrypt:
             # "x10": random.randint(10, 29)
             "x10": 24
         }, separators=(",", ":"), ensure_ascii=False)
-        return await XscEncrypt.encrypt_encode_utf8(st)
+        return XscEncrypt.encrypt_encode_utf8_sync(st)
+
+    @staticmethod
+    async def encrypt_xsc(xs: str, xt: str, platform: str, a1: str, x1: str, x4: str, b1: str):
+        return XscEncrypt.encrypt_xsc_sync(xs, xt, platform, a1, x1, x4, b1)
 
 
 if __name__ == '__main__':
     import asyncio
+    import random
+    import string
+    import timeit
 
+    xs = "XYW_eyJzaWduU3ZuIjoiNTYiLCJzaWduVHlwZSI6IngyIiwiYXBwSWQiOiJ4aHMtcGMtd2ViIiwic2lnblZlcnNpb24iOiIxIiwicGF5bG9hZCI6ImMyZmU4Nzc4MmFiY2I2YTYzOTFhOTY0MjAyMGI3ZmFjODQ2YjUyMjZmNDIzMmQ5Mjc5YmI1OTYzNjg5NTBlYzg0MzkyZGU3OTY2Y2JkNWQxMzc3NDgzOWJmZTdhNmRjNzEwNDYzMjgzY2ZlNTc3YTcyYTE5ZDhiZDhkMTY4NTQzMGUxNmEwMDc4ZmNhZWE1MzY1NDY0ZjBkYjhhOThhODQ0MmQ2NTg0ODNlNzA5Y2RhNWZmNTk2ZThkMDQwNDQzMjg1OGEwMWYzMGU5OTE3MDVmYWM2MTM3MDU1MGQ3MTkwYjhkMWJkYjM2NjVmNjJjMzQ4YWI0ZTgwYjE0ZjgxNTRjYjMyZGFiMWJiYTZlNzdjZmJkNjA4MTQ1YmNlODc2NDhkNDllYzM2ZDZlMzU2ZjJlZWY5ODEyYWFlN2EwZmZjZjljOGVkZDkxOWIzODJhYTEwMWE5Y2JjOWMxZDVjNmIyYjY3N2M5YjFiYTVlMDU0ZTQ3YjdiN2RiM2NjZWQyZWJjODY2Y2Y4NmRjYjg5MjFkMzA5OTQxMDI3Y2ZjNGIzIn0="
+    xt = "1732352811091"
+    b1 = "I38rHdgsjopgIvesdVwgIC+oIELmBZ5e3VwXLgFTIxS3bqwErFeexd0ekncAzMFYnqthIhJeSBMDKutRI3KsYorWHPtGrbV0P9WfIi/eWc6eYqtyQApPI37ekmR6QL+5Ii6sdneeSfqYHqwl2qt5B0DBIx+PGDi/sVtkIxdsxuwr4qtiIhuaIE3e3LV0I3VTIC7e0utl2ADmsLveDSKsSPw5IEvsiVtJOqw8BuwfPpdeTFWOIx4TIiu6ZPwrPut5IvlaLbgs3qtxIxes1VwHIkumIkIyejgsY/WTge7eSqte/D7sDcpipedeYrDtIC6eDVw2IENsSqtlnlSuNjVtIx5e1qt3bmAeVn8LIESLIEk8+9DUIvzy4I8OIic7ZPwFIviR4o/sDLds6PwVIC7eSd7sf0k4IEve6WGMtVwUIids3s/sxZNeiVtbcUeeYVwRIvM/z06eSuwvgf7sSqweIxltIxZSouwOgVwpsoTHPW5ef7NekuwcIEosSgoe1LuMIiNeWL0sxdh5IiJsxPw9IhR9JPwJPutWIv3e1Vt1IiNs1qw5IEKsdVtFtuw4sqwFIvhvIxqzGniRKWoexVtUIhW4Ii0edqwpBlb2peJsWU4TIiGb4PtOsqwEIvNexutd+pdeVYdsVDEbIhos3odskqt8pqwQIvNeSPwvIieeT/ubIveeSBveDPtXIx0sVqw64B8qIkWJIvvsxFOekaKsDYeeSqwoIkpgIEpYzPwqIxGSIE7eirqSwnvs0VtZIhpBbut14lNedM0eYPwpmPwZIC+7IiGy/VwttVtaIC5e0pesVPwFJqwBIhW="
     t = asyncio.run(XscEncrypt.encrypt_xsc(
-        xs="XYW_eyJzaWduU3ZuIjoiNTYiLCJzaWduVHlwZSI6IngyIiwiYXBwSWQiOiJ4aHMtcGMtd2ViIiwic2lnblZlcnNpb24iOiIxIiwicGF5bG9hZCI6ImMyZmU4Nzc4MmFiY2I2YTYzOTFhOTY0MjAyMGI3ZmFjODQ2YjUyMjZmNDIzMmQ5Mjc5YmI1OTYzNjg5NTBlYzg0MzkyZGU3OTY2Y2JkNWQxMzc3NDgzOWJmZTdhNmRjNzEwNDYzMjgzY2ZlNTc3YTcyYTE5ZDhiZDhkMTY4NTQzMGUxNmEwMDc4ZmNhZWE1MzY1NDY0ZjBkYjhhOThhODQ0MmQ2NTg0ODNlNzA5Y2RhNWZmNTk2ZThkMDQwNDQzMjg1OGEwMWYzMGU5OTE3MDVmYWM2MTM3MDU1MGQ3MTkwYjhkMWJkYjM2NjVmNjJjMzQ4YWI0ZTgwYjE0ZjgxNTRjYjMyZGFiMWJiYTZlNzdjZmJkNjA4MTQ1YmNlODc2NDhkNDllYzM2ZDZlMzU2ZjJlZWY5ODEyYWFlN2EwZmZjZjljOGVkZDkxOWIzODJhYTEwMWE5Y2JjOWMxZDVjNmIyYjY3N2M5YjFiYTVlMDU0ZTQ3YjdiN2RiM2NjZWQyZWJjODY2Y2Y4NmRjYjg5MjFkMzA5OTQxMDI3Y2ZjNGIzIn0=",
-        xt="1732352811091",
+        xs=xs,
+        xt=xt,
         platform="xhs-pc-web",
         a1="1922f161f3akc5946vixc5zs8ykvvm48u8tt7ele550000297995",
         x1="3.8.7",
         x4="4.44.1",
-        b1="I38rHdgsjopgIvesdVwgIC+oIELmBZ5e3VwXLgFTIxS3bqwErFeexd0ekncAzMFYnqthIhJeSBMDKutRI3KsYorWHPtGrbV0P9WfIi/eWc6eYqtyQApPI37ekmR6QL+5Ii6sdneeSfqYHqwl2qt5B0DBIx+PGDi/sVtkIxdsxuwr4qtiIhuaIE3e3LV0I3VTIC7e0utl2ADmsLveDSKsSPw5IEvsiVtJOqw8BuwfPpdeTFWOIx4TIiu6ZPwrPut5IvlaLbgs3qtxIxes1VwHIkumIkIyejgsY/WTge7eSqte/D7sDcpipedeYrDtIC6eDVw2IENsSqtlnlSuNjVtIx5e1qt3bmAeVn8LIESLIEk8+9DUIvzy4I8OIic7ZPwFIviR4o/sDLds6PwVIC7eSd7sf0k4IEve6WGMtVwUIids3s/sxZNeiVtbcUeeYVwRIvM/z06eSuwvgf7sSqweIxltIxZSouwOgVwpsoTHPW5ef7NekuwcIEosSgoe1LuMIiNeWL0sxdh5IiJsxPw9IhR9JPwJPutWIv3e1Vt1IiNs1qw5IEKsdVtFtuw4sqwFIvhvIxqzGniRKWoexVtUIhW4Ii0edqwpBlb2peJsWU4TIiGb4PtOsqwEIvNexutd+pdeVYdsVDEbIhos3odskqt8pqwQIvNeSPwvIieeT/ubIveeSBveDPtXIx0sVqw64B8qIkWJIvvsxFOekaKsDYeeSqwoIkpgIEpYzPwqIxGSIE7eirqSwnvs0VtZIhpBbut14lNedM0eYPwpmPwZIC+7IiGy/VwttVtaIC5e0pesVPwFJqwBIhW="
+        b1=b1
     ))
-    print(t)
\ No newline at end of file
+    print(t)
+    assert t == XscEncrypt.encrypt_xsc_sync(xs=xs, xt=xt, platform="xhs-pc-web",
+                                         a1="1922f161f3akc5946vixc5zs8ykvvm48u8tt7ele550000297995",
+                                         x1="3.8.7", x4="4.44.1", b1=b1)
+
+    # 字节版编码必须和整数列表版完全一致
+    for _ in range(500):
+        text = ''.join(random.choice(string.printable + '中文€✓') for _ in range(random.randint(0, 300)))
+        encoded = urllib.parse.quote(text)
+        as_list = XscEncrypt.quoted_to_list_sync(encoded)
+        assert list(XscEncrypt.quoted_to_bytes(encoded)) == as_list, text
+        assert XscEncrypt.b64_encode_bytes(bytes(as_list)) == XscEncrypt.b64_encode_sync(as_list), text
+        cut = random.randint(0, len(encoded))
+        while 0 < cut < len(encoded) and '%' in encoded[max(cut - 2, 0):cut]:
+            cut -= 1
+        assert (XscEncrypt.quoted_to_bytes(encoded[:cut]) + XscEncrypt.quoted_to_bytes(encoded[cut:], cut)
+                == bytes(as_list)), text
+    st = urllib.parse.quote(json.dumps({"x7": xs, "x8": b1}, separators=(",", ":")))
+    slow = timeit.timeit(lambda: XscEncrypt.b64_encode_sync(XscEncrypt.quoted_to_list_sync(st)),
+                         number=200) / 200
+    fast = timeit.timeit(lambda: XscEncrypt.b64_encode_bytes(XscEncrypt.quoted_to_bytes(st)), number=2000) / 2000
+    print(f'x-s-common encode: {slow * 1e6:.1f} us -> {fast * 1e6:.2f} us')
+
+    # 预计算指纹后缀的mrc必须和逐字符计算的结果一致
+    suffix = MrcSuffix(b1)
+    expect = XscEncrypt.mrc_sync(xt + xs + b1)
+    assert suffix.mrc(xt + xs) == expect, (suffix.mrc(xt + xs), expect)
+    slow = timeit.timeit(lambda: XscEncrypt.mrc_sync(xt + xs + b1), number=200) / 200
+    fast = timeit.timeit(lambda: suffix.mrc(xt + xs), number=20000) / 20000
+    print(f'mrc {expect}: {slow * 1e6:.1f} us -> {fast * 1e6:.2f} us')
\ No newline at end of file
@@ -0,0 +1,100 @@
+import os
+
+from loguru import logger
+
+from xhs_utils.data_util import RECORD_FIELD_TYPES, typed_record
+
+
+def _pyarrow():
+    """
+        pyarrow是可选依赖 只有用到列式导出时才需要安装
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise Exception('列式导出需要安装pyarrow: pip install pyarrow')
+    return pyarrow
+
+
+def arrow_schema(type: str = 'note'):
+    """
+        RECORD_FIELD_TYPES 对应的arrow schema
+        数量为int64 时间为毫秒时间戳 标签和图片url为字符串列表
+    """
+    pa = _pyarrow()
+    arrow_types = {
+        'string': pa.string(),
+        'count': pa.int64(),
+        'timestamp': pa.timestamp('ms', tz='UTC'),
+        'list': pa.list_(pa.string()),
+    }
+    return pa.schema([(key, arrow_types[kind]) for key, kind in RECORD_FIELD_TYPES[type].items()])
+
+
+class ColumnarExporter:
+    """
+        把 handle_note_info handle_user_info handle_comment_info 的结果按类型写入Parquet或Arrow文件
+        按列缓存 每满row_group_size行写出一个row group 内存只保留一个row group
+        .arrow .feather 结尾时写Arrow IPC文件 其它写Parquet
+        with ColumnarExporter('datas/comments.parquet', type='comment') as exporter:
+            exporter.write_rows(comment_iter)
+        :param file_path: 保存路径
+        :param type: note user comment
+        :param row_group_size: 每个row group的行数
+        :param compression: parquet的压缩算法
+    """
+
+    def __init__(self, file_path: str, type: str = 'note', row_group_size: int = 65536,
+                 compression: str = 'zstd'):
+        pa = _pyarrow()
+        self.file_path = file_path
+        self.type = type
+        self.row_group_size = row_group_size
+        self.schema = arrow_schema(type)
+        # 写入的行数
+        self.rows = 0
+        # 写出的row group数量
+        self.row_groups = 0
+        self._columns = {key: [] for key in self.schema.names}
+        if os.path.splitext(file_path)[1] in ('.arrow', '.feather'):
+            self._writer = pa.ipc.new_file(file_path, self.schema)
+        else:
+            self._writer = pa.parquet.ParquetWriter(file_path, self.schema, compression=compression)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, record: dict):
+        for key, value in typed_record(record, self.type).items():
+            self._columns[key].append(value)
+        self.rows += 1
+        if len(self._columns[self.schema.names[0]]) >= self.row_group_size:
+            self.flush()
+
+    def write_rows(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """
+            把缓存的行写成一个row group
+        """
+        if not self._columns[self.schema.names[0]]:
+            return
+        pa = _pyarrow()
+        table = pa.Table.from_pydict(self._columns, schema=self.schema)
+        self._writer.write_table(table)
+        self.row_groups += 1
+        self._columns = {key: [] for key in self.schema.names}
+
+    def close(self):
+        if self._writer is None:
+            return
+        self.flush()
+        self._writer.close()
+        self._writer = None
+        logger.info(f'数据保存至 {self.file_path} 共 {self.rows} 行 {self.row_groups} 个row group')
@@ -1,11 +1,15 @@
+import asyncio
 import json
 import os
 import re
 import time
-import openpyxl
-import requests
-from loguru import logger
-from retry import retry
+from xhs_utils.xlsx_exporter import ILLEGAL_CHARACTERS_RE, XlsxExporter
+
+# 不同类型媒体保存的扩展名
+MEDIA_SUFFIX = {
+    'image': '.jpg',
+    'video': '.mp4',
+}
 
 
 def norm_str(str):
@@ -13,7 +17,6 @@ def norm_str(str):
     return new_str
 
 def norm_text(text):
-    ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
     text = ILLEGAL_CHARACTERS_RE.sub(r'', text)
     return text
 
@@ -23,6 +26,46 @@ def timestamp_to_str(timestamp):
     dt = time.strftime("%Y-%m-%d %H:%M:%S", time_local)
     return dt
 
+# timestamp_to_str 的格式 比 time.strptime 快很多
+TIME_STR_RE = re.compile(r'^(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2})$')
+
+def str_to_timestamp(dt):
+    """
+        timestamp_to_str 的逆运算 返回毫秒时间戳 已经是数字时原样返回 无法解析时返回None
+    """
+    if dt is None or isinstance(dt, bool):
+        return None
+    if isinstance(dt, (int, float)):
+        return int(dt)
+    match = TIME_STR_RE.match(dt)
+    if not match:
+        return None
+    year, month, day, hour, minute, second = (int(part) for part in match.groups())
+    if not (1 <= month <= 12 and 1 <= day <= 31 and hour < 24 and minute < 60 and second < 62):
+        return None
+    try:
+        return int(time.mktime((year, month, day, hour, minute, second, 0, 0, -1)) * 1000)
+    except (ValueError, OverflowError):
+        return None
+
+
+# 小红书展示的数量 1234 1,234 1.2万 10万+ 1.5w 1亿
+COUNT_RE = re.compile(r'^\s*([\d,]*\.?\d+)\s*(万|w|W|亿)?\+?\s*$')
+COUNT_UNITS = {None: 1, '万': 10000, 'w': 10000, 'W': 10000, '亿': 100000000}
+
+def parse_count(count):
+    """
+        把展示用的数量转成整数 '1.2万' -> 12000 '10万+' -> 100000 无法解析时返回None
+    """
+    if count is None or isinstance(count, bool):
+        return None
+    if isinstance(count, (int, float)):
+        return int(count)
+    match = COUNT_RE.match(str(count))
+    if not match:
+        return None
+    return round(float(match.group(1).replace(',', '')) * COUNT_UNITS[match.group(2)])
+
 def handle_user_info(data, user_id):
     home_url = f'https://www.xiaohongshu.com/user/profile/{user_id}'
     nickname = data['basic_info']['nickname']
@@ -175,35 +218,69 @@ def handle_comment_info(data):
         'ip_location': ip_location,
         'pictures': pictures,
     }
-def save_to_xlsx(datas, file_path, type='note'):
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    if type == 'note':
-        headers = ['笔记id', '笔记url', '笔记类型', '用户id', '用户主页url', '昵称', '头像url', '标题', '描述', '点赞数量', '收藏数量', '评论数量', '分享数量', '视频封面url', '视频地址url', '图片地址url列表', '标签', '上传时间', 'ip归属地']
-    elif type == 'user':
-        headers = ['用户id', '用户主页url', '用户名', '头像url', '小红书号', '性别', 'ip地址', '介绍', '关注数量', '粉丝数量', '作品被赞和收藏数量', '标签']
-    else:
-        headers = ['笔记id', '笔记url', '评论id', '用户id', '用户主页url', '昵称', '头像url', '评论内容', '评论标签', '点赞数量', '上传时间', 'ip归属地', '图片地址url列表']
-    ws.append(headers)
-    for data in datas:
-        data = {k: norm_text(str(v)) for k, v in data.items()}
-        ws.append(list(data.values()))
-    wb.save(file_path)
-    logger.info(f'数据保存至 {file_path}')
+# handle_note_info handle_user_info handle_comment_info 返回的字段和类型
+# string 字符串 count 数量(parse_count) timestamp 毫秒时间戳(str_to_timestamp) list 字符串列表
+RECORD_FIELD_TYPES = {
+    'note': {
+        'note_id': 'string', 'note_url': 'string', 'note_type': 'string', 'user_id': 'string',
+        'home_url': 'string', 'nickname': 'string', 'avatar': 'string', 'title': 'string', 'desc': 'string',
+        'liked_count': 'count', 'collected_count': 'count', 'comment_count': 'count', 'share_count': 'count',
+        'video_cover': 'string', 'video_addr': 'string', 'image_list': 'list', 'tags': 'list',
+        'upload_time': 'timestamp', 'ip_location': 'string',
+    },
+    'user': {
+        'user_id': 'string', 'home_url': 'string', 'nickname': 'string', 'avatar': 'string', 'red_id': 'string',
+        'gender': 'string', 'ip_location': 'string', 'desc': 'string', 'follows': 'count', 'fans': 'count',
+        'interaction': 'count', 'tags': 'list',
+    },
+    'comment': {
+        'note_id': 'string', 'note_url': 'string', 'comment_id': 'string', 'user_id': 'string',
+        'home_url': 'string', 'nickname': 'string', 'avatar': 'string', 'content': 'string', 'show_tags': 'list',
+        'like_count': 'count', 'upload_time': 'timestamp', 'ip_location': 'string', 'pictures': 'list',
+    },
+}
+
+def typed_record(record, type='note'):
+    """
+        按 RECORD_FIELD_TYPES 转换字段类型 缺少的字段为None 多余的字段丢弃
+    """
+    typed = {}
+    for key, kind in RECORD_FIELD_TYPES[type].items():
+        value = record.get(key)
+        if kind == 'count':
+            value = parse_count(value)
+        elif kind == 'timestamp':
+            value = str_to_timestamp(value)
+        elif kind == 'list':
+            value = [str(item) for item in value] if isinstance(value, (list, tuple)) else []
+        elif value is not None and not isinstance(value, str):
+            value = str(value)
+        typed[key] = value
+    return typed
+
+def save_to_xlsx(datas, file_path, type='note', rollover='sheet'):
+    """
+        datas可以是列表或者生成器 流式写入 超过excel行数上限时按rollover新建sheet或文件
+        返回保存的文件列表
+    """
+    with XlsxExporter(file_path, type=type, rollover=rollover) as exporter:
+        exporter.write_rows(datas)
+    return exporter.files
 
 def download_media(path, name, url, type):
-    if type == 'image':
-        content = requests.get(url).content
-        with open(path + '/' + name + '.jpg', mode="wb") as f:
-            f.write(content)
-    elif type == 'video':
-        res = requests.get(url, stream=True)
-        size = 0
-        chunk_size = 1024 * 1024
-        with open(path + '/' + name + '.mp4', mode="wb") as f:
-            for data in res.iter_content(chunk_size=chunk_size):
-                f.write(data)
-                size += len(data)
+    """
+        同步下载单个媒体 内部使用 xhs_utils.media_downloader.MediaDownloader 失败时重试并断点续传
+        不能在事件循环中调用 异步场景请直接使用 MediaDownloader.download_media
+    """
+    from xhs_utils.media_downloader import MediaDownloader
+
+    async def run():
+        async with MediaDownloader() as downloader:
+            return await downloader.download_media(path, name, url, type)
+
+    success, msg, _ = asyncio.run(run())
+    if not success:
+        raise Exception(f'下载失败 {url}: {msg}')
 
 def save_user_detail(user, path):
     with open(f'{path}/detail.txt', mode="w", encoding="utf-8") as f:
@@ -246,8 +323,10 @@ def save_note_detail(note, path):
 
 
 
-@retry(tries=3, delay=1)
-def download_note(note_info, path):
+def prepare_note_dir(note_info, path):
+    """
+        创建笔记的保存目录 写入info.json和detail.txt 返回目录
+    """
     note_id = note_info['note_id']
     user_id = note_info['user_id']
     title = note_info['title']
@@ -260,14 +339,36 @@ def download_note(note_info, path):
     check_and_create_path(save_path)
     with open(f'{save_path}/info.json', mode='w', encoding='utf-8') as f:
         f.write(json.dumps(note_info) + '\n')
-    note_type = note_info['note_type']
     save_note_detail(note_info, save_path)
+    return save_path
+
+def note_media_list(note_info):
+    """
+        笔记需要下载的媒体 [(文件名, url, 'image'或'video'), ...]
+    """
+    note_type = note_info['note_type']
     if note_type == '图集':
-        for img_index, img_url in enumerate(note_info['image_list']):
-            download_media(save_path, f'image_{img_index}', img_url, 'image')
+        return [(f'image_{img_index}', img_url, 'image') for img_index, img_url in enumerate(note_info['image_list'])]
     elif note_type == '视频':
-        download_media(save_path, 'cover', note_info['video_cover'], 'image')
-        download_media(save_path, 'video', note_info['video_addr'], 'video')
+        return [('cover', note_info['video_cover'], 'image'), ('video', note_info['video_addr'], 'video')]
+    return []
+
+
+def download_note(note_info, path, store=None):
+    """
+        同步下载笔记的媒体 内部使用 xhs_utils.media_downloader.MediaDownloader 同一笔记的媒体并发下载
+        不能在事件循环中调用 异步场景或者批量下载多篇笔记时请直接使用 MediaDownloader
+        store: xhs_utils.media_store.MediaStore 传入时已经在仓库中的媒体不再下载
+    """
+    from xhs_utils.media_downloader import MediaDownloader
+
+    async def run():
+        async with MediaDownloader(store=store) as downloader:
+            return await downloader.download_note(note_info, path)
+
+    success, msg, save_path = asyncio.run(run())
+    if not success:
+        raise Exception(msg)
     return save_path
 
 
@@ -0,0 +1,169 @@
+import gzip
+import json
+import os
+import time
+from dataclasses import dataclass
+
+from loguru import logger
+
+FSYNC_POLICIES = ('batch', 'interval', 'never')
+
+
+@dataclass(kw_only=True, slots=True)
+class JsonlSinkStats:
+    # 写入的记录数
+    records: int = 0
+    # 写出的批次数
+    batches: int = 0
+    # 调用fsync的次数
+    fsyncs: int = 0
+    # 写入磁盘的字节数 压缩时为压缩后的大小
+    bytes: int = 0
+    # 创建的文件数
+    files: int = 0
+
+
+class JsonlSink:
+    """
+        只追加的JSONL文件 每行一条记录 适合保存接口原始数据和处理后的记录
+        记录先放在内存中 满batch_size条后一次写入
+        文件名 {path}/{prefix}-{时间}-{序号}.jsonl 超过max_bytes或打开超过max_seconds后换新文件
+        with JsonlSink('datas/comments', prefix='comment', fsync='interval') as sink:
+            sink.write_rows(comment_iter)
+        :param path: 保存的目录
+        :param prefix: 文件名前缀
+        :param batch_size: 每批写入的记录数
+        :param fsync: batch 每批写入后fsync interval 距离上次fsync超过fsync_interval秒时fsync never 交给操作系统
+        :param fsync_interval: fsync='interval' 时的间隔(秒)
+        :param max_bytes: 单个文件的最大字节数 为空时不按大小切分
+        :param max_seconds: 单个文件的最长写入时间(秒) 为空时不按时间切分
+        :param compression: None 或 'gzip'
+    """
+
+    def __init__(self, path: str, prefix: str = 'records', batch_size: int = 1000, fsync: str = 'interval',
+                 fsync_interval: float = 1.0, max_bytes: int = 256 * 1024 * 1024, max_seconds: float = 3600,
+                 compression: str = None):
+        if fsync not in FSYNC_POLICIES:
+            raise Exception(f'fsync只能是 {"、".join(FSYNC_POLICIES)}: {fsync}')
+        if compression not in (None, 'gzip'):
+            raise Exception(f'不支持的压缩格式: {compression}')
+        self.path = path
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.compression = compression
+        self.stats = JsonlSinkStats()
+        # 已经关闭的文件 加上正在写入的文件
+        self.files = []
+        self._buffer = []
+        self._raw = None
+        self._file = None
+        self._opened_at = 0.0
+        self._synced_at = 0.0
+        os.makedirs(path, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _open(self):
+        suffix = '.jsonl.gz' if self.compression == 'gzip' else '.jsonl'
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        index = len(self.files)
+        file_path = f'{self.path}/{self.prefix}-{stamp}-{index:04d}{suffix}'
+        while os.path.exists(file_path):
+            index += 1
+            file_path = f'{self.path}/{self.prefix}-{stamp}-{index:04d}{suffix}'
+        self._raw = open(file_path, mode='xb')
+        self._file = self._raw
+        if self.compression == 'gzip':
+            # 压缩级别用zlib的默认值 9级慢很多而体积相差不大
+            self._file = gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=6)
+            self.stats.bytes += self._raw.tell()
+        self._opened_at = self._synced_at = time.monotonic()
+        self.files.append(file_path)
+        self.stats.files += 1
+
+    def _sync(self):
+        if self._file is not self._raw:
+            self._file.flush()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._synced_at = time.monotonic()
+        self.stats.fsyncs += 1
+
+    def _close_file(self):
+        if self._file is None:
+            return
+        if self._file is not self._raw:
+            # 写入gzip剩下的数据和结尾
+            position = self._raw.tell()
+            self._file.close()
+            self.stats.bytes += self._raw.tell() - position
+        if self.fsync != 'never':
+            self._raw.flush()
+            os.fsync(self._raw.fileno())
+            self.stats.fsyncs += 1
+        self._raw.close()
+        self._raw = None
+        self._file = None
+
+    def _should_rotate(self) -> bool:
+        if self.max_bytes and self._raw.tell() >= self.max_bytes:
+            return True
+        return bool(self.max_seconds) and time.monotonic() - self._opened_at >= self.max_seconds
+
+    def write(self, record):
+        self._buffer.append(json.dumps(record, ensure_ascii=False, default=str))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def write_rows(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """
+            把缓存的记录写成一批 按fsync策略决定是否落盘 超过大小或时间后关闭当前文件
+        """
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._open()
+        position = self._raw.tell()
+        self._file.write(('\n'.join(self._buffer) + '\n').encode('utf-8'))
+        self.stats.records += len(self._buffer)
+        self.stats.batches += 1
+        self._buffer = []
+        if self.fsync == 'batch' or (self.fsync == 'interval'
+                                     and time.monotonic() - self._synced_at >= self.fsync_interval):
+            self._sync()
+        self.stats.bytes += self._raw.tell() - position
+        if self._should_rotate():
+            self._close_file()
+
+    def close(self):
+        self.flush()
+        self._close_file()
+        logger.info(f'数据保存至 {self.path} 共 {self.stats.records} 条 {self.stats.files} 个文件')
+
+
+def read_jsonl(file_path: str):
+    """
+        逐行读取JSONL文件 支持 .gz 进程被杀时最后写到一半的记录会被跳过
+    """
+    opener = gzip.open if file_path.endswith('.gz') else open
+    with opener(file_path, mode='rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                if not line.endswith('\n'):
+                    break
+                yield json.loads(line)
+        except EOFError:
+            # gzip文件没有写完结尾
+            return
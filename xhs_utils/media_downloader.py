@@ -0,0 +1,254 @@
+import asyncio
+import os
+import re
+import shutil
+import time
+from dataclasses import dataclass
+
+import aiohttp
+from loguru import logger
+
+from apis.single_flight import SingleFlight
+from xhs_utils.data_util import MEDIA_SUFFIX, prepare_note_dir, note_media_list
+from xhs_utils.media_store import MediaStore
+
+
+@dataclass(kw_only=True, slots=True)
+class DownloadStats:
+    # 下载完成的文件数量
+    files: int = 0
+    # 下载的字节数
+    bytes: int = 0
+    # 重试后仍然失败的文件数量
+    failed: int = 0
+    # 从已有的 .part 文件续传的次数
+    resumed: int = 0
+    # 分段并行下载的文件数量
+    parallel: int = 0
+    # 第一个文件开始到最后一个文件结束的时间(秒)
+    elapsed: float = 0.0
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.bytes / 1024 / 1024 / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def files_per_s(self) -> float:
+        return self.files / self.elapsed if self.elapsed else 0.0
+
+
+class MediaDownloader:
+    """
+        异步下载笔记的图片和视频
+        所有下载共用一个连接池 不同笔记、同一笔记的不同图片一起受concurrency限制
+        边下载边写入 xxx.part 临时文件 下载完整后再改名 不会留下只写了一半的文件
+        连接中断时保留 .part 文件 重试或者下次运行时用Range请求从断点续传
+        视频可以按parallel_parts分成多段 用多个连接同时下载到 .partN 文件 完成后在磁盘上拼接
+        传入store时媒体下载到仓库中 笔记目录只放硬链接和 manifest.json 仓库中已有的媒体不再下载
+        async with MediaDownloader() as downloader:
+            await downloader.download_notes(note_infos, path)
+        :param concurrency: 同时下载的文件数量
+        :param limit_per_host: 每个cdn域名的最大连接数
+        :param chunk_size: 每次写入磁盘的大小
+        :param tries: 每个文件最多尝试的次数
+        :param delay: 失败后等待多久重试(秒)
+        :param timeout: 单个文件的超时时间(秒)
+        :param parallel_parts: 视频分成几段并行下载 1表示不分段
+        :param parallel_min_size: 大于这个大小(字节)的视频才分段
+        :param store: 按媒体id去重的仓库 xhs_utils.media_store.MediaStore
+    """
+
+    def __init__(self, concurrency: int = 8, limit_per_host: int = 8, chunk_size: int = 1024 * 1024,
+                 tries: int = 3, delay: float = 1, timeout: float = 300,
+                 parallel_parts: int = 1, parallel_min_size: int = 8 * 1024 * 1024, store: MediaStore = None):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._limit_per_host = limit_per_host
+        self._chunk_size = chunk_size
+        self._tries = tries
+        self._delay = delay
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._parallel_parts = parallel_parts
+        self._parallel_min_size = parallel_min_size
+        self._store = store
+        # 不同笔记同时引用同一个媒体时只下载一次
+        self._single_flight = SingleFlight()
+        self._session = None
+        self._started = None
+        self.stats = DownloadStats()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=self._limit_per_host, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _fetch_range(self, url: str, part_path: str, start: int = 0, end: int = None) -> int:
+        """
+            把 [start, end] 区间下载到part_path part_path已有的内容视为已下载的前缀 只请求剩下的部分
+            end为None时表示到文件结尾 返回这次实际传输的字节数
+            服务端不支持Range时从头下载
+        """
+        done = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if end is not None and start + done > end:
+            return 0
+        headers = {}
+        if done or end is not None:
+            headers['Range'] = f'bytes={start + done}-{"" if end is None else end}'
+        size = 0
+        try:
+            async with self._get_session().get(url, headers=headers) as response:
+                if response.status == 416 and end is None:
+                    # 上次已经下载完整但是没来得及改名 或者已有的内容和服务端的文件对不上
+                    match = re.match(r'bytes \*/(\d+)', response.headers.get('Content-Range', ''))
+                    if match and int(match.group(1)) == done:
+                        return 0
+                    os.remove(part_path)
+                    raise aiohttp.ClientPayloadError('Range Not Satisfiable 删除 .part 后重新下载')
+                response.raise_for_status()
+                if headers and response.status != 206:
+                    if end is not None:
+                        raise aiohttp.ClientPayloadError('服务端不支持Range 无法分段下载')
+                    done = 0
+                if done:
+                    self.stats.resumed += 1
+                with open(part_path, mode='ab' if done else 'wb') as f:
+                    async for chunk in response.content.iter_chunked(self._chunk_size):
+                        f.write(chunk)
+                        size += len(chunk)
+        except aiohttp.ClientResponseError:
+            # 404等错误 已有的内容没有意义
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        finally:
+            self.stats.bytes += size
+        return size
+
+    async def _probe(self, url: str) -> int:
+        """
+            用 Range: bytes=0-0 询问文件大小 服务端不支持Range时返回0
+        """
+        async with self._get_session().get(url, headers={'Range': 'bytes=0-0'}) as response:
+            response.raise_for_status()
+            match = re.match(r'bytes 0-0/(\d+)', response.headers.get('Content-Range', ''))
+            if response.status != 206 or not match:
+                return 0
+            return int(match.group(1))
+
+    async def _fetch_parallel(self, url: str, tmp_path: str, total: int):
+        """
+            把文件分成parallel_parts段同时下载到 .partN 文件 全部完成后按顺序拼接到tmp_path
+        """
+        step = -(-total // self._parallel_parts)
+        ranges = [(start, min(start + step, total) - 1) for start in range(0, total, step)]
+        part_paths = [f'{tmp_path}{index}' for index in range(len(ranges))]
+        await asyncio.gather(*[self._fetch_range(url, part_path, start, end)
+                               for part_path, (start, end) in zip(part_paths, ranges)])
+        for part_path, (start, end) in zip(part_paths, ranges):
+            if os.path.getsize(part_path) != end - start + 1:
+                raise aiohttp.ClientPayloadError(f'{part_path} 大小不对')
+        with open(tmp_path, mode='wb') as f:
+            for part_path in part_paths:
+                with open(part_path, mode='rb') as part:
+                    shutil.copyfileobj(part, f, self._chunk_size)
+        for part_path in part_paths:
+            os.remove(part_path)
+        self.stats.parallel += 1
+
+    async def _fetch(self, url: str, file_path: str, parallel: bool = False):
+        tmp_path = file_path + '.part'
+        if parallel and self._parallel_parts > 1 and not os.path.exists(tmp_path):
+            total = await self._probe(url)
+            if total >= self._parallel_min_size:
+                await self._fetch_parallel(url, tmp_path, total)
+                os.replace(tmp_path, file_path)
+                return
+        await self._fetch_range(url, tmp_path)
+        os.replace(tmp_path, file_path)
+
+    async def download(self, url: str, file_path: str, parallel: bool = False) -> (bool, str, int):
+        """
+            下载单个文件 失败时按tries重试 重试时从断点续传
+            :param url: 媒体的url
+            :param file_path: 保存的完整路径
+            :param parallel: 文件足够大并且服务端支持Range时分段并行下载
+            返回 (是否成功, 信息, 文件大小)
+        """
+        async with self._semaphore:
+            if self._started is None:
+                self._started = time.perf_counter()
+            msg = ''
+            for attempt in range(self._tries):
+                if attempt:
+                    await asyncio.sleep(self._delay)
+                try:
+                    await self._fetch(url, file_path, parallel)
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                    msg = f'{type(e).__name__}: {e}'
+                    continue
+                size = os.path.getsize(file_path)
+                self.stats.files += 1
+                self.stats.elapsed = time.perf_counter() - self._started
+                return True, '成功', size
+            self.stats.failed += 1
+            logger.warning(f'下载失败 {url}: {msg}')
+            return False, msg, 0
+
+    async def download_media(self, path: str, name: str, url: str, type: str) -> (bool, str, int):
+        """
+            和 data_util.download_media 的参数相同 按类型加上扩展名
+        """
+        file_path = f'{path}/{name}{MEDIA_SUFFIX[type]}'
+        if self._store is None:
+            return await self.download(url, file_path, parallel=type == 'video')
+        blob_path = self._store.blob_path(url, type)
+        if os.path.exists(blob_path):
+            self._store.stats.hits += 1
+            result = True, '成功', os.path.getsize(blob_path)
+        else:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            result = await self._single_flight.do(blob_path, lambda: self._download_blob(url, blob_path, type))
+        if result[0]:
+            self._store.place(blob_path, file_path)
+        return result
+
+    async def _download_blob(self, url: str, blob_path: str, type: str) -> (bool, str, int):
+        result = await self.download(url, blob_path, parallel=type == 'video')
+        if result[0]:
+            self._store.stats.stores += 1
+        return result
+
+    async def download_note(self, note_info: dict, path: str) -> (bool, str, str):
+        """
+            并发下载一篇笔记的全部媒体
+            :param note_info: data_util.handle_note_info 处理后的笔记
+            :param path: 保存的根目录
+            返回 (是否全部成功, 信息, 笔记的保存目录)
+        """
+        save_path = prepare_note_dir(note_info, path)
+        media_list = note_media_list(note_info)
+        results = await asyncio.gather(*[self.download_media(save_path, name, url, type)
+                                         for name, url, type in media_list])
+        if self._store is not None:
+            self._store.write_manifest(save_path, media_list)
+        failed = [msg for success, msg, _ in results if not success]
+        if failed:
+            return False, f'{len(failed)}个文件下载失败 ' + '; '.join(failed), save_path
+        return True, '成功', save_path
+
+    async def download_notes(self, note_infos: list, path: str) -> list:
+        """
+            并发下载多篇笔记 返回每篇笔记的 (是否全部成功, 信息, 保存目录)
+        """
+        return await asyncio.gather(*[self.download_note(note_info, path) for note_info in note_infos])
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from xhs_utils.data_util import MEDIA_SUFFIX
+
+# sns-webpic 图片url路径前面的 时间/签名 两段 每次请求都会变化
+_SIGNED_PREFIX = re.compile(r'^\d{12}/[0-9a-f]{32}/')
+
+
+def media_key(url: str) -> str:
+    """
+        cdn url 归一化后的媒体id 同一张图片换了域名、签名、样式后缀后得到相同的id
+        http://sns-webpic-qc.xhscdn.com/202410181234/<32位签名>/1040g2sg31...!nd_dft_wlteh_webp_3 -> 1040g2sg31...
+        http://sns-webpic-qc.xhscdn.com/202410181234/<32位签名>/spectrum/1040g0k0...!nd_dft_wlteh_webp_3 -> spectrum/1040g0k0...
+        和 XhsApi.get_note_no_water_img 取到的 img_id 一致 视频取 origin_video_key
+    """
+    path = urlsplit(url).path.split('!')[0].strip('/')
+    return _SIGNED_PREFIX.sub('', path + '/').rstrip('/')
+
+
+@dataclass(kw_only=True, slots=True)
+class MediaStoreStats:
+    # 已经在仓库中 直接链接的次数
+    hits: int = 0
+    # 新存入仓库的文件数量
+    stores: int = 0
+    # 不支持硬链接 退回复制的次数
+    copies: int = 0
+
+
+class MediaStore:
+    """
+        按媒体id保存文件的仓库 同一张图片/视频只保存一份
+        root/ab/abcdef....jpg 文件名是 media_key 的sha1
+        笔记目录中的文件是仓库文件的硬链接 link=False 时只写 manifest.json 记录引用的仓库文件
+        重复爬取时已经在仓库中的媒体不再下载
+        :param root: 仓库目录
+        :param link: 是否在笔记目录中创建硬链接
+    """
+
+    def __init__(self, root: str, link: bool = True):
+        self.root = root
+        self.link = link
+        self.stats = MediaStoreStats()
+        os.makedirs(root, exist_ok=True)
+
+    def blob_path(self, url: str, type: str) -> str:
+        """
+            媒体在仓库中的路径
+        """
+        digest = hashlib.sha1(media_key(url).encode('utf-8')).hexdigest()
+        return os.path.join(self.root, digest[:2], digest + MEDIA_SUFFIX[type])
+
+    def has(self, url: str, type: str) -> bool:
+        return os.path.exists(self.blob_path(url, type))
+
+    def add(self, url: str, type: str, file_path: str) -> str:
+        """
+            把已经下载完整的file_path存入仓库 仓库中已有时不覆盖 返回仓库中的路径
+        """
+        blob_path = self.blob_path(url, type)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            self._link(file_path, blob_path)
+            self.stats.stores += 1
+        return blob_path
+
+    def _link(self, src: str, dst: str):
+        """
+            先链接到临时文件再改名 dst已存在时也能原子地替换
+        """
+        tmp_path = dst + '.link'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(src, tmp_path)
+        except OSError:
+            # 跨磁盘或文件系统不支持硬链接
+            shutil.copyfile(src, tmp_path)
+            self.stats.copies += 1
+        os.replace(tmp_path, dst)
+
+    def place(self, blob_path: str, file_path: str):
+        """
+            让笔记目录中的file_path指向仓库文件 已经指向同一个文件时不做任何事
+        """
+        if not self.link:
+            return
+        if os.path.exists(file_path) and os.path.samefile(blob_path, file_path):
+            return
+        self._link(blob_path, file_path)
+
+    def manifest_entry(self, name: str, url: str, type: str) -> dict:
+        blob_path = self.blob_path(url, type)
+        return {
+            'name': name + MEDIA_SUFFIX[type],
+            'url': url,
+            'type': type,
+            'key': media_key(url),
+            'blob': os.path.relpath(blob_path, self.root).replace(os.sep, '/'),
+            'size': os.path.getsize(blob_path) if os.path.exists(blob_path) else 0,
+        }
+
+    def write_manifest(self, save_path: str, media_list: list):
+        """
+            在笔记目录写入 manifest.json 记录每个媒体对应的仓库文件
+            :param media_list: data_util.note_media_list 的返回值
+        """
+        entries = [self.manifest_entry(name, url, type) for name, url, type in media_list]
+        with open(f'{save_path}/manifest.json', mode='w', encoding='utf-8') as f:
+            json.dump({'root': os.path.abspath(self.root), 'media': entries}, f, ensure_ascii=False, indent=2)
+
+    def disk_usage(self) -> (int, int):
+        """
+            仓库中的 (文件数量, 总字节数)
+        """
+        files, size = 0, 0
+        for root, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(tuple(MEDIA_SUFFIX.values())):
+                    files += 1
+                    size += os.path.getsize(os.path.join(root, name))
+        return files, size
@@ -0,0 +1,210 @@
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+
+from xhs_utils.data_util import RECORD_FIELD_TYPES, typed_record
+
+# type -> (表名, 主键)
+STORE_TABLES = {
+    'note': ('notes', 'note_id'),
+    'user': ('users', 'user_id'),
+    'comment': ('comments', 'comment_id'),
+}
+
+STORE_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS notes_user_time ON notes (user_id, upload_time)',
+    'CREATE INDEX IF NOT EXISTS notes_time ON notes (upload_time)',
+    'CREATE INDEX IF NOT EXISTS comments_note_time ON comments (note_id, upload_time)',
+    'CREATE INDEX IF NOT EXISTS comments_user ON comments (user_id)',
+]
+
+_SQL_TYPES = {'string': 'TEXT', 'count': 'INTEGER', 'timestamp': 'INTEGER', 'list': 'TEXT'}
+
+# 一次IN查询最多的参数个数 旧版本sqlite的上限是999
+_IN_CHUNK = 500
+
+
+@dataclass(kw_only=True, slots=True)
+class SqliteStoreStats:
+    # upsert的记录数
+    upserts: int = 0
+    # 提交的事务数
+    commits: int = 0
+
+
+class SqliteStore:
+    """
+        把 handle_note_info handle_user_info handle_comment_info 的结果upsert到sqlite
+        notes users comments 三张表 分别以 note_id user_id comment_id 为主键 字段类型同 RECORD_FIELD_TYPES
+        数量为整数 上传时间为毫秒时间戳 列表存为json 另有 updated_at 记录最后一次写入的时间
+        写入先缓存 满batch_size条后在一个事务中提交 查询前会先提交缓存的写入
+        with SqliteStore('datas/xhs.db') as store:
+            store.upsert_notes(note_infos)
+            new_note_ids = store.missing_note_ids(note_ids)
+        :param path: sqlite文件路径
+        :param batch_size: 每个事务写入的记录数
+    """
+
+    def __init__(self, path: str, batch_size: int = 1000):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.stats = SqliteStoreStats()
+        self._pending = {type: [] for type in STORE_TABLES}
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._upsert_sql = {}
+        for type, (table, key) in STORE_TABLES.items():
+            fields = RECORD_FIELD_TYPES[type]
+            # desc等字段名是sql关键字 需要加引号
+            columns = ', '.join(f'"{name}" {_SQL_TYPES[kind]}' + (' PRIMARY KEY' if name == key else '')
+                                for name, kind in fields.items())
+            self._db.execute(f'CREATE TABLE IF NOT EXISTS {table} ({columns}, updated_at INTEGER NOT NULL)')
+            names = [f'"{name}"' for name in fields] + ['updated_at']
+            updates = ', '.join(f'{name} = excluded.{name}' for name in names if name != f'"{key}"')
+            self._upsert_sql[type] = (f'INSERT INTO {table} ({", ".join(names)}) VALUES ({", ".join("?" * len(names))}) '
+                                      f'ON CONFLICT ({key}) DO UPDATE SET {updates}')
+        for sql in STORE_INDEXES:
+            self._db.execute(sql)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _row(self, type: str, record: dict) -> tuple:
+        typed = typed_record(record, type)
+        for name, kind in RECORD_FIELD_TYPES[type].items():
+            if kind == 'list':
+                typed[name] = json.dumps(typed[name], ensure_ascii=False)
+        return tuple(typed.values()) + (int(time.time() * 1000),)
+
+    def upsert(self, type: str, record: dict):
+        """
+            :param type: note user comment
+            :param record: data_util 处理后的记录 主键相同时覆盖
+        """
+        pending = self._pending[type]
+        pending.append(self._row(type, record))
+        if len(pending) >= self.batch_size:
+            self.flush()
+
+    def upsert_many(self, type: str, records):
+        for record in records:
+            self.upsert(type, record)
+
+    def upsert_note(self, note_info: dict):
+        self.upsert('note', note_info)
+
+    def upsert_notes(self, note_infos):
+        self.upsert_many('note', note_infos)
+
+    def upsert_user(self, user_info: dict):
+        self.upsert('user', user_info)
+
+    def upsert_users(self, user_infos):
+        self.upsert_many('user', user_infos)
+
+    def upsert_comment(self, comment_info: dict):
+        self.upsert('comment', comment_info)
+
+    def upsert_comments(self, comment_infos):
+        self.upsert_many('comment', comment_infos)
+
+    def flush(self):
+        """
+            在一个事务中提交缓存的全部写入
+        """
+        if not any(self._pending.values()):
+            return
+        self._db.execute('BEGIN')
+        try:
+            for type, rows in self._pending.items():
+                if rows:
+                    self._db.executemany(self._upsert_sql[type], rows)
+            self._db.execute('COMMIT')
+        except Exception:
+            self._db.execute('ROLLBACK')
+            raise
+        self.stats.upserts += sum(len(rows) for rows in self._pending.values())
+        self.stats.commits += 1
+        self._pending = {type: [] for type in STORE_TABLES}
+
+    def _existing(self, type: str, ids: list) -> set:
+        table, key = STORE_TABLES[type]
+        existing = set()
+        for start in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[start:start + _IN_CHUNK]
+            sql = f'SELECT {key} FROM {table} WHERE {key} IN ({", ".join("?" * len(chunk))})'
+            existing.update(row[0] for row in self._db.execute(sql, chunk))
+        return existing
+
+    def missing_ids(self, type: str, ids) -> list:
+        """
+            ids中还没有保存的 保持原来的顺序
+        """
+        self.flush()
+        ids = list(ids)
+        existing = self._existing(type, ids)
+        return [id for id in ids if id not in existing]
+
+    def missing_note_ids(self, note_ids) -> list:
+        return self.missing_ids('note', note_ids)
+
+    def has(self, type: str, id: str) -> bool:
+        return not self.missing_ids(type, [id])
+
+    def stored_note_ids(self, user_id: str, since: int = None) -> set:
+        """
+            已经保存的某个用户的笔记id
+            :param since: 毫秒时间戳 只返回这之后上传的笔记
+        """
+        self.flush()
+        if since is None:
+            rows = self._db.execute('SELECT note_id FROM notes WHERE user_id = ?', (user_id,))
+        else:
+            rows = self._db.execute('SELECT note_id FROM notes WHERE user_id = ? AND upload_time >= ?',
+                                    (user_id, since))
+        return {row[0] for row in rows}
+
+    def stored_comment_ids(self, note_id: str) -> set:
+        self.flush()
+        return {row[0] for row in self._db.execute('SELECT comment_id FROM comments WHERE note_id = ?', (note_id,))}
+
+    def latest_upload_time(self, user_id: str):
+        """
+            某个用户已保存的最新笔记的上传时间(毫秒时间戳) 没有时返回None
+        """
+        self.flush()
+        return self._db.execute('SELECT MAX(upload_time) FROM notes WHERE user_id = ?', (user_id,)).fetchone()[0]
+
+    def get(self, type: str, id: str):
+        """
+            按主键读取一条记录 列表字段还原为list 不存在时返回None
+        """
+        self.flush()
+        table, key = STORE_TABLES[type]
+        cursor = self._db.execute(f'SELECT * FROM {table} WHERE {key} = ?', (id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        record = dict(zip([column[0] for column in cursor.description], row))
+        for name, kind in RECORD_FIELD_TYPES[type].items():
+            if kind == 'list' and record[name] is not None:
+                record[name] = json.loads(record[name])
+        return record
+
+    def count(self, type: str) -> int:
+        self.flush()
+        return self._db.execute(f'SELECT COUNT(*) FROM {STORE_TABLES[type][0]}').fetchone()[0]
+
+    def close(self):
+        if self._db is not None:
+            self.flush()
+            self._db.close()
+            self._db = None
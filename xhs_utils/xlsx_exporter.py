@@ -0,0 +1,114 @@
+import os
+import re
+
+import openpyxl
+from loguru import logger
+
+# xlsx中不允许出现的控制字符
+ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
+# excel每个sheet最多的行数
+EXCEL_MAX_ROWS = 1048576
+# excel单元格最多的字符数
+EXCEL_MAX_CELL_CHARS = 32767
+
+XLSX_HEADERS = {
+    'note': ['笔记id', '笔记url', '笔记类型', '用户id', '用户主页url', '昵称', '头像url', '标题', '描述', '点赞数量', '收藏数量', '评论数量', '分享数量', '视频封面url', '视频地址url', '图片地址url列表', '标签', '上传时间', 'ip归属地'],
+    'user': ['用户id', '用户主页url', '用户名', '头像url', '小红书号', '性别', 'ip地址', '介绍', '关注数量', '粉丝数量', '作品被赞和收藏数量', '标签'],
+    'comment': ['笔记id', '笔记url', '评论id', '用户id', '用户主页url', '昵称', '头像url', '评论内容', '评论标签', '点赞数量', '上传时间', 'ip归属地', '图片地址url列表'],
+}
+
+
+def sanitize_cell(value) -> str:
+    """
+        转成字符串 去掉xlsx不允许的控制字符 超过单元格上限的部分截断
+    """
+    text = value if type(value) is str else str(value)
+    text = ILLEGAL_CHARACTERS_RE.sub('', text)
+    return text if len(text) <= EXCEL_MAX_CELL_CHARS else text[:EXCEL_MAX_CELL_CHARS]
+
+
+class XlsxExporter:
+    """
+        流式导出xlsx 使用openpyxl的write_only模式 已经写入的行不常驻内存
+        超过excel的行数上限时 rollover='sheet' 在同一个文件中新建sheet rollover='file' 新建 xxx_2.xlsx
+        with XlsxExporter('datas/comments.xlsx', type='comment') as exporter:
+            exporter.write_rows(comment_iter)
+        :param file_path: 保存路径
+        :param type: note user comment 决定表头
+        :param rollover: sheet 或 file
+        :param max_rows: 每个sheet最多的行数 包括表头
+        :param headers: 自定义表头 为空时按type选择
+    """
+
+    def __init__(self, file_path: str, type: str = 'note', rollover: str = 'sheet',
+                 max_rows: int = EXCEL_MAX_ROWS, headers: list = None):
+        if rollover not in ('sheet', 'file'):
+            raise Exception(f'rollover只能是sheet或file: {rollover}')
+        self.file_path = file_path
+        self.rollover = rollover
+        self.max_rows = max_rows
+        self.headers = headers if headers is not None else XLSX_HEADERS.get(type, XLSX_HEADERS['comment'])
+        # 写入的数据行数 不包括表头
+        self.rows = 0
+        # 已经保存的文件
+        self.files = []
+        self._workbook = None
+        self._sheet = None
+        self._sheet_rows = 0
+        self._sheet_index = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _file_name(self) -> str:
+        if not self.files:
+            return self.file_path
+        stem, suffix = os.path.splitext(self.file_path)
+        return f'{stem}_{len(self.files) + 1}{suffix}'
+
+    def _new_sheet(self):
+        if self._workbook is None:
+            self._workbook = openpyxl.Workbook(write_only=True)
+            self._sheet_index = 0
+        self._sheet_index += 1
+        self._sheet = self._workbook.create_sheet(f'Sheet{self._sheet_index}')
+        self._sheet.append(self.headers)
+        self._sheet_rows = 1
+
+    def _save(self):
+        file_name = self._file_name()
+        self._workbook.save(file_name)
+        self.files.append(file_name)
+        self._workbook = None
+        self._sheet = None
+
+    def write(self, record):
+        """
+            写入一行 record可以是字典(按值的顺序)或列表
+        """
+        if self._sheet is None or self._sheet_rows >= self.max_rows:
+            if self._sheet is not None and self.rollover == 'file':
+                self._save()
+            self._new_sheet()
+        values = record.values() if isinstance(record, dict) else record
+        self._sheet.append([sanitize_cell(value) for value in values])
+        self._sheet_rows += 1
+        self.rows += 1
+
+    def write_rows(self, records):
+        for record in records:
+            self.write(record)
+
+    def close(self) -> list:
+        """
+            保存最后一个文件 返回全部文件路径
+        """
+        if self._sheet is None and not self.files:
+            self._new_sheet()
+        if self._workbook is not None:
+            self._save()
+            logger.info(f'数据保存至 {", ".join(self.files)} 共 {self.rows} 行')
+        return self.files